@@ -0,0 +1,256 @@
+import sys
+import json
+import bisect
+import argparse
+
+from address_parser import PREFIX_TO_MASK, parse_ipv4, parse_address
+from ip_attributes import read_lines
+
+
+ACTIONS = ("permit", "deny")
+
+
+def parse_spec(tokens, position):
+    """
+        Reads one address spec starting at tokens[position]:
+        'any', 'host IP', 'IP/cidr' or 'IP WILDCARD' (Cisco style, bits set in
+        the wildcard are ignored, and they need not be contiguous).
+        Returns ((value, care mask), next position); value has the ignored bits cleared.
+        e.g. ['10.0.0.0', '0.0.255.0'] => ((167772160, 4294902015), 2)
+    """
+    if position >= len(tokens):
+        raise ValueError("Error: Missing address.")
+    token = tokens[position]
+    if token == "any":
+        return (0, 0), position + 1
+    if token == "host":
+        address = parse_ipv4(tokens[position + 1]) if position + 1 < len(tokens) else None
+        if address is None:
+            raise ValueError("Error: 'host' needs an IP address.")
+        return (address, 0xFFFFFFFF), position + 2
+    if "/" in token:
+        address, cidr = parse_address([token])
+        return (address & PREFIX_TO_MASK[cidr], PREFIX_TO_MASK[cidr]), position + 1
+    address = parse_ipv4(token)
+    wildcard = parse_ipv4(tokens[position + 1]) if position + 1 < len(tokens) else None
+    if address is None or wildcard is None:
+        raise ValueError(f"Error: Invalid address '{' '.join(tokens[position:position + 2])}'.")
+    care = ~wildcard & 0xFFFFFFFF
+    return (address & care, care), position + 2
+
+
+def parse_rule(text):
+    """
+        One ACL line: '[access-list N] permit|deny [ip] SOURCE [DESTINATION]'.
+        A missing destination (standard ACL) means any.
+        Returns {"action", "source", "destination", "text"}, or None for remarks.
+        e.g. 'deny 10.0.0.0 0.0.255.0 host 8.8.8.8'
+    """
+    tokens = text.split()
+    if len(tokens) >= 2 and tokens[0] == "access-list":
+        tokens = tokens[2:]
+    if tokens and tokens[0] == "remark":
+        return None
+    if not tokens or tokens[0] not in ACTIONS:
+        raise ValueError(f"Error: Rule must start with permit or deny: '{text}'.")
+    position = 2 if len(tokens) > 1 and tokens[1] == "ip" else 1
+    source, position = parse_spec(tokens, position)
+    destination = (0, 0)
+    if position < len(tokens):
+        destination, position = parse_spec(tokens, position)
+    if position != len(tokens):
+        raise ValueError(f"Error: Unexpected '{' '.join(tokens[position:])}' in rule '{text}'.")
+    return {"action": tokens[0], "source": source, "destination": destination, "text": text}
+
+
+def read_rules(source):
+    """
+        Rules from lines of text, in order; comments and remarks are skipped.
+        Each rule also gets the "line" it came from.
+    """
+    rules = []
+    for line_number, text in read_lines(source):
+        try:
+            rule = parse_rule(text)
+        except ValueError as msg:
+            raise ValueError(f"{msg} (line {line_number})")
+        if rule is not None:
+            rules.append({**rule, "line": line_number})
+    return rules
+
+
+def first_match(rules, source, destination):
+    """
+        Reference implementation: index of the first rule matching the integer
+        addresses, scanning every rule, or None (implicit deny).
+    """
+    for index, rule in enumerate(rules):
+        value, care = rule["source"]
+        if source & care == value:
+            value, care = rule["destination"]
+            if destination & care == value:
+                return index
+    return None
+
+
+class SpecIndex:
+    """
+        For one side (source or destination) of all rules: which rules match
+        an address, as a bitset (bit i = rule i).
+        - Prefix specs (contiguous masks, including any and host) are cut into
+          disjoint segments, each holding the bitset of the prefixes covering it:
+          one bisect per lookup.
+        - Non-contiguous wildcards are grouped by care mask: one dict lookup
+          per distinct mask.
+    """
+    def __init__(self, specs):
+        toggles = {0: 0}
+        self.groups = {}
+        for index, (value, care) in enumerate(specs):
+            bit = 1 << index
+            wildcard = ~care & 0xFFFFFFFF
+            if wildcard & (wildcard + 1) == 0:
+                # Contiguous: the range value..value | wildcard. Each bit is toggled on
+                # at its start and off after its end, so a running XOR gives the coverage
+                toggles[value] = toggles.get(value, 0) ^ bit
+                if value | wildcard < 0xFFFFFFFF:
+                    end = (value | wildcard) + 1
+                    toggles[end] = toggles.get(end, 0) ^ bit
+            else:
+                group = self.groups.setdefault(care, {})
+                group[value] = group.get(value, 0) | bit
+        self.boundaries = sorted(toggles)
+        self.segments = []
+        bits = 0
+        for point in self.boundaries:
+            bits ^= toggles[point]
+            self.segments.append(bits)
+        self.group_items = list(self.groups.items())
+
+    def matches(self, address):
+        bits = self.segments[bisect.bisect_right(self.boundaries, address) - 1]
+        for care, values in self.group_items:
+            bits |= values.get(address & care, 0)
+        return bits
+
+
+class AccessList:
+    """
+        Compiled ordered rule list. A match ANDs the source and destination
+        bitsets; the lowest set bit is the first matching rule. Cost per pair:
+        two bisects over at most 2n + 1 segments, plus one dict lookup per
+        distinct non-contiguous wildcard, instead of scanning n rules.
+        No match means the implicit deny at the end of every ACL.
+    """
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self.source = SpecIndex(rule["source"] for rule in self.rules)
+        self.destination = SpecIndex(rule["destination"] for rule in self.rules)
+
+    @classmethod
+    def from_lines(cls, lines):
+        return cls(read_rules(lines))
+
+    def match(self, source, destination):
+        """
+            Index of the first rule matching the integer addresses, or None.
+        """
+        bits = self.source.matches(source) & self.destination.matches(destination)
+        return (bits & -bits).bit_length() - 1 if bits else None
+
+    def action(self, source, destination):
+        index = self.match(source, destination)
+        return "deny" if index is None else self.rules[index]["action"]
+
+    def match_many(self, pairs):
+        """
+            Bulk mode: first-match indexes for (source, destination) pairs.
+            Batches repeat addresses (flows, logs), so each distinct address is
+            looked up once per side.
+        """
+        sources, destinations = {}, {}
+        source_index, destination_index = self.source, self.destination
+        result = []
+        for source, destination in pairs:
+            source_bits = sources.get(source)
+            if source_bits is None:
+                source_bits = sources[source] = source_index.matches(source)
+            destination_bits = destinations.get(destination)
+            if destination_bits is None:
+                destination_bits = destinations[destination] = destination_index.matches(destination)
+            bits = source_bits & destination_bits
+            result.append((bits & -bits).bit_length() - 1 if bits else None)
+        return result
+
+
+def parse_pair(text):
+    """
+        'source destination' => two integer addresses; raises ValueError.
+    """
+    tokens = text.split()
+    addresses = [parse_ipv4(token) for token in tokens]
+    if len(tokens) != 2 or None in addresses:
+        raise ValueError("Error: Expected 'source destination' IP addresses.")
+    return addresses[0], addresses[1]
+
+
+def classify(access_list, lines, batch_size=10000):
+    """
+        Yields one record per (line_number, text) pair line: the action and the
+        matching rule's line (None for the implicit deny), or an error.
+    """
+    batch = []
+
+    def flush():
+        valid = [pair for _, _, pair in batch if pair is not None]
+        matches = iter(access_list.match_many(valid))
+        for line_number, text, pair in batch:
+            record = {"line": line_number, "input": text}
+            if pair is None:
+                record["error"] = "Error: Expected 'source destination' IP addresses."
+            else:
+                index = next(matches)
+                rule = access_list.rules[index] if index is not None else None
+                record["action"] = rule["action"] if rule else "deny"
+                record["rule"] = rule["line"] if rule else None
+            yield record
+
+    for line_number, text in lines:
+        try:
+            pair = parse_pair(text)
+        except ValueError:
+            pair = None
+        batch.append((line_number, text, pair))
+        if len(batch) >= batch_size:
+            yield from flush()
+            batch = []
+    yield from flush()
+
+
+def write_records(access_list, source, output):
+    for record in classify(access_list, read_lines(source)):
+        output.write(json.dumps(record))
+        output.write("\n")
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        description="Evaluates 'source destination' address pairs against an ordered permit/deny rule list.")
+    parser.add_argument("rules", help="ACL file, one rule per line, e.g. 'deny 10.0.0.0 0.0.255.0 any'")
+    parser.add_argument("pairs", nargs="?", default="-", help="'source destination' lines (default: stdin)")
+    args = parser.parse_args(argv[1:])
+
+    try:
+        with open(args.rules, "r") as file:
+            access_list = AccessList.from_lines(file)
+        if args.pairs == "-":
+            write_records(access_list, sys.stdin, sys.stdout)
+        else:
+            with open(args.pairs, "r") as source:
+                write_records(access_list, source, sys.stdout)
+    except (OSError, ValueError) as msg:
+        print(msg)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,135 @@
+import re
+
+
+# Precomputed tables, one entry per prefix length (33 in total)
+# PREFIX_TO_MASK[24] == 0xFFFFFF00, PREFIX_TO_WILDCARD[24] == 0x000000FF
+PREFIX_TO_MASK = tuple((0xFFFFFFFF << (32 - prefix)) & 0xFFFFFFFF for prefix in range(33))
+PREFIX_TO_WILDCARD = tuple(~mask & 0xFFFFFFFF for mask in PREFIX_TO_MASK)
+MASK_TO_PREFIX = {mask: prefix for prefix, mask in enumerate(PREFIX_TO_MASK)}
+
+# Canonical octet strings: '0'..'255', no leading zeros, ASCII digits only.
+# A dictionary hit validates and converts an octet at once.
+OCTET_VALUES = {str(value): value for value in range(256)}
+
+# CIDR strings the CLI accepts after an address ('24', '/24', '07', '/07' ...)
+CIDR_VALUES = {}
+for _prefix in range(33):
+    for _text in {str(_prefix), f"{_prefix:02d}"}:
+        CIDR_VALUES[_text] = _prefix
+        CIDR_VALUES["/" + _text] = _prefix
+del _prefix, _text
+
+IP_PATTERN = re.compile(r"(25[0-5]|2[0-4]\d|1\d{2}|[1-9]?\d)"
+                        r"(\.(25[0-5]|2[0-4]\d|1\d{2}|[1-9]?\d)){3}")
+IP_CIDR_PATTERN = re.compile(r'^(\d{1,3}(?:\.\d{1,3}){3})\s*/\s*(\d{1,2})$')
+CIDR_PATTERN = re.compile(r"/?(\d{1,2})")
+
+USAGE_ERROR = "Error: Usage: <program> <ip/cidr> OR <ip> <subnet mask> OR <ip> /cidr"
+FORMAT_ERROR = "Error: Invalid input format. Expected IP/CIDR like '192.168.0.1/24'."
+IP_ERROR = "Error: Invalid IP format."
+CIDR_ERROR = "Error: Invalid CIDR/mask format. Expected: /<0–31> or valid subnet mask."
+
+
+def parse_ipv4(text):
+    """
+        Validates and converts a dotted quad in one pass.
+        Returns the 32-bit integer, or None if text is not a canonical address.
+        e.g. '192.168.1.1' => 3232235777, '192.168.01.1' => None
+    """
+    parts = text.split(".")
+    if len(parts) != 4:
+        return None
+    try:
+        return (OCTET_VALUES[parts[0]] << 24 | OCTET_VALUES[parts[1]] << 16
+                | OCTET_VALUES[parts[2]] << 8 | OCTET_VALUES[parts[3]])
+    except KeyError:
+        return None
+
+
+def subnet_to_cidr(subnet_mask):
+    """
+        Converts subnet mask (e.g., 255.255.255.0) to CIDR (e.g., /24).
+        Only contiguous masks are in MASK_TO_PREFIX.
+    """
+    prefix = MASK_TO_PREFIX.get(parse_ipv4(subnet_mask.strip()))
+    if prefix is None:
+        raise ValueError(CIDR_ERROR)
+    return prefix
+
+
+def _parse_fast(args):
+    """
+        The common case: canonical input without stray whitespace.
+        Returns (ip_int, cidr), or None to let the full validation decide.
+    """
+    if len(args) == 1:
+        ip, slash, cidr = args[0].strip().partition("/")
+        if not slash or cidr[:1] == "/":
+            # CIDR_VALUES also holds '/24' for the two-argument form; '1.2.3.4//24' is not valid
+            return None
+        cidr = CIDR_VALUES.get(cidr)
+    elif len(args) == 2:
+        ip = args[0].strip()
+        second_arg = args[1].strip()
+        cidr = CIDR_VALUES.get(second_arg)
+        if cidr is None:
+            cidr = MASK_TO_PREFIX.get(parse_ipv4(second_arg))
+    else:
+        return None
+    ip = parse_ipv4(ip)
+    if ip is None or cidr is None:
+        return None
+    return ip, cidr
+
+
+def _parse_checked(args):
+    """
+        Step-by-step validation that decides which error message applies.
+        Also accepts the unusual spellings the fast path leaves out,
+        such as whitespace around the '/'.
+    """
+    if len(args) == 1:
+        match = IP_CIDR_PATTERN.match(args[0].strip())
+        if not match:
+            raise ValueError(FORMAT_ERROR)
+        ip, cidr_str = match.groups()
+    elif len(args) == 2:
+        ip = args[0].strip()
+        second_arg = args[1].strip()
+        if not IP_PATTERN.fullmatch(ip) or any(o != str(int(o)) for o in ip.split(".")):
+            raise ValueError(IP_ERROR)  # leading zeros or non-ASCII digits
+        cidr_match = CIDR_PATTERN.fullmatch(second_arg)
+        if not cidr_match:
+            return ip, subnet_to_cidr(second_arg)
+        cidr_str = cidr_match.group(1)
+    else:
+        raise ValueError(USAGE_ERROR)
+    if not IP_PATTERN.fullmatch(ip) or any(o != str(int(o)) for o in ip.split(".")):
+        raise ValueError(IP_ERROR)
+    if not cidr_str.isdigit() or not (0 <= int(cidr_str) <= 32):
+        raise ValueError(CIDR_ERROR)
+    return ip, int(cidr_str)
+
+
+def parse_address(args):
+    """
+        Validates CLI-style arguments and returns (ip as int, cidr).
+        Accepts [ip/cidr], [ip, cidr], [ip, /cidr] or [ip, subnet mask].
+        Raises ValueError with the message main prints.
+    """
+    result = _parse_fast(args)
+    if result is not None:
+        return result
+    ip, cidr = _parse_checked(args)
+    return parse_ipv4(ip), cidr
+
+
+def parse_arguments(args):
+    """
+        Same as parse_address, but returns the IP as a dotted string: (ip, cidr).
+    """
+    result = _parse_fast(args)
+    if result is None:
+        return _parse_checked(args)
+    ip, cidr = result
+    return f"{ip >> 24}.{ip >> 16 & 255}.{ip >> 8 & 255}.{ip & 255}", cidr
@@ -0,0 +1,196 @@
+import sys
+import heapq
+import bisect
+import argparse
+
+from ip_attributes import Subnet, load_special_ranges, read_lines, parse_line
+from summarize import coalesce, range_to_cidrs
+from prefix_database import parse_bounds
+
+
+class AddressSet:
+    """
+        A set of IPv4 addresses stored as sorted, coalesced (start, end)
+        intervals (inclusive), so a /8 costs one pair rather than 16M entries.
+        Union, intersection, difference and subset checks walk both interval
+        lists once: O(n + m) in the number of intervals.
+    """
+    __slots__ = ("intervals",)
+
+    def __init__(self, intervals=()):
+        self.intervals = list(coalesce(sorted(intervals)))
+
+    @classmethod
+    def _from_sorted(cls, intervals):
+        """
+            Wraps intervals that are already sorted and coalesced.
+        """
+        result = cls.__new__(cls)
+        result.intervals = intervals
+        return result
+
+    @classmethod
+    def from_subnets(cls, subnets):
+        return cls((subnet.network_address, subnet.broadcast_address) for subnet in subnets)
+
+    @classmethod
+    def from_prefixes(cls, prefixes):
+        """
+            From 'ip/cidr' or 'ip mask' strings; raises ValueError like the CLI.
+        """
+        return cls.from_subnets(Subnet(*parse_line(prefix)) for prefix in prefixes)
+
+    @classmethod
+    def from_special_ranges(cls, special_ranges=None, categories=None):
+        """
+            The address ranges of reserved_ip.json (or another list in its format),
+            optionally only the given categories. CIDR-only entries ("range": "any")
+            have no addresses; malformed entries are skipped, as in get_fyi_info.
+        """
+        if special_ranges is None:
+            special_ranges = load_special_ranges()
+        intervals = []
+        for entry in special_ranges:
+            if categories is not None and entry.get("category") not in categories:
+                continue
+            try:
+                bounds = parse_bounds(entry)
+            except (ValueError, AttributeError):
+                continue
+            if bounds is not None:
+                intervals.append(bounds)
+        return cls(intervals)
+
+    def __iter__(self):
+        return iter(self.intervals)
+
+    def __bool__(self):
+        return bool(self.intervals)
+
+    def __eq__(self, other):
+        return isinstance(other, AddressSet) and self.intervals == other.intervals
+
+    def __repr__(self):
+        cidrs = [f"{Subnet.int_to_dotted_decimal(network)}/{prefix}" for network, prefix in self.to_cidrs()]
+        return f"AddressSet({cidrs})"
+
+    def size(self):
+        """
+            Number of addresses (up to 2 ** 32).
+        """
+        return sum(end - start + 1 for start, end in self.intervals)
+
+    def union(self, other):
+        return AddressSet._from_sorted(list(coalesce(heapq.merge(self.intervals, other.intervals))))
+
+    def intersection(self, other):
+        result = []
+        mine, theirs = self.intervals, other.intervals
+        i = j = 0
+        while i < len(mine) and j < len(theirs):
+            start = max(mine[i][0], theirs[j][0])
+            end = min(mine[i][1], theirs[j][1])
+            if start <= end:
+                result.append((start, end))
+            # Advance whichever interval finishes first
+            if mine[i][1] < theirs[j][1]:
+                i += 1
+            else:
+                j += 1
+        return AddressSet._from_sorted(result)
+
+    def difference(self, other):
+        result = []
+        theirs = other.intervals
+        j = 0
+        for start, end in self.intervals:
+            while j < len(theirs) and theirs[j][1] < start:
+                j += 1
+            k = j
+            while k < len(theirs) and theirs[k][0] <= end:
+                if theirs[k][0] > start:
+                    result.append((start, theirs[k][0] - 1))
+                start = theirs[k][1] + 1
+                if theirs[k][1] > end:
+                    break
+                k += 1
+            if start <= end:
+                result.append((start, end))
+        return AddressSet._from_sorted(result)
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
+
+    def issubset(self, other):
+        theirs = other.intervals
+        j = 0
+        for start, end in self.intervals:
+            while j < len(theirs) and theirs[j][1] < start:
+                j += 1
+            if j == len(theirs) or theirs[j][0] > start or theirs[j][1] < end:
+                return False
+        return True
+
+    def __contains__(self, item):
+        """
+            item: an integer address, a Subnet (all of its addresses) or an AddressSet.
+        """
+        if isinstance(item, AddressSet):
+            return item.issubset(self)
+        if isinstance(item, Subnet):
+            start, end = item.network_address, item.broadcast_address
+        else:
+            start = end = item
+        position = bisect.bisect_right(self.intervals, (start, 0xFFFFFFFF)) - 1
+        return position >= 0 and self.intervals[position][1] >= end
+
+    def to_cidrs(self):
+        """
+            The minimal CIDR list covering exactly this set: yields (network, prefix).
+        """
+        for start, end in self.intervals:
+            yield from range_to_cidrs(start, end)
+
+    def to_subnets(self):
+        return [Subnet(network, prefix) for network, prefix in self.to_cidrs()]
+
+
+def read_prefix_file(filename):
+    """
+        AddressSet of an 'ip/cidr' or 'ip mask' file (stream-mode format).
+    """
+    with open(filename, "r") as file:
+        return AddressSet.from_prefixes(text for _, text in read_lines(file))
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        description="Prints what is left of the given prefixes after removing others, as a minimal CIDR list.")
+    parser.add_argument("prefixes", nargs="+", help="'ip/cidr' prefixes to start from")
+    parser.add_argument("--exclude", action="append", default=[], metavar="FILE",
+                        help="remove the prefixes listed in FILE (repeatable)")
+    parser.add_argument("--exclude-reserved", action="store_true",
+                        help="remove the ranges of reserved_ip.json")
+    parser.add_argument("--intersect", action="append", default=[], metavar="FILE",
+                        help="keep only addresses also listed in FILE (repeatable)")
+    args = parser.parse_args(argv[1:])
+
+    try:
+        result = AddressSet.from_prefixes(args.prefixes)
+        if args.exclude_reserved:
+            result -= AddressSet.from_special_ranges()
+        for filename in args.exclude:
+            result -= read_prefix_file(filename)
+        for filename in args.intersect:
+            result &= read_prefix_file(filename)
+    except (OSError, ValueError) as msg:
+        print(msg)
+        return
+    for network, prefix in result.to_cidrs():
+        print(f"{Subnet.int_to_dotted_decimal(network)}/{prefix}")
+    print(f"Addresses: {result.size()}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
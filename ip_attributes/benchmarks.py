@@ -0,0 +1,325 @@
+import io
+import os
+import sys
+import json
+import random
+import timeit
+import argparse
+import platform
+import subprocess
+import tracemalloc
+import contextlib
+
+import ip_attributes
+from ip_attributes import (Subnet, ReservedRangeIndex, CATEGORY_PRIORITY, ip_to_int, subnet_to_cidr,
+                           get_fyi_info, load_special_range_index, parse_address)
+from bulk_analysis import positive_int
+
+
+class StringSubnet:
+    """
+        Reference copy of the original string-based Subnet constructor.
+        Builds the mask as a binary string and re-parses it with int(..., 2).
+        Kept only to measure the integer-native Subnet against it.
+    """
+    def __init__(self, ip, cidr):
+        self.ip = ip
+        self.cidr = cidr
+        binary = "1" * cidr + "0" * (32 - cidr)
+        self.mask = ".".join(str(int(binary[i:i + 8], 2)) for i in range(0, 32, 8))
+        self.binary_mask = "".join(bin(int(o))[2:].zfill(8) for o in self.mask.split("."))
+        self.binary_ip = "".join(bin(int(o))[2:].zfill(8) for o in self.ip.split("."))
+
+        self.network_address = int(self.binary_ip, 2) & int(self.binary_mask, 2)
+        binary_mask_int = int(self.binary_mask, 2)
+        self.broadcast_address = self.network_address | (~binary_mask_int & 0xFFFFFFFF)
+
+        if cidr == 32:
+            usable = (self.network_address, self.network_address, 0)
+        elif cidr == 31:
+            usable = (self.network_address, self.broadcast_address, 2)
+        else:
+            usable = (self.network_address + 1, self.broadcast_address - 1,
+                      self.broadcast_address - self.network_address - 1)
+        self.first_usable_ip, self.last_usable_ip, self.usable_hosts = usable
+
+
+def linear_fyi_info(ip_str, special_ranges, cidr=None):
+    """
+        Reference copy of the original linear-scan get_fyi_info.
+        Re-parses every range on every call.
+    """
+    ip_int = ip_to_int(ip_str)
+    ip_matches = []
+    cidr_matches = []
+    for entry in special_ranges:
+        try:
+            if "cidr" in entry and entry["cidr"] != "N/A":
+                if cidr is not None and entry["cidr"] == f"/{cidr}" and entry["range"] == "any":
+                    cidr_matches.append(entry)
+                    continue
+            if " - " in entry["range"]:
+                start_str, end_str = entry["range"].split(" - ")
+                if ip_to_int(start_str) <= ip_int <= ip_to_int(end_str):
+                    ip_matches.append(entry)
+            elif ip_str.strip() == entry["range"].strip():
+                ip_matches.append(entry)
+        except Exception:
+            continue
+    ip_matches.sort(key=lambda x: CATEGORY_PRIORITY.get(x["category"], 999))
+    top = CATEGORY_PRIORITY.get(ip_matches[0]["category"], 999) if ip_matches else None
+    return [e for e in ip_matches if CATEGORY_PRIORITY.get(e["category"], 999) == top] + cidr_matches
+
+
+def sample_range_table(count, seed=42):
+    """
+        Builds a synthetic reserved-range table with count "a - b" entries.
+    """
+    rng = random.Random(seed)
+    categories = list(CATEGORY_PRIORITY)
+    table = []
+    for _ in range(count):
+        start = rng.getrandbits(32)
+        end = min(start + rng.getrandbits(rng.randint(0, 20)), 0xFFFFFFFF)
+        table.append({
+            "category": rng.choice(categories),
+            "range": f"{Subnet.int_to_dotted_decimal(start)} - {Subnet.int_to_dotted_decimal(end)}",
+            "cidr": "N/A",
+            "usage": "",
+        })
+    return table
+
+
+def nested_range_table(count, seed=42):
+    """
+        Builds count "a - b" entries nested around one address, mostly of one
+        category: lookups there match almost every entry.
+    """
+    rng = random.Random(seed)
+    categories = list(CATEGORY_PRIORITY)
+    center = 0x80000000
+    table = []
+    for depth in range(1, count + 1):
+        start, end = center - depth * rng.randint(1, 1000), center + depth * rng.randint(1, 1000)
+        table.append({
+            "category": categories[0] if rng.random() < 0.9 else rng.choice(categories),
+            "range": f"{Subnet.int_to_dotted_decimal(max(start, 0))} - "
+                     f"{Subnet.int_to_dotted_decimal(min(end, 0xFFFFFFFF))}",
+            "cidr": "N/A",
+            "usage": "",
+        })
+    return table
+
+
+def sample_inputs(count=1000):
+    """
+        Builds a deterministic list of (ip, cidr) pairs spread over the address space.
+    """
+    inputs = []
+    for i in range(count):
+        value = (i * 2654435761) & 0xFFFFFFFF
+        ip = f"{value >> 24}.{(value >> 16) & 255}.{(value >> 8) & 255}.{value & 255}"
+        inputs.append((ip, i % 33))
+    return inputs
+
+
+def time_construction(cls, inputs, repeat=5):
+    """
+        Returns the best time in seconds to construct one object per input pair.
+    """
+    def build():
+        for ip, cidr in inputs:
+            cls(ip, cidr)
+    return min(timeit.repeat(build, number=1, repeat=repeat))
+
+
+def memory_per_object(cls, inputs):
+    """
+        Returns the average number of bytes allocated per live object.
+    """
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    objects = [cls(ip, cidr) for ip, cidr in inputs]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    # Discount the list holding the objects
+    allocated -= sys.getsizeof(objects)
+    return allocated / len(objects)
+
+
+def bench_subnet_construction(count=10000):
+    """
+        Compares object construction time and memory of Subnet vs StringSubnet.
+    """
+    inputs = sample_inputs(count)
+    print(f"\n----- Subnet construction ({count} objects) -----\n")
+    results = {}
+    for cls in (StringSubnet, Subnet):
+        seconds = time_construction(cls, inputs)
+        per_object = memory_per_object(cls, inputs)
+        results[cls.__name__] = (seconds, per_object)
+        print(f"{cls.__name__:<13}: {seconds / count * 1e6:8.2f} µs/object  {per_object:8.1f} bytes/object")
+    old_time, old_mem = results["StringSubnet"]
+    new_time, new_mem = results["Subnet"]
+    print(f"\nSpeedup: {old_time / new_time:.2f}x  Memory: {old_mem / new_mem:.2f}x smaller\n")
+
+
+def bench_fyi_lookup(table_size=100000, lookups=2000):
+    """
+        Compares the linear get_fyi_info scan with ReservedRangeIndex lookups,
+        on spread-out ranges and on deeply nested ones.
+    """
+    ips = [ip for ip, _ in sample_inputs(lookups)]
+    for label, table in (("spread", sample_range_table(table_size)), ("nested", nested_range_table(table_size))):
+        print(f"\n----- FYI lookup ({table_size} {label} ranges) -----\n")
+        start = timeit.default_timer()
+        index = ReservedRangeIndex(table)
+        build = timeit.default_timer() - start
+        indexed = min(timeit.repeat(lambda: [index.lookup(ip, 24) for ip in ips], number=1, repeat=5))
+        # The linear scan is slow at this size, time a small sample
+        sample = ips[:20]
+        linear = min(timeit.repeat(lambda: [linear_fyi_info(ip, table, 24) for ip in sample], number=1, repeat=3))
+        print(f"Index build   : {build * 1e3:8.1f} ms")
+        print(f"Indexed lookup: {indexed / len(ips) * 1e6:8.2f} µs/lookup")
+        print(f"Linear scan   : {linear / len(sample) * 1e6:8.2f} µs/lookup")
+        if label == "nested":
+            deepest = Subnet.int_to_dotted_decimal(0x80000000)
+            deep = min(timeit.repeat(lambda: index.lookup(deepest, 24), number=1, repeat=5))
+            print(f"Deepest lookup: {deep * 1e3:8.2f} ms ({len(index.lookup(deepest, 24))} matches)")
+    print()
+
+
+def run_main(args):
+    """
+        Calls ip_attributes.main in-process with stdout discarded.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        ip_attributes.main(len(args) + 1, ["ip_attributes.py", *args])
+
+
+def run_process(*command):
+    """
+        Runs a command to completion and discards its output.
+    """
+    subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+
+
+def suite_cases(count=1000):
+    """
+        Returns {name: (function, calls per run)}; each function performs
+        `calls` operations on the hot path named by the key.
+    """
+    inputs = sample_inputs(count)
+    subnets = [Subnet(ip, cidr) for ip, cidr in inputs]
+    masks = [subnet.mask for subnet in subnets]
+    addresses = [subnet.network_address for subnet in subnets]
+    special_ranges = load_special_range_index()
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ip_attributes.py")
+    cli_inputs = [f"{ip}/{cidr}" for ip, cidr in inputs[:100]]
+    # Parsing and subnet math are timed separately: the *_parse cases only
+    # validate and convert, subnet_math only builds Subnets from integers
+    slash_args = [[f"{ip}/{cidr}"] for ip, cidr in inputs]
+    mask_args = [[ip, mask] for (ip, cidr), mask in zip(inputs, masks)]
+    parsed = [parse_address(args) for args in slash_args]
+    return {
+        "subnet_construction": (lambda: [Subnet(ip, cidr) for ip, cidr in inputs], count),
+        "cidr_to_mask": (lambda: [subnet.cidr_to_mask() for subnet in subnets], count),
+        "int_to_dotted_decimal": (lambda: [Subnet.int_to_dotted_decimal(a) for a in addresses], count),
+        "subnet_to_cidr": (lambda: [subnet_to_cidr(mask) for mask in masks], count),
+        "cidr_parse": (lambda: [parse_address(args) for args in slash_args], count),
+        "mask_parse": (lambda: [parse_address(args) for args in mask_args], count),
+        "subnet_math": (lambda: [Subnet(ip, cidr) for ip, cidr in parsed], count),
+        "get_fyi_info": (lambda: [get_fyi_info(ip, special_ranges, cidr) for ip, cidr in inputs], count),
+        "main_in_process": (lambda: [run_main([arg]) for arg in cli_inputs], len(cli_inputs)),
+        "startup_python": (lambda: run_process(sys.executable, "-c", "pass"), 1),
+        "startup_cli": (lambda: run_process(sys.executable, script, "192.168.1.45/24"), 1),
+    }
+
+
+def run_suite(repeat=5, selected=None):
+    """
+        Runs every suite case and returns a JSON-serializable result dict.
+        Each case reports the best-of-repeat time per single operation.
+    """
+    results = {}
+    for name, (function, calls) in suite_cases().items():
+        if selected and name not in selected:
+            continue
+        best = min(timeit.repeat(function, number=1, repeat=repeat))
+        results[name] = {"seconds_per_call": best / calls, "calls": calls, "repeat": repeat}
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def print_suite(report):
+    print("\n----- Benchmark suite -----\n")
+    for name, result in report["results"].items():
+        print(f"{name:<22}: {result['seconds_per_call'] * 1e6:12.2f} µs/call")
+    print()
+
+
+def compare_reports(current, baseline, threshold=0.10):
+    """
+        Compares two suite reports case by case.
+        Returns a list of (name, baseline s, current s, ratio) for every
+        case that got slower by more than threshold (0.10 = 10%).
+    """
+    regressions = []
+    print(f"\n----- Compared to baseline (threshold {threshold:.0%}) -----\n")
+    for name, result in current["results"].items():
+        if name not in baseline["results"]:
+            print(f"{name:<22}: new")
+            continue
+        old = baseline["results"][name]["seconds_per_call"]
+        new = result["seconds_per_call"]
+        ratio = new / old
+        status = "REGRESSION" if ratio > 1 + threshold else "ok"
+        print(f"{name:<22}: {old * 1e6:12.2f} -> {new * 1e6:12.2f} µs/call  {ratio:6.2f}x  {status}")
+        if status != "ok":
+            regressions.append((name, old, new, ratio))
+    print()
+    return regressions
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Benchmarks for the ip_attributes hot paths.")
+    parser.add_argument("--json", metavar="FILE", help="write the suite results to FILE")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare against a saved --json result")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="slowdown ratio counted as a regression (default: 0.10)")
+    parser.add_argument("--repeat", type=positive_int, default=5, help="runs per case, best is kept (default: 5)")
+    parser.add_argument("--only", metavar="NAMES", help="comma-separated case names to run")
+    parser.add_argument("--legacy", action="store_true",
+                        help="compare against the original string-based implementations instead")
+    args = parser.parse_args(argv[1:])
+
+    if args.legacy:
+        bench_subnet_construction()
+        bench_fyi_lookup()
+        return 0
+
+    selected = set(args.only.split(",")) if args.only else None
+    if selected:
+        names = suite_cases(count=1).keys()
+        unknown = sorted(selected - names)
+        if unknown:
+            parser.error(f"unknown case(s) for --only: {', '.join(unknown)} (choose from {', '.join(names)})")
+    report = run_suite(args.repeat, selected)
+    print_suite(report)
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(report, file, indent=2)
+    if args.compare:
+        with open(args.compare, "r") as file:
+            baseline = json.load(file)
+        if compare_reports(report, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
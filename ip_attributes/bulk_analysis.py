@@ -0,0 +1,210 @@
+import os
+import sys
+import json
+import time
+import argparse
+import itertools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import profiling
+import ip_attributes
+import output_formats
+from ip_attributes import read_lines, analyze_lines
+
+
+def positive_int(text):
+    """
+        argparse type for counts that must be at least 1.
+    """
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{text}'")
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return value
+
+
+def non_negative_int(text):
+    """
+        argparse type for sizes where 0 means off.
+    """
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{text}'")
+    if value < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or more, got {value}")
+    return value
+
+
+def worker_counts(text):
+    """
+        argparse type for --report: '1,2,4' => [1, 2, 4].
+    """
+    return [positive_int(count) for count in text.split(",")]
+
+
+def read_chunks(source, chunk_size):
+    """
+        Groups (line_number, text) pairs from read_lines into lists of chunk_size.
+    """
+    if chunk_size < 1:
+        raise ValueError(f"Error: Chunk size must be at least 1, got {chunk_size}.")
+    lines = read_lines(source)
+    while True:
+        chunk = list(itertools.islice(lines, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# Per-worker SubnetCache (None unless --subnet-cache)
+subnet_cache = None
+CACHE_COUNTERS = ("hits", "misses", "evictions")
+
+
+def init_worker(profile=False, cache_size=0):
+    """
+        Worker initializer: loads the reserved ranges once per process and,
+        when profiling, wraps the stages so analyze_chunk can report them.
+        With cache_size, each worker keeps its own SubnetCache of that size.
+    """
+    global subnet_cache
+    if profile:
+        ip_attributes.enable_profiling(None)
+    special_ranges = ip_attributes.load_special_range_index()
+    if cache_size:
+        subnet_cache = ip_attributes.SubnetCache(special_ranges, cache_size)
+
+
+def analyze_chunk(chunk, output_format="json"):
+    """
+        Worker task: runs subnet math and FYI classification on one chunk.
+        Returns the chunk encoded in output_format (JSON Lines text by default),
+        so only one string is sent back to the parent process, the chunk's profiling stats
+        (empty unless profiling) and its subnet cache counters (zero without a cache).
+    """
+    with profiling.stage("bulk.analyze_chunk"):
+        # Through the module, so the wrappers installed by enable_profiling are used
+        special_ranges = ip_attributes.load_special_range_index()
+        databases = ip_attributes.load_prefix_databases()
+        before = [0, 0, 0]
+        if subnet_cache is not None:
+            special_ranges = subnet_cache
+            before = [getattr(subnet_cache, name) for name in CACHE_COUNTERS]
+        text = output_formats.encode_block(analyze_lines(chunk, special_ranges, databases), output_format)
+        counters = {name: getattr(subnet_cache, name) - start if subnet_cache is not None else 0
+                    for name, start in zip(CACHE_COUNTERS, before)}
+    return text, profiling.take(), counters
+
+
+def run_parallel(source, output, workers=None, chunk_size=10000, max_pending=None, subnet_cache_size=0,
+                 cache_totals=None, output_format="json"):
+    """
+        Analyzes every line of source in a process pool and writes JSON Lines to output
+        (or CSV or binary records, see output_formats; output must be binary for "binary").
+        Chunks are written in input order. At most max_pending chunks are in
+        flight at once (default 2 per worker), which bounds memory use.
+        When profiling is enabled, the workers' stats are merged into this
+        process (summed over all workers). With subnet_cache_size, every worker
+        keeps a SubnetCache of that size and the summed hits/misses/evictions
+        are added to cache_totals. Returns the number of records written.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+    records = 0
+    writer = output_formats.RecordWriter(output, output_format)
+
+    def write(future):
+        with profiling.stage("bulk.wait_for_worker"):
+            text, stats, counters = future.result()
+        with profiling.stage("bulk.write"):
+            writer.write_block(text)
+        profiling.merge(stats)
+        if cache_totals is not None:
+            for name, count in counters.items():
+                cache_totals[name] = cache_totals.get(name, 0) + count
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(profiling.enabled, subnet_cache_size)) as pool:
+        pending = deque()
+        for chunk in read_chunks(source, chunk_size):
+            if len(pending) >= max_pending:
+                future, count = pending.popleft()
+                write(future)
+                records += count
+            pending.append((pool.submit(analyze_chunk, chunk, output_format), len(chunk)))
+        while pending:
+            future, count = pending.popleft()
+            write(future)
+            records += count
+    writer.close()
+    return records
+
+
+def throughput_report(filename, worker_counts, chunk_size, max_pending):
+    """
+        Runs the whole file once per worker count and prints records/second.
+    """
+    print(f"\n----- Throughput ({filename}) -----\n")
+    for workers in worker_counts:
+        with open(filename, "r") as source, open(os.devnull, "w") as sink:
+            start = time.perf_counter()
+            records = run_parallel(source, sink, workers, chunk_size, max_pending)
+            elapsed = time.perf_counter() - start
+        print(f"Workers: {workers:<3} Records: {records:<10} Time: {elapsed:8.2f} s  "
+              f"Throughput: {records / elapsed:12.0f} records/s")
+    print()
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        description="Parallel bulk mode: analyzes 'ip/cidr' or 'ip mask' lines and writes JSON Lines.")
+    parser.add_argument("input", nargs="?", default="-", help="input file (default: stdin)")
+    parser.add_argument("--workers", type=positive_int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=positive_int, default=10000, help="lines per task (default: 10000)")
+    parser.add_argument("--max-pending", type=positive_int, default=None,
+                        help="chunks in flight before reading pauses (default: 2 x workers)")
+    parser.add_argument("--profile", nargs="?", const="table", choices=("table", "json"),
+                        help="print per-stage timings to stderr at exit (also: $IP_ATTRIBUTES_PROFILE)")
+    parser.add_argument("--subnet-cache", type=non_negative_int, default=0, metavar="N",
+                        help="reuse Subnets of repeated networks from an N-entry LRU cache per worker; "
+                             "hit/miss/eviction counts go to stderr (default: 0, off)")
+    parser.add_argument("--format", default="json", choices=("json", "csv", "binary"),
+                        help="output format (default: json, i.e. JSON Lines)")
+    parser.add_argument("--report", metavar="COUNTS", type=worker_counts,
+                        help="comma-separated worker counts, e.g. 1,2,4; prints records/s instead of results")
+    args = parser.parse_args(argv[1:])
+
+    profile = args.profile or ip_attributes.profile_setting()
+    if profile:
+        ip_attributes.enable_profiling(profile)
+    if args.report:
+        if args.input == "-":
+            parser.error("--report needs an input file")
+        throughput_report(args.input, args.report, args.chunk_size, args.max_pending)
+    else:
+        cache_totals = {}
+        output = sys.stdout.buffer if args.format == "binary" else sys.stdout
+        try:
+            if args.input == "-":
+                run_parallel(sys.stdin, output, args.workers, args.chunk_size, args.max_pending,
+                             args.subnet_cache, cache_totals, args.format)
+            else:
+                with open(args.input, "r") as source:
+                    run_parallel(source, output, args.workers, args.chunk_size, args.max_pending,
+                                 args.subnet_cache, cache_totals, args.format)
+        except ValueError as msg:
+            # e.g. a prefix database that cannot be opened, raised in the workers
+            print(msg)
+            return
+        if args.subnet_cache:
+            hits, misses = cache_totals.get("hits", 0), cache_totals.get("misses", 0)
+            cache_totals.update(maxsize=args.subnet_cache, hit_rate=hits / (hits + misses) if hits + misses else 0.0)
+            print(f"Subnet cache: {json.dumps(cache_totals)}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -1,29 +1,64 @@
+import io
+import os
+import sys
+import csv
+import json
+import time
+import random
+import argparse
+import tempfile
 import subprocess
-import re
 import ipaddress
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+
+import ip_attributes
+import bulk_analysis
+import level_validator
+from ip_attributes import Subnet, ReservedRangeIndex, parse_address
+from level_simulator import Level
+from routing_table import RoutingTable, brute_force_lookup
+from vlsm import plan_vlsm
+from summarize import summarize, summarize_to_k
+from overlap_detector import find_conflicts, level_conflicts
+from prefix_database import compile_database, PrefixDatabase
+from level_validator import validate_files
+from level_watcher import IncrementalLevel
+from address_set import AddressSet
+from address_pool import AddressPool
+from acl_matcher import AccessList, first_match
+from output_formats import decode_binary
+from benchmarks import linear_fyi_info, sample_range_table
+from address_parser import parse_ipv4
+from ip_attributes_client import request
 
 
 GREEN = "\033[92m"
 RED = "\033[91m"
 RESET = "\033[0m"
 
-
-total_tests = 0
-passed_tests = 0
+PROGRAM = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ip_attributes.py")
+DAEMON = os.path.join(os.path.dirname(PROGRAM), "ip_attributes_daemon.py")
 
 
-def run_program_with_args(*args):
+def run_program_with_args(*args, use_subprocess=False):
     """
     Runs the main IP subnet program with the given arguments.
     Captures and returns the stdout output.
-    Used to simulate CLI usage from tests.
+    By default main is called in-process; use_subprocess starts a
+    real python3 interpreter for end-to-end checks.
     """
-    result = subprocess.run(
-        ["python3", "ip_subnet_props.py", *args],
-        text=True,
-        capture_output=True
-    )
-    return result.stdout.strip()
+    if use_subprocess:
+        result = subprocess.run(
+            [sys.executable, PROGRAM, *args],
+            text=True,
+            capture_output=True
+        )
+        return result.stdout.strip()
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(buffer):
+        ip_attributes.main(len(args) + 1, [PROGRAM, *args])
+    return buffer.getvalue().strip()
 
 
 def parse_output(output):
@@ -40,13 +75,11 @@ def parse_output(output):
     return result
 
 
-def validate_with_ipaddress(ip, cidr, output):
+def expected_from_ipaddress(ip, cidr):
     """
-        Cross-validates program output with Python's ipaddress module.
-        Calculates expected network attributes, including usable host count.
-        Compares and prints OK/KO results for each key.
+        Calculates expected network attributes with Python's ipaddress module,
+        keyed like the program's text output.
     """
-    global total_tests, passed_tests
     expected = {}
     net = ipaddress.ip_network(f"{ip}/{cidr}", strict=False)
 
@@ -54,9 +87,6 @@ def validate_with_ipaddress(ip, cidr, output):
     expected["Broadcast address"] = str(net.broadcast_address)
     expected["Subnet mask"] = str(net.netmask)
     expected["CIDR"] = f"/{net.prefixlen}"
-    expected["Number of usable hosts"] = str(max(0, net.num_addresses))
-
-    hosts = list(net.hosts())
 
     # Usable hosts logic
     if cidr == 32:
@@ -68,17 +98,19 @@ def validate_with_ipaddress(ip, cidr, output):
 
     expected["Number of usable hosts"] = str(usable_hosts)
 
-    hosts = list(net.hosts())
+    # Take the first host without building the whole hosts() list,
+    # the last host of a /0-/30 is net[-2]
+    first_host = next(iter(net.hosts()), None)
 
-    if cidr == 31 and len(hosts) == 2:
-        expected["First usable IP"] = str(hosts[0])
-        expected["Last usable IP"] = str(hosts[1])
-    elif cidr == 32 or len(hosts) == 0:
+    if cidr == 31:
+        expected["First usable IP"] = str(net[0])
+        expected["Last usable IP"] = str(net[1])
+    elif cidr == 32 or first_host is None:
         expected["First usable IP"] = str(net.network_address)
         expected["Last usable IP"] = str(net.network_address)
     else:
-        expected["First usable IP"] = str(hosts[0])
-        expected["Last usable IP"] = str(hosts[-1])
+        expected["First usable IP"] = str(first_host)
+        expected["Last usable IP"] = str(net[-2])
 
     group_size = 2 ** (32 - cidr)
     expected["Subnet group size"] = str(group_size)
@@ -92,57 +124,53 @@ def validate_with_ipaddress(ip, cidr, output):
     expected["Previous network address"] = (
         "No previous network" if prev_net < 0 else str(ipaddress.IPv4Address(prev_net))
     )
+    return expected
 
+
+def validate_with_ipaddress(ip, cidr, output):
+    """
+        Cross-validates program output with Python's ipaddress module.
+        Compares each key and returns (all_ok, OK/KO report lines).
+    """
+    expected = expected_from_ipaddress(ip, cidr)
     parsed = parse_output(output)
 
-    print("\n  Cross-check with ipaddress module:")
-    print("  ----------------------------------")
+    report = ["\n  Cross-check with ipaddress module:", "  ----------------------------------"]
     all_ok = True
     for key in expected:
         actual = parsed.get(key)
         correct = expected[key]
         if actual == correct:
-            print(f"  {key:<25}:{GREEN}OK{RESET} {actual}")
+            report.append(f"  {key:<25}:{GREEN}OK{RESET} {actual}")
         else:
-            print(f"  {key:<25}:{RED}KO{RESET} Program value: {actual} | Expected: {correct}{RESET}")
+            report.append(f"  {key:<25}:{RED}KO{RESET} Program value: {actual} | Expected: {correct}{RESET}")
             all_ok = False
-    if all_ok:
-        passed_tests += 1
+    return all_ok, report
 
 
-def test_case(name, args, expected_output_snippets):
+def test_case(name, args, expected_output_snippets, use_subprocess=False):
     """
        Runs a test by executing the program and checking expected substrings.
        Uses basic string inclusion instead of structured parsing.
+       Returns (passed, report lines).
     """
-    global total_tests, passed_tests
-    total_tests += 1
-    print(f"\n{name} ... ", end="")
-    output = run_program_with_args(*args)
+    output = run_program_with_args(*args, use_subprocess=use_subprocess)
     if all(expected in output for expected in expected_output_snippets):
-        print(f"{GREEN}OK{RESET}")
-        passed_tests += 1
-    else:
-        print(f"{RED}KO{RESET}")
-        print("Args:", args)
-        print("Output:\n", output)
-        print("Expected to include:")
-        for line in expected_output_snippets:
-            print(f"  - {line}")
+        return True, [f"\n{name} ... {GREEN}OK{RESET}"]
+    report = [f"\n{name} ... {RED}KO{RESET}", f"Args: {args}", f"Output:\n {output}", "Expected to include:"]
+    report.extend(f"  - {line}" for line in expected_output_snippets)
+    return False, report
 
 
-def test_valid_case_with_reference(name, ip, cidr):
+def test_valid_case_with_reference(name, ip, cidr, use_subprocess=False):
     """
        Runs a test and compares output with ipaddress module logic.
        Internally uses `validate_with_ipaddress` for detailed checking.
-       Prints result and any mismatched fields.
+       Returns (passed, report lines).
     """
-    global total_tests, passed_tests
-    total_tests += 1
-    print(f"\n{name} ... ", end="")
-    output = run_program_with_args(f"{ip}/{cidr}")
-    validate_with_ipaddress(ip, cidr, output)
-    print("\n")
+    output = run_program_with_args(f"{ip}/{cidr}", use_subprocess=use_subprocess)
+    all_ok, report = validate_with_ipaddress(ip, cidr, output)
+    return all_ok, [f"\n{name} ... "] + report + ["\n"]
 
 
 def extract_fyi_blocks(output):
@@ -174,16 +202,12 @@ def extract_fyi_blocks(output):
     return fyi_blocks
 
 
-def test_fyi_output(name, args, expected_categories):
+def test_fyi_output(name, args, expected_categories, use_subprocess=False):
     """
-        Runs all integration and validation tests.
-        Includes valid cases, invalid formats, edge cases, and FYI validation.
-        Tracks and reports overall pass/fail counts at the end.
+        Runs the program and checks that the FYI block lists exactly
+        the expected categories. Returns (passed, report lines).
     """
-    global total_tests, passed_tests
-    total_tests += 1
-    print(f"\n{name} ... ", end="")
-    output = run_program_with_args(*args)
+    output = run_program_with_args(*args, use_subprocess=use_subprocess)
     fyi_blocks = extract_fyi_blocks(output)
 
     categories_found = [block.splitlines()[0].replace("Category: ", "").strip() for block in fyi_blocks]
@@ -192,24 +216,786 @@ def test_fyi_output(name, args, expected_categories):
     unexpected = [c for c in categories_found if c not in expected_categories]
 
     if not missing and not unexpected:
-        print(f"{GREEN}OK{RESET}")
-        passed_tests += 1
-    else:
-        print(f"{RED}KO{RESET}")
-        print("Args:", args)
-        print("FYI Categories Found:", categories_found)
-        if missing:
-            print(f"Missing expected categories: {missing}")
-        if unexpected:
-            print(f"Unexpected categories: {unexpected}")
+        return True, [f"\n{name} ... {GREEN}OK{RESET}"]
+    report = [f"\n{name} ... {RED}KO{RESET}", f"Args: {args}", f"FYI Categories Found: {categories_found}"]
+    if missing:
+        report.append(f"Missing expected categories: {missing}")
+    if unexpected:
+        report.append(f"Unexpected categories: {unexpected}")
+    return False, report
 
 
-def run_all_tests():
-    print("\n#####################################\n### Running CLI Integration Tests "
-          "###\n#####################################")
+def test_stream_output(name, lines, expected_records):
+    """
+        Feeds lines through streaming mode and checks each JSON record
+        contains the expected key/value pairs. Returns (passed, report lines).
+    """
+    output = io.StringIO()
+    ip_attributes.stream(io.StringIO("\n".join(lines) + "\n"), output)
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    ok = len(records) == len(expected_records) and all(
+        all(record.get(key) == value for key, value in expected.items())
+        for record, expected in zip(records, expected_records)
+    )
+    if ok:
+        return True, [f"\n{name} ... {GREEN}OK{RESET}"]
+    return False, [f"\n{name} ... {RED}KO{RESET}", f"Records: {records}", f"Expected: {expected_records}"]
+
+
+def test_stream_output_errors(name, count):
+    """
+        Runs --stream over count lines in a real process: closing the pipe
+        after one record must end it quietly, and a full disk (/dev/full)
+        must be reported as a write error. Returns (passed, report lines).
+    """
+    problems = []
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "addresses.txt")
+        with open(filename, "w") as file:
+            file.write("10.0.0.1/24\n" * count)
+        process = subprocess.Popen([sys.executable, PROGRAM, "--stream", filename],
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        process.stdout.readline()
+        process.stdout.close()
+        errors = process.stderr.read().decode()
+        process.stderr.close()
+        if process.wait() != 0 or errors:
+            problems.append(f"closed pipe: exit code {process.returncode}, stderr {errors!r}")
+        if os.path.exists("/dev/full"):
+            with open("/dev/full", "w") as full:
+                result = subprocess.run([sys.executable, PROGRAM, "--stream", filename], stdout=full,
+                                        stderr=subprocess.PIPE, text=True)
+            if result.stderr.strip() != "Error: Cannot write output: No space left on device.":
+                problems.append(f"/dev/full: {result.stderr!r}")
+    if problems:
+        return False, [f"\n{name} ... {RED}KO{RESET}", *problems]
+    return True, [f"\n{name} ... {GREEN}OK{RESET}"]
+
+
+def test_output_formats(name, seed, count):
+    """
+        Streams random addresses (and a bad line) as JSON Lines, CSV and binary:
+        the CSV rows and decoded binary records must carry the same values as
+        the JSON records. Returns (passed, report lines).
+    """
+    rng = random.Random(seed)
+    lines = [f"{Subnet.int_to_dotted_decimal(rng.getrandbits(32))}/{rng.randint(0, 32)}" for _ in range(count)]
+    lines += ["10.0.0.1/8", "127.0.0.1 255.0.0.0", "300.1.1.1/24"]
+    outputs = {}
+    for output_format in ("json", "csv", "binary"):
+        outputs[output_format] = io.BytesIO() if output_format == "binary" else io.StringIO()
+        ip_attributes.stream(io.StringIO("\n".join(lines) + "\n"), outputs[output_format], output_format)
+    records = [json.loads(line) for line in outputs["json"].getvalue().splitlines()]
+    rows = list(csv.DictReader(io.StringIO(outputs["csv"].getvalue())))
+    decoded = list(decode_binary(outputs["binary"].getvalue()))
+    problems = []
+    for record, row, binary in zip(records, rows, decoded):
+        if "error" in record:
+            if row["error"] != record["error"] or not binary.get("error"):
+                problems.append(f"line {record['line']}: error {row['error']!r}, {binary}")
+            continue
+        as_text = {key: "" if value is None else "; ".join(value) if key == "fyi" else str(value)
+                   for key, value in record.items()}
+        if any(row[key] != value for key, value in as_text.items()):
+            problems.append(f"CSV {row} vs {record}")
+        as_binary = {key: value if key in ("line", "cidr", "usable_hosts", "group_size", "fyi") or value is None
+                     else parse_ipv4(value) for key, value in record.items() if key != "input"}
+        # Bits keep the categories but not their order
+        if {**binary, "fyi": sorted(binary["fyi"])} != {**as_binary, "fyi": sorted(as_binary["fyi"])}:
+            problems.append(f"binary {binary} vs {as_binary}")
+    if len(records) != len(lines) or len(rows) != len(records) or len(decoded) != len(records):
+        problems.append(f"record counts {len(records)}, {len(rows)}, {len(decoded)}")
+    if problems:
+        return False, [f"\n{name} ... {RED}KO{RESET}", *problems[:5]]
+    return True, [f"\n{name} ... {GREEN}OK{RESET}"]
+
+
+def test_bulk_matches_stream(name, seed, count):
+    """
+        Runs random lines (and bad ones) through bulk_analysis on two workers with
+        small chunks and through --stream: JSON Lines, CSV and binary output must
+        be identical. Neither mode writes text, and both must refuse it, as they
+        must refuse a chunk size of 0. Returns (passed, report lines).
+    """
+    rng = random.Random(seed)
+    lines = [f"{Subnet.int_to_dotted_decimal(rng.getrandbits(32))}/{rng.randint(0, 32)}" for _ in range(count)]
+    lines += ["# comment", "", "10.0.0.1 255.0.0.0", "300.1.1.1/24", "1.2.3.4//24"]
+    text = "\n".join(lines) + "\n"
+    problems = []
+    for output_format in ("json", "csv", "binary"):
+        bulk, streamed = (io.BytesIO(), io.BytesIO()) if output_format == "binary" else (io.StringIO(), io.StringIO())
+        bulk_analysis.run_parallel(io.StringIO(text), bulk, workers=2, chunk_size=37, output_format=output_format)
+        ip_attributes.stream(io.StringIO(text), streamed, output_format)
+        if bulk.getvalue() != streamed.getvalue():
+            problems.append(f"{output_format}: bulk and stream output differ")
+    stream_text = run_program_with_args("--format=text", "--stream")
+    if stream_text != "Error: --stream writes json, csv or binary.":
+        problems.append(f"stream --format=text: {stream_text!r}")
+    for args in (["--format", "text"], ["--chunk-size", "0"], ["--workers", "-1"], ["--max-pending", "0"]):
+        try:
+            with contextlib.redirect_stderr(io.StringIO()):
+                bulk_analysis.main(["bulk_analysis.py", *args, os.devnull])
+        except SystemExit as exit:
+            if exit.code == 2:
+                continue
+        problems.append(f"bulk {args} was not rejected")
+    if problems:
+        return False, [f"\n{name} ... {RED}KO{RESET}", *problems]
+    return True, [f"\n{name} ... {GREEN}OK{RESET}"]
+
+
+def test_range_index_random(name, seed, count):
+    """
+        Compares ReservedRangeIndex.lookup with the original linear scan on
+        reserved_ip.json plus random overlapping ranges, deeply nested ranges,
+        single IPs and CIDR-only entries. Probes random addresses and every range start and end, +/- 1.
+        Returns (passed, report lines).
+    """
+    rng = random.Random(seed)
+    table = list(ip_attributes.load_special_ranges()) + sample_range_table(count, seed)
+    categories = list(ip_attributes.CATEGORY_PRIORITY)
+    # Deeply nested ranges, mostly of one category, so many of them match at once
+    center = rng.getrandbits(32)
+    for depth in range(count // 2):
+        start = max(center - rng.randint(depth, 40 * depth), 0)
+        end = min(center + rng.randint(depth, 40 * depth), 0xFFFFFFFF)
+        table.append({"category": categories[0] if rng.random() < 0.8 else rng.choice(categories),
+                      "range": f"{Subnet.int_to_dotted_decimal(start)} - {Subnet.int_to_dotted_decimal(end)}",
+                      "cidr": "N/A", "usage": ""})
+    for _ in range(count // 4):
+        address = Subnet.int_to_dotted_decimal(rng.choice([rng.getrandbits(32), 0, 0xFFFFFFFF]))
+        table.append({"category": rng.choice(categories), "range": address, "cidr": "N/A", "usage": ""})
+        table.append({"category": rng.choice(categories), "range": "any", "cidr": f"/{rng.randint(0, 32)}",
+                      "usage": ""})
+    probes = [rng.getrandbits(32) for _ in range(count)] + [0, 0xFFFFFFFF]
+    for entry in table:
+        if entry["range"] != "any":
+            for address in entry["range"].split(" - "):
+                value = parse_ipv4(address.strip())
+                probes += [value + delta for delta in (-1, 0, 1) if 0 <= value + delta <= 0xFFFFFFFF]
+    index = ReservedRangeIndex(table)
+    for value in probes:
+        ip, cidr = Subnet.int_to_dotted_decimal(value), rng.choice([None, rng.randint(0, 32)])
+        if index.lookup(ip, cidr) != linear_fyi_info(ip, table, cidr):
+            return False, [f"\n{name} ... {RED}KO{RESET}", f"{ip} /{cidr}: {index.lookup(ip, cidr)}",
+                           f"Expected: {linear_fyi_info(ip, table, cidr)}"]
+    return True, [f"\n{name} ... {GREEN}OK{RESET}"]
+
+
+def test_subnet_batch_random(name, seed, count):
+    """
+        Compares subnet_batch.calculate_subnets with Subnet on random ip/cidr
+        arrays, and checks that prefixes outside 0-32 or with a fraction are
+        rejected. Skipped without numpy. Returns (passed, report lines).
+    """
+    try:
+        from subnet_batch import calculate_subnets
+    except ImportError:
+        return True, [f"\n{name} ... skipped (numpy is not installed)"]
+    rng = random.Random(seed)
+    ips = [rng.choice([rng.getrandbits(32), 0, 0xFFFFFFFF]) for _ in range(count)]
+    cidrs = [rng.randint(0, 32) for _ in range(count)]
+    batch = {key: values.tolist() for key, values in calculate_subnets(ips, cidrs).items()}
+    for row, (ip, cidr) in enumerate(zip(ips, cidrs)):
+        subnet = Subnet(ip, cidr)
+        expected = {
+            "network_address": subnet.network_address, "broadcast_address": subnet.broadcast_address,
+            "mask": subnet.mask_int, "first_usable_ip": subnet.first_usable_ip,
+            "last_usable_ip": subnet.last_usable_ip, "usable_hosts": subnet.usable_hosts,
+            "group_size": subnet.snet_group_size(),
+            "next_network": subnet.calculate_next_network(), "previous_network": subnet.calculate_previous_network(),
+        }
+        actual = {key: batch[key][row] for key in expected}
+        for key, flag, missing in (("next_network", "has_next", "No next network"),
+                                   ("previous_network", "has_previous", "No previous network")):
+            actual[key] = Subnet.int_to_dotted_decimal(actual[key]) if batch[flag][row] else missing
+        if actual != expected:
+            return False, [f"\n{name} ... {RED}KO{RESET}", f"{Subnet.int_to_dotted_decimal(ip)}/{cidr}: {actual}",
+                           f"Expected: {expected}"]
+    for bad in ([24.7], [33], [-1], ["24"]):
+        try:
+            calculate_subnets([0x0A000001], bad)
+        except ValueError:
+            continue
+        return False, [f"\n{name} ... {RED}KO{RESET}", f"cidrs {bad} were not rejected"]
+    return True, [f"\n{name} ... {GREEN}OK{RESET}"]
+
+
+def test_daemon_output(name, argument_lists):
+    """
+        Starts the daemon on its default socket in a private $XDG_RUNTIME_DIR
+        and checks the socket is only accessible to this user and that every
+        answer equals the output of a separate ip_attributes.py run, with and
+        without $IP_ATTRIBUTES_DB. The daemon itself is started with the database,
+        so the caller's setting must win either way. Returns (passed, report lines).
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        database = os.path.join(directory, "sites.ipdb")
+        compile_database([(0x0A000000, 0x0AFFFFFF, {"category": "Site", "usage": "lab network"})], database)
+        environment = {key: value for key, value in os.environ.items()
+                       if key not in ("IP_ATTRIBUTES_SOCKET", "IP_ATTRIBUTES_DB", "IP_ATTRIBUTES_PROFILE")}
+        path = os.path.join(directory, "ip_attributes.sock")
+        daemon = subprocess.Popen([sys.executable, DAEMON], text=True, stdout=subprocess.PIPE,
+                                  env={**environment, "XDG_RUNTIME_DIR": directory, "IP_ATTRIBUTES_DB": database})
+        try:
+            ready = daemon.stdout.readline().strip()
+            if ready != f"Listening on {path}":
+                return False, [f"\n{name} ... {RED}KO{RESET}", f"daemon: {ready!r}"]
+            mode = os.stat(path).st_mode & 0o777
+            if mode != 0o600:
+                return False, [f"\n{name} ... {RED}KO{RESET}", f"socket mode {oct(mode)}"]
+            for settings in ({}, {"IP_ATTRIBUTES_DB": database}):
+                for args in argument_lists:
+                    answer = request(args, path, settings).decode("utf-8")
+                    expected = subprocess.run([sys.executable, PROGRAM, *args], text=True, capture_output=True,
+                                              env={**environment, **settings}).stdout
+                    if answer != expected:
+                        return False, [f"\n{name} ... {RED}KO{RESET}", f"{args} {settings}: {answer!r}",
+                                       f"Expected: {expected!r}"]
+                    if settings and args == ["10.0.0.1", "255.255.255.0"] and "Category: Site" not in answer:
+                        return False, [f"\n{name} ... {RED}KO{RESET}", f"no database match: {answer!r}"]
+        finally:
+            daemon.terminate()
+            daemon.wait()
+            daemon.stdout.close()
+    return True, [f"\n{name} ... {GREEN}OK{RESET}"]
+
+
+def test_level_check(name, config, expected):
+    """
+        Runs the level simulator on config and checks each trace result.
+        expected maps (source, destination ip) to True (delivered) or a
+        substring of the failure message. Returns (passed, report lines).
+    """
+    traces = {(trace["source"], trace["destination"]): trace for trace in Level(config).check()}
+    report = []
+    for key, outcome in expected.items():
+        trace = traces.get(key)
+        if trace is None:
+            report.append(f"  {key}: no trace")
+        elif outcome is True and not trace["delivered"]:
+            report.append(f"  {key}: not delivered ({trace['failure']})")
+        elif outcome is not True and (trace["delivered"] or outcome not in trace["failure"]):
+            report.append(f"  {key}: {trace['failure']} | Expected: {outcome}")
+    if not report:
+        return True, [f"\n{name} ... {GREEN}OK{RESET}"]
+    return False, [f"\n{name} ... {RED}KO{RESET}"] + report
+
+
+def test_routing_table_random(name, seed, operations):
+    """
+        Random inserts/deletes on a RoutingTable, then compares single and
+        batched lookups with the brute-force scan. Returns (passed, report lines).
+    """
+    rng = random.Random(seed)
+    table = RoutingTable()
+    routes = {}
+    base = rng.getrandbits(32)
+    for value in range(operations):
+        if routes and rng.random() < 0.25:
+            key = rng.choice(list(routes))
+            table.delete(*key)
+            del routes[key]
+        else:
+            length = rng.randint(0, 32)
+            network = (base ^ (rng.getrandbits(16) << rng.randint(0, 16))) & ip_attributes.PREFIX_TO_MASK[length]
+            table.insert(network, length, value)
+            routes[(network, length)] = value
+    reference = [(network, length, value) for (network, length), value in routes.items()]
+    addresses = [base ^ (rng.getrandbits(16) << rng.randint(0, 16)) for _ in range(2000)]
+    expected = [brute_force_lookup(reference, address) for address in addresses]
+    wrong = [address for address, value in zip(addresses, expected) if table.lookup(address) != value]
+    if not wrong and table.lookup_many(addresses) == expected and len(table) == len(routes):
+        return True, [f"\n{name} ... {GREEN}OK{RESET}"]
+    return False, [f"\n{name} ... {RED}KO{RESET}", f"Mismatched addresses: {wrong[:5]}"]
+
+
+def test_vlsm_plan(name, parent, hosts, expected_subnets, expected_free):
+    """
+        Plans hosts inside parent and compares the allocated and free
+        blocks (as 'network/prefix' strings). Returns (passed, report lines).
+    """
+    allocations, leftover = plan_vlsm(Subnet(*ip_attributes.parse_arguments([parent])), hosts)
+    subnets = [f"{Subnet.int_to_dotted_decimal(a['subnet'].network_address)}/{a['subnet'].cidr}"
+               for a in allocations]
+    free = [f"{Subnet.int_to_dotted_decimal(s.network_address)}/{s.cidr}" for s in leftover]
+    if subnets == expected_subnets and free == expected_free:
+        return True, [f"\n{name} ... {GREEN}OK{RESET}"]
+    return False, [f"\n{name} ... {RED}KO{RESET}", f"Subnets: {subnets} | Expected: {expected_subnets}",
+                   f"Free: {free} | Expected: {expected_free}"]
+
+
+def test_summarize_random(name, seed, count, k):
+    """
+        Summarizes random prefixes with tiny runs (forcing the external merge)
+        and compares with ipaddress.collapse_addresses; then checks the
+        at-most-k variant still covers everything. Returns (passed, report lines).
+    """
+    rng = random.Random(seed)
+    networks = []
+    for _ in range(count):
+        prefix = rng.randint(16, 32)
+        networks.append(ipaddress.IPv4Network(((0x0A000000 | rng.getrandbits(20)) >> (32 - prefix) << (32 - prefix),
+                                               prefix)))
+    intervals = [(int(net.network_address), int(net.broadcast_address)) for net in networks]
+    result = list(summarize(iter(intervals), run_size=37))
+    expected = [(int(net.network_address), net.prefixlen) for net in ipaddress.collapse_addresses(networks)]
+    reduced, extra = summarize_to_k(result, k)
+    reduced_networks = [ipaddress.IPv4Network(block) for block in reduced]
+    covered = all(any(net.subnet_of(block) for block in reduced_networks) for net in networks)
+    size = sum(1 << (32 - prefix) for _, prefix in reduced) - sum(1 << (32 - prefix) for _, prefix in result)
+    if result == expected and len(reduced) <= k and covered and size == extra:
+        return True, [f"\n{name} ... {GREEN}OK{RESET}"]
+    return False, [f"\n{name} ... {RED}KO{RESET}", f"Minimal list matches ipaddress: {result == expected}",
+                   f"Reduced to {len(reduced)} (k={k}), covers input: {covered}, extra: {extra} vs {size}"]
+
+
+def test_enumeration_random(name, seed, count):
+    """
+        Compares Subnet.subnets/hosts (with stride, offset and reverse)
+        with ipaddress on random subnets. Returns (passed, report lines).
+    """
+    rng = random.Random(seed)
+    for _ in range(count):
+        ip, cidr = rng.getrandbits(32), rng.randint(20, 32)
+        new_cidr = rng.randint(cidr, 32)
+        stride, offset, reverse = rng.randint(1, 4), rng.randint(0, 3), rng.random() < 0.5
+        subnet = Subnet(ip, cidr)
+        net = ipaddress.IPv4Network((ip, cidr), strict=False)
+        networks = [int(n.network_address) for n in net.subnets(new_prefix=new_cidr)]
+        hosts = [int(h) for h in net.hosts()] if cidr < 32 else []
+        if reverse:
+            networks, hosts = networks[::-1], hosts[::-1]
+        if list(subnet.subnets(new_cidr, stride, offset, reverse)) != networks[offset::stride] or \
+                list(subnet.hosts(stride, offset, reverse)) != hosts[offset::stride]:
+            return False, [f"\n{name} ... {RED}KO{RESET}",
+                           f"{net} -> /{new_cidr} stride={stride} offset={offset} reverse={reverse}"]
+    return True, [f"\n{name} ... {GREEN}OK{RESET}"]
+
+
+def test_parser_random(name, seed, count):
+    """
+        Checks parse_address against ipaddress on random addresses written
+        in every accepted form, with contiguous and non-contiguous masks.
+        Returns (passed, report lines).
+    """
+    rng = random.Random(seed)
+    for _ in range(count):
+        ip, cidr = rng.getrandbits(32), rng.randint(0, 32)
+        mask = rng.getrandbits(32) if rng.random() < 0.3 else int(ipaddress.IPv4Network((0, cidr)).netmask)
+        address, dotted_mask = str(ipaddress.IPv4Address(ip)), str(ipaddress.IPv4Address(mask))
+        wildcard = ~mask & 0xFFFFFFFF
+        contiguous = wildcard & (wildcard + 1) == 0
+        for args, expected in (([f"{address}/{cidr}"], (ip, cidr)), ([address, f"/{cidr}"], (ip, cidr)),
+                               ([address, str(cidr)], (ip, cidr)),
+                               ([address, dotted_mask], (ip, 32 - wildcard.bit_length()) if contiguous else None)):
+            try:
+                result = parse_address(args)
+            except ValueError:
+                result = None
+            if result != expected:
+                return False, [f"\n{name} ... {RED}KO{RESET}", f"{args}: {result} (expected {expected})"]
+    return True, [f"\n{name} ... {GREEN}OK{RESET}"]
+
+
+def test_overlap_random(name, seed, count):
+    """
+        Compares the sweep-line conflict detector with a check of every pair
+        on random prefixes packed into one /16. Returns (passed, report lines).
+    """
+    rng = random.Random(seed)
+    entries = []
+    for index in range(count):
+        cidr = rng.randint(18, 28)
+        network = int(ipaddress.IPv4Network((0x0A000000 | rng.getrandbits(16), cidr), strict=False).network_address)
+        entries.append((network, network + (1 << (32 - cidr)) - 1, index))
+    first_of = {}
+    for start, end, index in entries:
+        first_of.setdefault((start, end), index)
+    expected = {("duplicate", first_of[(start, end)], index) for start, end, index in entries
+                if first_of[(start, end)] != index}
+    for a, b in ((a, b) for a in first_of.items() for b in first_of.items() if a[1] != b[1]):
+        (a_start, a_end), (b_start, b_end) = a[0], b[0]
+        if a_start <= b_start and b_end <= a_end:
+            expected.add(("contains", a[1], b[1]))
+    found = {(kind, first[2], second[2]) for kind, first, second in find_conflicts(entries)}
+    if found != expected:
+        return False, [f"\n{name} ... {RED}KO{RESET}",
+                       f"missing {sorted(expected - found)[:3]}, unexpected {sorted(found - expected)[:3]}"]
+    return True, [f"\n{name} ... {GREEN}OK{RESET}"]
+
+
+def test_level_conflicts(name, config, expected):
+    """
+        Checks the clashing-interface messages for one level config.
+        Returns (passed, report lines).
+    """
+    found = level_conflicts(Level(config))
+    if sorted(found) != sorted(expected):
+        return False, [f"\n{name} ... {RED}KO{RESET}", f"Found: {found}", f"Expected: {expected}"]
+    return True, [f"\n{name} ... {GREEN}OK{RESET}"]
+
+
+def test_prefix_database_random(name, seed, count):
+    """
+        Compiles random overlapping ranges into a prefix database and checks
+        lookups against a scan for the narrowest containing range.
+        Returns (passed, report lines).
+    """
+    rng = random.Random(seed)
+    ranges = []
+    for index in range(count):
+        start = 0x0A000000 | rng.getrandbits(12)
+        ranges.append((start, min(start + rng.randint(0, 300), 0x0A000FFF), {"id": index % 50}))
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "ranges.ipdb")
+        compile_database(ranges, filename)
+        with PrefixDatabase(filename) as database:
+            for address in range(0x0A000000 - 2, 0x0A001002):
+                matches = [(end - start, start, index, record) for index, (start, end, record) in enumerate(ranges)
+                           if start <= address <= end]
+                expected = min(matches, key=lambda match: match[:3])[3] if matches else None
+                if database.lookup(address) != expected:
+                    return False, [f"\n{name} ... {RED}KO{RESET}",
+                                   f"{ipaddress.IPv4Address(address)}: {database.lookup(address)} "
+                                   f"(expected {expected})"]
+    return True, [f"\n{name} ... {GREEN}OK{RESET}"]
+
+
+def test_prefix_database_errors(name):
+    """
+        A missing, corrupt or empty $IP_ATTRIBUTES_DB file must give an error
+        naming it, in the CLI and in --stream. Returns (passed, report lines).
+    """
+    previous = os.environ.get(ip_attributes.PREFIX_DATABASES_VARIABLE)
+    problems = []
+    with tempfile.TemporaryDirectory() as directory:
+        corrupt, empty = os.path.join(directory, "corrupt.ipdb"), os.path.join(directory, "empty.ipdb")
+        with open(corrupt, "wb") as file:
+            file.write(b"not a prefix database")
+        open(empty, "wb").close()
+        addresses = os.path.join(directory, "addresses.txt")
+        with open(addresses, "w") as file:
+            file.write("10.0.0.1/8\n")
+        try:
+            for path in (os.path.join(directory, "missing.ipdb"), corrupt, empty):
+                os.environ[ip_attributes.PREFIX_DATABASES_VARIABLE] = path
+                for args in (["10.0.0.1/8"], ["--stream", addresses]):
+                    output = run_program_with_args(*args)
+                    if not output.startswith(f"Error: cannot open prefix database {path}: "):
+                        problems.append(f"{path} {args}: {output!r}")
+        finally:
+            if previous is None:
+                os.environ.pop(ip_attributes.PREFIX_DATABASES_VARIABLE, None)
+            else:
+                os.environ[ip_attributes.PREFIX_DATABASES_VARIABLE] = previous
+    if problems:
+        return False, [f"\n{name} ... {RED}KO{RESET}", *problems]
+    return True, [f"\n{name} ... {GREEN}OK{RESET}"]
+
+
+def test_script_errors(name, script, cases):
+    """
+        Runs a script of this directory with bad arguments or inputs in a
+        subprocess: each run must print the expected error, not a traceback.
+        cases: (args, expected snippet). Returns (passed, report lines).
+    """
+    problems = []
+    for args, expected in cases:
+        result = subprocess.run([sys.executable, os.path.join(os.path.dirname(PROGRAM), script), *args],
+                                text=True, capture_output=True, stdin=subprocess.DEVNULL)
+        output = result.stdout + result.stderr
+        if expected not in output or "Traceback" in output:
+            problems.append(f"{script} {args}: {output!r}")
+    if problems:
+        return False, [f"\n{name} ... {RED}KO{RESET}", *problems]
+    return True, [f"\n{name} ... {GREEN}OK{RESET}"]
+
+
+def test_profile_output(name, args, expected_stages):
+    """
+        Runs the CLI with --profile=json in a subprocess: stdout must match an
+        unprofiled run and stderr must list the expected stages.
+        Returns (passed, report lines).
+    """
+    result = subprocess.run([sys.executable, PROGRAM, "--profile=json", *args], text=True, capture_output=True)
+    try:
+        stages = json.loads(result.stderr)
+    except ValueError:
+        stages = {}
+    missing = [stage for stage in expected_stages if stage not in stages]
+    if result.stdout.strip() != run_program_with_args(*args) or missing:
+        return False, [f"\n{name} ... {RED}KO{RESET}", f"missing stages: {missing}", result.stderr]
+    return True, [f"\n{name} ... {GREEN}OK{RESET}"]
+
+
+def test_profile_switch(name, cases):
+    """
+        Runs the CLI in a subprocess with profiling options and settings of
+        $IP_ATTRIBUTES_PROFILE: stdout must not change and stderr must hold a
+        profile exactly when one is expected.
+        cases: (args, variable value or None, profiled). Returns (passed, report lines).
+    """
+    problems = []
+    for args, value, profiled in cases:
+        environment = {key: item for key, item in os.environ.items() if key != ip_attributes.PROFILE_VARIABLE}
+        if value is not None:
+            environment[ip_attributes.PROFILE_VARIABLE] = value
+        result = subprocess.run([sys.executable, PROGRAM, *args], text=True, capture_output=True, env=environment)
+        plain = [arg for arg in args if not arg.startswith("--profile") and arg not in ("table", "json")]
+        if result.stdout.strip() != run_program_with_args(*plain) or ("total" in result.stderr) != profiled:
+            problems.append(f"{args} {ip_attributes.PROFILE_VARIABLE}={value!r}: {result.stderr!r}")
+    if problems:
+        return False, [f"\n{name} ... {RED}KO{RESET}", *problems]
+    return True, [f"\n{name} ... {GREEN}OK{RESET}"]
+
+
+def test_level_validation(name, config, expected_masks, expected_problems):
+    """
+        Validates a level file twice through the content-hash cache: the second
+        run must come from the cache with the same result, also after another
+        file was validated alone with the same cache. With room for one
+        entry, validating the other file drops the first from the cache.
+        Returns (passed, report lines).
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "level.json")
+        with open(filename, "w") as file:
+            json.dump(config, file)
+        other = os.path.join(directory, "other.json")
+        with open(other, "w") as file:
+            json.dump({"ifs": {}, "routes": {}, "other": True}, file)
+        cache = os.path.join(directory, "cache.json")
+        (_, first, first_cached), = validate_files([filename], cache_path=cache)
+        validate_files([other], cache_path=cache)
+        (_, second, second_cached), = validate_files([filename], cache_path=cache)
+        limit, level_validator.CACHE_LIMIT = level_validator.CACHE_LIMIT, 1
+        try:
+            validate_files([other], cache_path=cache)
+            (_, _, capped_cached), = validate_files([filename], cache_path=cache)
+        finally:
+            level_validator.CACHE_LIMIT = limit
+    if first_cached or not second_cached or capped_cached or first != second or first["masks"] != expected_masks or \
+            sorted(first["problems"]) != sorted(expected_problems):
+        return False, [f"\n{name} ... {RED}KO{RESET}",
+                       f"got {first} (cached: {first_cached}, {second_cached}, {capped_cached})"]
+    return True, [f"\n{name} ... {GREEN}OK{RESET}"]
+
+
+def test_address_set_random(name, seed, count):
+    """
+        Checks AddressSet union, intersection, difference, containment, size and
+        CIDR output against Python sets of addresses in a small /20.
+        Returns (passed, report lines).
+    """
+    rng = random.Random(seed)
+
+    def random_set():
+        intervals = []
+        for _ in range(rng.randint(0, 8)):
+            start = 0x0A000000 | rng.getrandbits(12)
+            intervals.append((start, min(start + rng.randint(0, 400), 0x0A000FFF)))
+        return AddressSet(intervals), {address for start, end in intervals for address in range(start, end + 1)}
+
+    def addresses(address_set):
+        return {address for start, end in address_set for address in range(start, end + 1)}
+
+    for _ in range(count):
+        (a, a_plain), (b, b_plain) = random_set(), random_set()
+        cidrs = [ipaddress.IPv4Network(cidr) for cidr in a.to_cidrs()]
+        expected_cidrs = list(ipaddress.collapse_addresses(ipaddress.IPv4Address(x) for x in sorted(a_plain)))
+        probe = rng.randint(0x0A000000 - 2, 0x0A001001)
+        checks = [
+            addresses(a | b) == a_plain | b_plain,
+            addresses(a & b) == a_plain & b_plain,
+            addresses(a - b) == a_plain - b_plain,
+            a.size() == len(a_plain),
+            (b in a) == (b_plain <= a_plain),
+            ((a & b) in a) and ((a - b) in a),
+            (probe in a) == (probe in a_plain),
+            cidrs == expected_cidrs,
+        ]
+        if not all(checks):
+            return False, [f"\n{name} ... {RED}KO{RESET}", f"{a} / {b}: checks {checks}"]
+    return True, [f"\n{name} ... {GREEN}OK{RESET}"]
+
+
+def test_address_pool_random(name, seed, operations):
+    """
+        Random allocate/allocate-specific/free/largest-free operations on a /22
+        pool, compared with a scan over a plain list of allocations; the pool
+        also goes through to_bytes/from_bytes. Returns (passed, report lines).
+    """
+    rng = random.Random(seed)
+    parent = Subnet("10.0.0.0", 22)
+    pool = AddressPool(parent, 30)
+    allocated = []
+
+    def first_free(prefix):
+        size = 1 << (32 - prefix)
+        for network in range(parent.network_address, parent.broadcast_address + 1, size):
+            if all(network + size - 1 < start or network > start + (1 << (32 - length)) - 1
+                   for start, length in allocated):
+                return network
+        return None
+
+    for step in range(operations):
+        action = rng.random()
+        prefix = rng.randint(22, 30)
+        if action < 0.4:
+            expected = first_free(prefix)
+            result = pool.allocate(prefix)
+            got = None if result is None else result.network_address
+            if expected is not None:
+                allocated.append((expected, prefix))
+        elif action < 0.6:
+            network = parent.network_address + (rng.getrandbits(10) >> (32 - prefix) << (32 - prefix))
+            free = all(network + (1 << (32 - prefix)) - 1 < start or network > start + (1 << (32 - length)) - 1
+                       for start, length in allocated)
+            expected = network if free else None
+            result = pool.allocate_specific(network, prefix)
+            got = None if result is None else result.network_address
+            if free:
+                allocated.append((network, prefix))
+        elif action < 0.9 and allocated:
+            block = allocated.pop(rng.randrange(len(allocated)))
+            expected, got = True, pool.free(*block)
+        else:
+            largest = next(((first_free(length), length) for length in range(22, 31)
+                            if first_free(length) is not None), None)
+            result = pool.largest_free()
+            expected, got = largest, None if result is None else (result.network_address, result.cidr)
+        if step % 50 == 0:
+            pool = AddressPool.from_bytes(pool.to_bytes())
+        if got != expected:
+            return False, [f"\n{name} ... {RED}KO{RESET}", f"step {step}: got {got}, expected {expected}"]
+    listed = [(subnet.network_address, subnet.cidr) for subnet in pool.allocations()]
+    if listed != sorted(allocated):
+        return False, [f"\n{name} ... {RED}KO{RESET}", f"allocations {listed[:5]} vs {sorted(allocated)[:5]}"]
+    return True, [f"\n{name} ... {GREEN}OK{RESET}"]
+
+
+def test_subnet_cache_random(name, seed, count, maxsize):
+    """
+        Addresses drawn from a few hundred networks (including reserved ones)
+        analyzed with and without a small SubnetCache: the records must be
+        identical and the counters must add up. Returns (passed, report lines).
+    """
+    rng = random.Random(seed)
+    index = ip_attributes.load_special_range_index()
+    networks = [(rng.getrandbits(32), rng.randint(0, 32)) for _ in range(200)]
+    networks += [parse_address([text]) for text in ("10.0.0.0/8", "8.8.8.0/24", "127.0.0.0/8", "192.168.0.0/16",
+                                                    "224.0.0.0/4", "100.64.0.0/10", "0.0.0.0/0")]
+    lines = []
+    for number in range(count):
+        network, cidr = rng.choice(networks)
+        host = 0 if rng.random() < 0.1 else rng.getrandbits(32) & ((1 << (32 - cidr)) - 1)
+        lines.append((number, f"{Subnet.int_to_dotted_decimal(network & ~((1 << (32 - cidr)) - 1) | host)}/{cidr}"))
+    cache = ip_attributes.SubnetCache(index, maxsize)
+    expected = list(ip_attributes.analyze_lines(lines, index))
+    got = list(ip_attributes.analyze_lines(lines, cache))
+    for want, have in zip(expected, got):
+        if want != have:
+            return False, [f"\n{name} ... {RED}KO{RESET}", f"cached {have} vs {want}"]
+    stats = cache.stats()
+    if stats["hits"] + stats["misses"] != count or stats["misses"] - stats["evictions"] != stats["size"] \
+            or stats["size"] > maxsize or not stats["evictions"]:
+        return False, [f"\n{name} ... {RED}KO{RESET}", f"counters {stats}"]
+    return True, [f"\n{name} ... {GREEN}OK{RESET}"]
+
+
+def test_acl_random(name, seed, rule_count, pair_count):
+    """
+        Random ACLs written as text (any, host, ip/cidr, contiguous and
+        non-contiguous wildcards) compiled and matched single and in bulk,
+        compared with the first-match scan. Returns (passed, report lines).
+    """
+    rng = random.Random(seed)
+    base = rng.getrandbits(32) & 0xFFFF0000
+    dotted = Subnet.int_to_dotted_decimal
+
+    def spec():
+        kind = rng.random()
+        address = base | rng.getrandbits(16)
+        if kind < 0.1:
+            return "any"
+        if kind < 0.3:
+            return f"host {dotted(address)}"
+        if kind < 0.6:
+            return f"{dotted(address)}/{rng.randint(16, 32)}"
+        wildcard = rng.choice([0x0000FF00, 0x000000FE, 0x0000F0F0, rng.getrandbits(16), (1 << rng.randint(0, 16)) - 1])
+        return f"{dotted(address)} {dotted(wildcard)}"
+
+    lines = [f"{rng.choice(['permit', 'deny'])} {spec()} {spec()}" for _ in range(rule_count)]
+    access_list = AccessList.from_lines(lines)
+    pairs = [(base | rng.getrandbits(16), base | rng.getrandbits(16)) for _ in range(pair_count)]
+    expected = [first_match(access_list.rules, source, destination) for source, destination in pairs]
+    wrong = [pair for pair, index in zip(pairs, expected) if access_list.match(*pair) != index]
+    if wrong or access_list.match_many(pairs) != expected:
+        return False, [f"\n{name} ... {RED}KO{RESET}", f"Mismatched pairs: {wrong[:5]}"]
+    return True, [f"\n{name} ... {GREEN}OK{RESET}"]
+
+
+def test_level_watch_random(name, seed, config, edits):
+    """
+        Random edits to ips, masks, routes and gateways of a level, applied
+        one at a time to an IncrementalLevel: after every edit its traces and
+        problems must equal a full Level rebuild. Returns (passed, report lines).
+    """
+    rng = random.Random(seed)
+    level = IncrementalLevel(config)
+    config = json.loads(json.dumps(config))
+    ips = [fields["ip"] for fields in config["ifs"].values()]
+    reused = 0
+    for step in range(edits):
+        action = rng.random()
+        if action < 0.6:
+            fields = config["ifs"][rng.choice(list(config["ifs"]))]
+            if action < 0.25:
+                fields["ip"] = rng.choice(ips)[:-1] + str(rng.randint(0, 9))
+            elif action < 0.45:
+                fields["mask"] = rng.choice(["/30", "/29", "/24", "255.255.255.252", "/31"])
+            elif "ip" in fields:
+                del fields["ip"]
+            else:
+                fields["ip"] = rng.choice(ips)
+        else:
+            fields = config["routes"][rng.choice(list(config["routes"]))]
+            if action < 0.8:
+                fields["gate"] = rng.choice(ips)
+            else:
+                fields["route"] = rng.choice(["default", "0.0.0.0/0", "102.198.14.0/24", "102.198.14.248/30",
+                                              "102.198.14.0/30"])
+        summary = level.update(config)
+        reused += summary["reused"]
+        full = Level(config)
+        if level.check() != full.check() or level.problems() != full.problems():
+            return False, [f"\n{name} ... {RED}KO{RESET}", f"step {step}: {config}"]
+    if not reused:
+        return False, [f"\n{name} ... {RED}KO{RESET}", "no trace was ever reused"]
+    return True, [f"\n{name} ... {GREEN}OK{RESET}"]
+
+
+LEVEL7_SOLVED = {
+    "routes": {"Ar1": {"route": "0.0.0.0/0", "gate": "102.198.14.1"},
+               "Cr1": {"route": "0.0.0.0/0", "gate": "102.198.14.249"},
+               "R1r1": {"route": "0.0.0.0/0", "gate": "102.198.14.253"},
+               "R2r1": {"route": "0.0.0.0/0", "gate": "102.198.14.254"}},
+    "ifs": {"A1": {"ip": "102.198.14.2", "mask": "/30"}, "C1": {"ip": "102.198.14.250", "mask": "/30"},
+            "R11": {"ip": "102.198.14.1", "mask": "/30"}, "R12": {"ip": "102.198.14.254", "mask": "/30"},
+            "R21": {"ip": "102.198.14.253", "mask": "/30"}, "R22": {"ip": "102.198.14.249", "mask": "/30"}},
+}
+
+
+def all_cases():
+    """
+        Returns every integration test as (test function, arguments).
+        Includes valid cases, invalid formats, edge cases, and FYI validation.
+    """
+    cases = []
 
     # --- Valid input tests ---
-    test_case("CIDR input: 10.10.0.0/19", ["10.10.0.0/19"], [
+    cases.append((test_case, ("CIDR input: 10.10.0.0/19", ["10.10.0.0/19"], [
         "Network address: 10.10.0.0",
         "Broadcast address: 10.10.31.255",
         "Subnet mask: 255.255.224.0",
@@ -220,9 +1006,9 @@ def run_all_tests():
         "Subnet group size: 8192",
         "Next network address: 10.10.32.0",
         "Previous network address: 10.9.224.0"
-    ])
+    ])))
 
-    test_case("Subnet mask input: 10.10.0.0 255.255.255.0", ["10.10.0.0", "255.255.255.0"], [
+    cases.append((test_case, ("Subnet mask input: 10.10.0.0 255.255.255.0", ["10.10.0.0", "255.255.255.0"], [
         "Network address: 10.10.0.0",
         "Broadcast address: 10.10.0.255",
         "Subnet mask: 255.255.255.0",
@@ -233,9 +1019,9 @@ def run_all_tests():
         "Subnet group size: 256",
         "Next network address: 10.10.1.0",
         "Previous network address: 10.9.255.0"
-    ])
+    ])))
 
-    test_case("CIDR input: 192.168.1.0/30", ["192.168.1.0/30"], [
+    cases.append((test_case, ("CIDR input: 192.168.1.0/30", ["192.168.1.0/30"], [
         "Network address: 192.168.1.0",
         "Broadcast address: 192.168.1.3",
         "Subnet mask: 255.255.255.252",
@@ -246,118 +1032,330 @@ def run_all_tests():
         "Subnet group size: 4",
         "Next network address: 192.168.1.4",
         "Previous network address: 192.168.0.252"
-    ])
+    ])))
 
     # --- Invalid IPs (preserve specific messages for IPs) ---
-    test_case("Invalid IP: octet > 255", ["192.168.300.1", "/24"], ["Error: Invalid IP format."])
-    test_case("Invalid IP: negative octet", ["192.168.-1.1", "/24"], ["Error: Invalid IP format."])
-    test_case("Invalid IP: leading zeros", ["192.168.01.1", "/24"], ["Error: Invalid IP format."])
-    test_case("Invalid IP: too many octets", ["192.168.1.1.5", "/24"], ["Error: Invalid IP format."])
-    test_case("Invalid IP: too few octets", ["192.168.1", "/24"], ["Error: Invalid IP format."])
-    test_case("Invalid IP: only dots", ["...", "/24"], ["Error: Invalid IP format."])
-    test_case("Invalid IP: contains letters", ["192.168.1.a", "/24"], ["Error: Invalid IP format."])
-    test_case("Invalid IP: space between octets", ["192.168.1. 1", "/24"], ["Error: Invalid IP format."])
-    test_case("Invalid IP: 256", ["192.168.1.256", "/24"], ["Error: Invalid IP format."])
-    test_case("Invalid IP: all octets bad", ["256.256.256.256", "/24"], ["Error: Invalid IP format."])
-    test_case("Invalid IP: wrong delimiter", ["192,168,1,1", "/24"], ["Error: Invalid IP format."])
-    test_case("Invalid IP: mixed errors", ["192.168.300.-1", "/24"], ["Error: Invalid IP format."])
-    test_case("Invalid IP: trailing dot", ["192.168.1.1.", "/24"], ["Error: Invalid IP format."])
+    for name, ip in [
+        ("Invalid IP: octet > 255", "192.168.300.1"),
+        ("Invalid IP: negative octet", "192.168.-1.1"),
+        ("Invalid IP: leading zeros", "192.168.01.1"),
+        ("Invalid IP: too many octets", "192.168.1.1.5"),
+        ("Invalid IP: too few octets", "192.168.1"),
+        ("Invalid IP: only dots", "..."),
+        ("Invalid IP: contains letters", "192.168.1.a"),
+        ("Invalid IP: space between octets", "192.168.1. 1"),
+        ("Invalid IP: 256", "192.168.1.256"),
+        ("Invalid IP: all octets bad", "256.256.256.256"),
+        ("Invalid IP: wrong delimiter", "192,168,1,1"),
+        ("Invalid IP: mixed errors", "192.168.300.-1"),
+        ("Invalid IP: trailing dot", "192.168.1.1."),
+    ]:
+        cases.append((test_case, (name, [ip, "/24"], ["Error: Invalid IP format."])))
 
     # --- Subnet mask errors (generalized format error) ---
-    test_case("Mask too many octets", ["192.168.1.1", "255.255.255.255.0"],
-              ["Error: Invalid CIDR/mask format. Expected: /<0–31> or valid subnet mask"])
-    test_case("Mask too few octets", ["192.168.1.1", "255.255.255"],
-              ["Error: Invalid CIDR/mask format. Expected: /<0–31> or valid subnet mask"])
-    test_case("Mask negative", ["192.168.1.1", "-255.255.255.0"],
-              ["Error: Invalid CIDR/mask format. Expected: /<0–31> or valid subnet mask"])
-    test_case("Mask non-numeric", ["192.168.1.1", "255.abc.255.0"],
-              ["Error: Invalid CIDR/mask format. Expected: /<0–31> or valid subnet mask"])
-    test_case("Mask leading zeros", ["192.168.1.1", "255.255.0255.0"],
-              ["Error: Invalid CIDR/mask format. Expected: /<0–31> or valid subnet mask"])
-    test_case("Mask out of range", ["192.168.1.1", "255.500.255.0"],
-              ["Error: Invalid CIDR/mask format. Expected: /<0–31> or valid subnet mask"])
-    test_case("Mask invalid block", ["192.168.1.1", "255.255.64.0"],
-              ["Error: Invalid CIDR/mask format. Expected: /<0–31> or valid subnet mask"])
-    test_case("Mask only dots", ["192.168.1.1", "..."],
-              ["Error: Invalid CIDR/mask format. Expected: /<0–31> or valid subnet mask"])
-    test_case("Mask commas instead of dots", ["192.168.1.1", "255,255,255,0"],
-              ["Error: Invalid CIDR/mask format. Expected: /<0–31> or valid subnet mask"])
-    test_case("Mask with spaces", ["192.168.1.1", "255. 255.255.0"],
-              ["Error: Invalid CIDR/mask format. Expected: /<0–31> or valid subnet mask"])
-    test_case("Mask empty", ["192.168.1.1", ""],
-              ["Error: Invalid CIDR/mask format. Expected: /<0–31> or valid subnet mask"])
-    test_case("Mask with trailing dot", ["192.168.1.1", "255.255.255.0."],
-              ["Error: Invalid CIDR/mask format. Expected: /<0–31> or valid subnet mask"])
+    mask_error = ["Error: Invalid CIDR/mask format. Expected: /<0–31> or valid subnet mask"]
+    for name, mask in [
+        ("Mask too many octets", "255.255.255.255.0"),
+        ("Mask too few octets", "255.255.255"),
+        ("Mask negative", "-255.255.255.0"),
+        ("Mask non-numeric", "255.abc.255.0"),
+        ("Mask leading zeros", "255.255.0255.0"),
+        ("Mask out of range", "255.500.255.0"),
+        ("Mask invalid block", "255.255.64.0"),
+        ("Mask only dots", "..."),
+        ("Mask commas instead of dots", "255,255,255,0"),
+        ("Mask with spaces", "255. 255.255.0"),
+        ("Mask empty", ""),
+        ("Mask with trailing dot", "255.255.255.0."),
+    ]:
+        cases.append((test_case, (name, ["192.168.1.1", mask], mask_error)))
 
     # --- CIDR validation (generalized format error) ---
-    test_case("CIDR with spaces", ["192.168.1.1", " / 24 "],
-              ["Error: Invalid CIDR/mask format. Expected: /<0–31> or valid subnet mask"])
-    test_case("CIDR without slash", ["192.168.1.1", "24"], ["CIDR: /24"])  # allowed
-    test_case("CIDR negative", ["192.168.1.1", "/-24"],
-              ["Error: Invalid CIDR/mask format. Expected: /<0–31> or valid subnet mask"])
-    test_case("CIDR non-numeric", ["192.168.1.1", "/abc"],
-              ["Error: Invalid CIDR/mask format. Expected: /<0–31> or valid subnet mask"])
-    test_case("CIDR leading zero", ["192.168.1.1", "/024"],
-              ["Error: Invalid CIDR/mask format. Expected: /<0–31> or valid subnet mask"])
-    test_case("CIDR too low", ["192.168.1.1", "/-1"],
-              ["Error: Invalid CIDR/mask format. Expected: /<0–31> or valid subnet mask"])
-    test_case("CIDR empty", ["192.168.1.1", ""],
-              ["Error: Invalid CIDR/mask format. Expected: /<0–31> or valid subnet mask"])
-    test_case("CIDR with extra characters", ["192.168.1.1", "/24abc"],
-              ["Error: Invalid CIDR/mask format. Expected: /<0–31> or valid subnet mask"])
-    test_case("CIDR wrong delimiter", ["192.168.1.1", ",24"],
-              ["Error: Invalid CIDR/mask format. Expected: /<0–31> or valid subnet mask"])
+    cases.append((test_case, ("CIDR with spaces", ["192.168.1.1", " / 24 "], mask_error)))
+    cases.append((test_case, ("CIDR without slash", ["192.168.1.1", "24"], ["CIDR: /24"])))  # allowed
+    for name, cidr in [
+        ("CIDR negative", "/-24"),
+        ("CIDR non-numeric", "/abc"),
+        ("CIDR leading zero", "/024"),
+        ("CIDR too low", "/-1"),
+        ("CIDR empty", ""),
+        ("CIDR with extra characters", "/24abc"),
+        ("CIDR wrong delimiter", ",24"),
+    ]:
+        cases.append((test_case, (name, ["192.168.1.1", cidr], mask_error)))
+
+    # --- Single-argument format errors ---
+    format_error = ["Error: Invalid input format. Expected IP/CIDR like '192.168.0.1/24'."]
+    for name, text in [
+        ("Format: double slash", "1.2.3.4//24"),
+        ("Format: double slash /0", "1.2.3.4//0"),
+        ("Format: double slash /01", "1.2.3.4//01"),
+        ("Format: slashes only", "//0"),
+    ]:
+        cases.append((test_case, (name, [text], format_error)))
+
+    # --- Stream mode input errors ---
+    cases.append((test_case, ("Stream: missing file", ["--stream", "no_such_file.txt"],
+                              ["Error: Cannot read 'no_such_file.txt': No such file or directory."])))
+    cases.append((test_case, ("Stream: directory", ["--stream", os.path.dirname(PROGRAM)],
+                              ["Error: Cannot read", "Is a directory."])))
+    cases.append((test_case, ("Stream: option after --stream", ["--stream", "--format=csv"],
+                              ["Error: Unknown option '--format=csv'. Options go before --stream."])))
+    cases.append((test_case, ("Format: --format json as two arguments", ["--format", "json", "10.0.0.1/8"],
+                              ['"network_address": "10.0.0.0"', '"fyi": ["Private IP address"]'])))
 
     # --- Next/previous network edge ---
-    test_case("Next net: 255.255.255.0/24", ["255.255.255.0/24"], ["Next network address: No next network"])
-    test_case("Prev net: 0.0.0.0/24", ["0.0.0.0/24"], ["Previous network address: No previous network"])
+    cases.append((test_case, ("Next net: 255.255.255.0/24", ["255.255.255.0/24"],
+                              ["Next network address: No next network"])))
+    cases.append((test_case, ("Prev net: 0.0.0.0/24", ["0.0.0.0/24"],
+                              ["Previous network address: No previous network"])))
 
     # --- Assert equal with python ipaddress module ---
-    test_valid_case_with_reference("Cross-validate: 192.168.1.0/30", "192.168.1.0", 30)
+    for ip, cidr in [
+        ("192.168.1.0", 30),
+        ("10.0.0.0", 8),
+        ("172.16.0.0", 12),
+        ("192.168.0.0", 16),
+        ("192.168.123.128", 25),
+        ("192.168.123.0", 26),
+        ("192.168.123.192", 26),
+        ("203.0.113.0", 30),
+        ("198.51.100.4", 31),
+        ("198.51.100.0", 32),
+    ]:
+        cases.append((test_valid_case_with_reference, (f"Cross-validate: {ip}/{cidr}", ip, cidr)))
 
-    # This test runs, but takes a lot of time
-    # test_valid_case_with_reference("Cross-validate: 10.0.0.0/8", "10.0.0.0", 8)
+    # --- FYI section testing---
+    cases.append((test_fyi_output, ("FYI: Private + Special CIDR /31", ["192.168.1.0/31"],
+                                    ["Private IP address", "Special CIDR"])))
+    cases.append((test_fyi_output, ("FYI: Special CIDR /32 only", ["203.0.113.5/32"], ["Special CIDR"])))
+    cases.append((test_fyi_output, ("FYI: Private range only", ["10.10.10.10/24"], ["Private IP address"])))
+    cases.append((test_fyi_output, ("FYI: Loopback", ["127.0.0.1/8"], ["Loopback IP address"])))
+    return cases
 
-    test_valid_case_with_reference("Cross-validate: 172.16.0.0/12", "172.16.0.0", 12)
-    test_valid_case_with_reference("Cross-validate: 192.168.0.0/16", "192.168.0.0", 16)
-    test_valid_case_with_reference("Cross-validate: 192.168.123.128/25", "192.168.123.128", 25)
-    test_valid_case_with_reference("Cross-validate: 192.168.123.0/26", "192.168.123.0", 26)
-    test_valid_case_with_reference("Cross-validate: 192.168.123.192/26", "192.168.123.192", 26)
-    test_valid_case_with_reference("Cross-validate: 203.0.113.0/30", "203.0.113.0", 30)
-    test_valid_case_with_reference("Cross-validate: 198.51.100.4/31", "198.51.100.4", 31)
-    test_valid_case_with_reference("Cross-validate: 198.51.100.0/32", "198.51.100.0", 32)
 
-    # --- FYI section testing---
-    test_fyi_output(
-        "FYI: Private + Special CIDR /31",
-        ["192.168.1.0/31"],
-        ["Private IP address", "Special CIDR"]
-    )
+def in_process_cases():
+    """
+        Cases that only make sense in-process (no CLI equivalent).
+    """
+    return [
+        (test_stream_output, ("Stream: valid, mask and bad lines",
+                              ["10.10.0.0/19", "# comment", "192.168.1.5 255.255.255.0", "300.1.1.1/24"],
+                              [{"line": 1, "network_address": "10.10.0.0", "cidr": 19},
+                               {"line": 3, "network_address": "192.168.1.0", "fyi": ["Private IP address"]},
+                               {"line": 4, "error": "Error: Invalid IP format."}])),
+        (test_stream_output_errors, ("Stream: closed pipe and full disk", 200000)),
+        (test_bulk_matches_stream, ("Bulk: same output as --stream in every format", 1, 500)),
+        (test_range_index_random, ("Range index: same FYI matches as the linear scan", 1, 200)),
+        (test_subnet_batch_random, ("Subnet batch: vectorized fields vs Subnet", 1, 3000)),
+        (test_daemon_output, ("Daemon: same output as the CLI on a private socket, with and without a database",
+                              [["192.168.1.45/24"], ["10.0.0.1", "255.255.255.0"], ["127.0.0.1", "/8"],
+                               ["1.2.3.4//24"], ["300.1.1.1/24"], ["8.8.8.8/32"], []])),
+        (test_level_check, ("Level: solved level 7 routes both ways", LEVEL7_SOLVED,
+                            {("A", "102.198.14.250"): True, ("C", "102.198.14.2"): True})),
+        (test_level_check, ("Level: missing router interface ip", {**LEVEL7_SOLVED, "ifs": {
+            **LEVEL7_SOLVED["ifs"], "R11": {"mask": "/30"}}},
+                            {("A", "102.198.14.250"): "no interface with ip 102.198.14.1",
+                             ("C", "102.198.14.2"): "routing loop"})),
+        (test_routing_table_random, ("Routing table: random insert/delete vs brute force", 1, 3000)),
+        (test_vlsm_plan, ("VLSM: 60, 12, 2, 2 hosts in 148.7.129.0/24", "148.7.129.0/24", [2, 60, 2, 12],
+                          ["148.7.129.80/31", "148.7.129.0/26", "148.7.129.82/31", "148.7.129.64/28"],
+                          ["148.7.129.84/30", "148.7.129.88/29", "148.7.129.96/27", "148.7.129.128/25"])),
+        (test_summarize_random, ("Summarize: external merge vs ipaddress, at most 20 prefixes", 1, 2000, 20)),
+        (test_enumeration_random, ("Enumeration: subnets/hosts vs ipaddress", 1, 500)),
+        (test_parser_random, ("Parser: address, cidr and mask forms vs ipaddress", 1, 5000)),
+        (test_overlap_random, ("Overlaps: sweep line vs every pair", 1, 600)),
+        (test_level_conflicts, ("Overlaps: level interfaces on explicit links",
+                                {"routes": {}, "links": [["A1"], ["B1"], ["R11", "R12"], ["C1", "D1"]],
+                                 "ifs": {"A1": {"ip": "10.0.0.1", "mask": "/24"},
+                                         "B1": {"ip": "10.0.0.2", "mask": "/24"},
+                                         "R11": {"ip": "10.0.1.1", "mask": "/24"},
+                                         "R12": {"ip": "10.0.1.2", "mask": "/24"},
+                                         "C1": {"ip": "10.0.2.1", "mask": "/24"},
+                                         "D1": {"ip": "10.0.2.2", "mask": "/25"}}},
+                                ["A1 (10.0.0.0/24) and B1 (10.0.0.0/24): same network on different segments",
+                                 "R11 (10.0.1.0/24) and R12 (10.0.1.0/24): same network on device R1",
+                                 "C1 (10.0.2.0/24) contains D1 (10.0.2.0/25): masks disagree"])),
+        (test_prefix_database_random, ("Prefix database: overlapping ranges vs scan", 1, 200)),
+        (test_prefix_database_errors, ("Prefix database: missing or corrupt $IP_ATTRIBUTES_DB file",)),
+        (test_script_errors, ("Summarize: unreadable input, run size below 1", "summarize.py",
+                              [(["missing.txt"], "Error: Cannot read 'missing.txt': No such file or directory."),
+                               (["/"], "Error: Cannot read '/': Is a directory."),
+                               (["--run-size", "0"], "--run-size: must be at least 1, got 0")])),
+        (test_script_errors, ("Overlaps: unreadable input, missing or invalid level files", "overlap_detector.py",
+                              [(["missing.txt"], "Error: Cannot read 'missing.txt': No such file or directory."),
+                               (["--levels", "missing.json"],
+                                "Error: Cannot read 'missing.json': No such file or directory."),
+                               (["--levels", PROGRAM], f"Error: {PROGRAM}: invalid JSON (")])),
+        (test_script_errors, ("Format: option without a format", "ip_attributes.py",
+                              [(["--format", "10.0.0.1/8"], "Error: --format needs one of text, json, csv, binary."),
+                               (["--format=xml", "10.0.0.1/8"], "Error: Unknown option '--format=xml'.")])),
+        (test_script_errors, ("Benchmarks: repeat below 1, unknown case names", "benchmarks.py",
+                              [(["--repeat", "0"], "--repeat: must be at least 1, got 0"),
+                               (["--only", "cidr_parse,no_such_case"], "unknown case(s) for --only: no_such_case")])),
+        (test_script_errors, ("Bulk: negative subnet cache size", "bulk_analysis.py",
+                              [(["--subnet-cache", "-1", PROGRAM], "--subnet-cache: must be 0 or more, got -1")])),
+        (test_profile_output, ("Profile: same output, stages on stderr", ["192.168.1.1", "255.255.255.0"],
+                               ["parse_address", "Subnet.__init__", "load_special_range_index",
+                                "get_fyi_info", "Subnet.print_info", "total"])),
+        (test_profile_switch, ("Profile: off for 0, false and empty, same option values as bulk_analysis",
+                               [(["10.0.0.1/8"], value, False) for value in ("0", "false", "", None)] +
+                               [(["10.0.0.1/8"], value, True) for value in ("1", "json")] +
+                               [([option, "10.0.0.1/8"], None, True) for option in ("--profile", "--profile=table")] +
+                               [(["--profile", "table", "10.0.0.1/8"], None, True),
+                                (["--profile", "json", "10.0.0.1/8"], None, True)])),
+        (test_level_validation, ("Level validation: masks, missing fields, cache",
+                                 {"routes": {"Ar1": {"route": "10.0.0.5/24", "gate": "10.0.0.1"}, "Br1": {"gate": ""}},
+                                  "ifs": {"A1": {"ip": "10.0.0.2", "mask": "255.255.255.0"}, "R11": {"mask": "/24"},
+                                          "R12": {"ip": "10.0.1.255", "mask": "24"},
+                                          "R13": {"ip": "10.0.2.1", "mask": 24}, "S1": {}}},
+                                 {"A1": "/24", "R11": "/24", "R12": "/24"},
+                                 ["Interface R11: missing ip", "Interface R12: 10.0.1.255/24 is the broadcast address",
+                                  "Interface R13: invalid mask 24",
+                                  "Route Ar1: 10.0.0.5/24 is not a network address (10.0.0.0/24)",
+                                  "Route Br1: missing route", "Route Br1: empty gate"])),
+        (test_level_validation, ("Level validation: ifs and routes that are not objects",
+                                 {"ifs": [], "routes": "x"}, {},
+                                 ["ifs: not a JSON object", "routes: not a JSON object"])),
+        (test_address_set_random, ("Address sets: interval algebra vs Python sets", 1, 100)),
+        (test_address_pool_random, ("Address pool: buddy tree vs scan over allocations", 1, 1500)),
+        (test_subnet_cache_random, ("Subnet cache: same records as uncached, counters add up", 1, 3000, 64)),
+        (test_acl_random, ("ACL: compiled matcher vs first-match scan", 1, 300, 3000)),
+        (test_output_formats, ("Output formats: JSON Lines, CSV and binary agree", 1, 500)),
+        (test_level_watch_random, ("Watch mode: incremental re-validation vs full", 1, LEVEL7_SOLVED, 300)),
+    ]
 
-    test_fyi_output(
-        "FYI: Special CIDR /32 only",
-        ["203.0.113.5/32"],
-        ["Special CIDR"]
-    )
 
-    test_fyi_output(
-        "FYI: Private range only",
-        ["10.10.10.10/24"],
-        ["Private IP address"]
-    )
+def run_case(case, use_subprocess=False):
+    """
+        Worker task: runs one (test function, arguments, is a CLI case) case.
+        Only CLI cases (from all_cases) can run in a separate process.
+    """
+    function, args, cli = case
+    if cli:
+        return function(*args, use_subprocess=use_subprocess)
+    return function(*args)
 
-    test_fyi_output(
-        "FYI: Loopback",
-        ["127.0.0.1/8"],
-        ["Loopback IP address"]
-    )
+
+def run_all_tests(workers=None, use_subprocess=False):
+    print("\n#####################################\n### Running CLI Integration Tests "
+          "###\n#####################################")
+    start = time.perf_counter()
+    cases = [(function, args, True) for function, args in all_cases()] + \
+            [(function, args, False) for function, args in in_process_cases()]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(run_case, cases, [use_subprocess] * len(cases), chunksize=4))
+
+    total_tests = len(results)
+    passed_tests = 0
+    for passed, report in results:
+        print("\n".join(report))
+        passed_tests += passed
 
     print("\n#####################################")
-    print(f"Tests run: {total_tests}")
+    print(f"Tests run: {total_tests} ({time.perf_counter() - start:.2f} s)")
     print(f"{GREEN}Tests passed: {passed_tests}")
     print(f"{RED}Tests failed: {total_tests - passed_tests}{RESET}")
     print("#####################################\n")
+    return total_tests == passed_tests
+
+
+def compare_subnet_with_ipaddress(ip_int, cidr):
+    """
+        Compares Subnet attributes with the ipaddress module for one pair.
+        Returns None if they agree, otherwise a description of the first mismatch.
+    """
+    subnet = Subnet(ip_int, cidr)
+    net = ipaddress.IPv4Network((ip_int, cidr), strict=False)
+    network = int(net.network_address)
+    broadcast = int(net.broadcast_address)
+    if cidr == 32:
+        first, last, usable = network, network, 0
+    elif cidr == 31:
+        first, last, usable = network, broadcast, 2
+    else:
+        first, last, usable = network + 1, broadcast - 1, net.num_addresses - 2
+    next_net = network + net.num_addresses
+    prev_net = network - net.num_addresses
+    expected = {
+        "network_address": network,
+        "broadcast_address": broadcast,
+        "mask": str(net.netmask),
+        "first_usable_ip": first,
+        "last_usable_ip": last,
+        "usable_hosts": usable,
+        "group_size": net.num_addresses,
+        "next": "No next network" if next_net > 0xFFFFFFFF else str(ipaddress.IPv4Address(next_net)),
+        "previous": "No previous network" if prev_net < 0 else str(ipaddress.IPv4Address(prev_net)),
+    }
+    actual = {
+        "network_address": subnet.network_address,
+        "broadcast_address": subnet.broadcast_address,
+        "mask": subnet.mask,
+        "first_usable_ip": subnet.first_usable_ip,
+        "last_usable_ip": subnet.last_usable_ip,
+        "usable_hosts": subnet.usable_hosts,
+        "group_size": subnet.snet_group_size(),
+        "next": subnet.calculate_next_network(),
+        "previous": subnet.calculate_previous_network(),
+    }
+    for key in expected:
+        if actual[key] != expected[key]:
+            return f"{Subnet.int_to_dotted_decimal(ip_int)}/{cidr} {key}: {actual[key]} | Expected: {expected[key]}"
+    return None
+
+
+def differential_chunk(seed, count):
+    """
+        Worker task: checks count random (address, prefix) pairs.
+        Returns (checked, mismatches, first few mismatch descriptions).
+    """
+    rng = random.Random(seed)
+    mismatches = 0
+    examples = []
+    for _ in range(count):
+        problem = compare_subnet_with_ipaddress(rng.getrandbits(32), rng.randint(0, 32))
+        if problem is not None:
+            mismatches += 1
+            if len(examples) < 5:
+                examples.append(problem)
+    return count, mismatches, examples
+
+
+def run_differential(total, seed=0, workers=None, chunk_size=50000):
+    """
+        Randomized differential test of Subnet against ipaddress,
+        spread over a process pool in chunks of chunk_size pairs.
+    """
+    print(f"\n### Differential test: {total} random address/prefix pairs vs ipaddress ###")
+    start = time.perf_counter()
+    chunks = [(seed * 1000003 + i, min(chunk_size, total - offset))
+              for i, offset in enumerate(range(0, total, chunk_size))]
+    checked = mismatches = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for count, bad, examples in pool.map(differential_chunk, *zip(*chunks)):
+            checked += count
+            mismatches += bad
+            for example in examples:
+                print(f"{RED}KO{RESET} {example}")
+    elapsed = time.perf_counter() - start
+    color = GREEN if mismatches == 0 else RED
+    print(f"{color}Checked: {checked}  Mismatches: {mismatches}{RESET}  "
+          f"({elapsed:.2f} s, {checked / elapsed:.0f} pairs/s)\n")
+    return mismatches == 0
 
 
 if __name__ == "__main__":
-    run_all_tests()
+    parser = argparse.ArgumentParser(description="Integration tests for ip_attributes.py")
+    parser.add_argument("--subprocess", action="store_true",
+                        help="run every CLI case in a separate python3 process (end-to-end)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--differential", type=int, metavar="N", default=0,
+                        help="also check N random address/prefix pairs against ipaddress")
+    parser.add_argument("--seed", type=int, default=0, help="seed for --differential")
+    args = parser.parse_args()
+
+    ok = run_all_tests(args.workers, args.subprocess)
+    if args.differential:
+        ok = run_differential(args.differential, args.seed, args.workers) and ok
+    sys.exit(0 if ok else 1)
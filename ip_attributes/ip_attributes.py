@@ -1,7 +1,16 @@
+import os
 import sys
-import re
 import json
-import textwrap
+import heapq
+import bisect
+from collections import OrderedDict
+
+import profiling
+import output_formats
+
+
+from address_parser import (PREFIX_TO_MASK, PREFIX_TO_WILDCARD, parse_ipv4, parse_address, parse_arguments,
+                            subnet_to_cidr)
 
 
 class Subnet:
@@ -10,20 +19,37 @@ class Subnet:
       - Network and broadcast addresses
       - Usable host range and count
       - Subnet group size and adjacent networks
+      Only 32-bit integers are stored; dotted strings are built when read.
     """
+    __slots__ = ("ip_int", "cidr", "mask_int", "network_address", "broadcast_address",
+                 "first_usable_ip", "last_usable_ip", "usable_hosts")
+
     def __init__(self, ip, cidr):
-        self.ip = ip
+        self.ip_int = ip if isinstance(ip, int) else ip_to_int(ip)
         self.cidr = cidr
-        self.mask = self.cidr_to_mask()
-        self.binary_mask = self.convert_4_octets_to_binary(self.mask)
-        self.binary_ip = self.convert_4_octets_to_binary(self.ip)
+        self.mask_int = PREFIX_TO_MASK[cidr]
 
-        self.network_address = int(self.binary_ip, 2) & int(self.binary_mask, 2)
-        binary_mask_int = int(self.binary_mask, 2)
-        self.broadcast_address = self.network_address | (~binary_mask_int & 0xFFFFFFFF)
+        self.network_address = self.ip_int & self.mask_int
+        self.broadcast_address = self.network_address | PREFIX_TO_WILDCARD[cidr]
 
         self.first_usable_ip, self.last_usable_ip, self.usable_hosts = self.calculate_usable_range()
 
+    @property
+    def ip(self):
+        return self.int_to_dotted_decimal(self.ip_int)
+
+    @property
+    def mask(self):
+        return self.int_to_dotted_decimal(self.mask_int)
+
+    @property
+    def binary_ip(self):
+        return f"{self.ip_int:032b}"
+
+    @property
+    def binary_mask(self):
+        return f"{self.mask_int:032b}"
+
     def calculate_usable_range(self):
         """
             Determines the first and last usable IPs in the subnet.
@@ -44,10 +70,7 @@ class Subnet:
             Converts CIDR into dotted-decimal subnet mask.
             e.g. /24 -> 255.255.255.0
         """
-        binary = self.cidr_to_binary()
-        octets = [binary[i:i + 8] for i in range(0, 32, 8)]
-        decimal_octets = [str(int(octet, 2)) for octet in octets]
-        return ".".join(decimal_octets)
+        return self.int_to_dotted_decimal(PREFIX_TO_MASK[self.cidr])
 
     def calculate_next_network(self):
         """
@@ -69,12 +92,44 @@ class Subnet:
             return "No previous network"
         return self.int_to_dotted_decimal(previous_network)
 
+    def subnets(self, new_cidr, stride=1, offset=0, reverse=False):
+        """
+            Lazily walks every /new_cidr network address inside this subnet.
+            Returns a range of integers: O(1) per step, nothing is stored.
+            offset skips networks and stride takes every n-th one, both in
+            walk order (from the end when reverse is set).
+            e.g. 10.0.0.0/24 -> /26 => 10.0.0.0, 10.0.0.64, 10.0.0.128, 10.0.0.192
+        """
+        if not self.cidr <= new_cidr <= 32:
+            raise ValueError(f"Error: /{new_cidr} does not fit inside /{self.cidr}.")
+        if stride < 1 or offset < 0:
+            raise ValueError("Error: stride must be >= 1 and offset >= 0.")
+        networks = range(self.network_address, self.broadcast_address + 1, 1 << (32 - new_cidr))
+        if reverse:
+            networks = networks[::-1]
+        return networks[offset::stride]
+
+    def hosts(self, stride=1, offset=0, reverse=False):
+        """
+            Lazily walks the usable host addresses (first to last usable IP)
+            as a range of integers, with the same options as subnets.
+            Empty for /32, which has no usable hosts.
+        """
+        if stride < 1 or offset < 0:
+            raise ValueError("Error: stride must be >= 1 and offset >= 0.")
+        if self.usable_hosts == 0:
+            return range(0)
+        addresses = range(self.first_usable_ip, self.last_usable_ip + 1)
+        if reverse:
+            addresses = addresses[::-1]
+        return addresses[offset::stride]
+
     def snet_group_size(self):
         """
            Subnet group size = 2^(32 - CIDR).
            Total number of IPs in the subnet (including net/broadcast).
         """
-        return 2 ** (32 - self.cidr)
+        return 1 << (32 - self.cidr)
 
     def cidr_boundary_octet(self):
         """
@@ -115,9 +170,7 @@ class Subnet:
             Converts a 32-bit integer to dotted-decimal IP format.
             e.g. 3232235776 => '192.168.1.0'
         """
-        binary_str = bin(binary_int)[2:].zfill(32)
-        octets = [binary_str[i:i+8] for i in range(0, 32, 8)]
-        return ".".join(str(int(octet, 2)) for octet in octets)
+        return f"{binary_int >> 24}.{(binary_int >> 16) & 255}.{(binary_int >> 8) & 255}.{binary_int & 255}"
 
     @staticmethod
     def octets_to_dotted_decimal(octets):
@@ -127,49 +180,129 @@ class Subnet:
         """
         return ".".join(str(o) for o in octets)
 
-    def print_info(self):
+    def to_dict(self, special_ranges=None, databases=()):
         """
-            Outputs all computed subnet information and FYI data.
+            Returns all computed subnet information as a dictionary.
+            Missing next/previous networks are None; FYI categories are
+            included when special_ranges is given.
         """
-        print("\n----- IP Attributes -----\n")
-        print(f"Network address: {self.int_to_dotted_decimal(self.network_address)}")
-        print(f"Broadcast address: {self.int_to_dotted_decimal(self.broadcast_address)}")
-        print(f"Subnet mask: {self.mask}")
-        print(f"CIDR: /{self.cidr}")
-        print(f"Number of usable hosts: {self.usable_hosts}")
-        print(f"First usable IP: {self.int_to_dotted_decimal(self.first_usable_ip)}")
-        print(f"Last usable IP: {self.int_to_dotted_decimal(self.last_usable_ip)}")
-        print(f"Subnet group size: {self.snet_group_size()}")
-        print(f"Next network address: {self.calculate_next_network()}")
-        print(f"Previous network address: {self.calculate_previous_network()}")
-
-        # Load special ranges from JSON
-        special_ranges = load_special_ranges()
+        next_network = self.network_address + self.snet_group_size()
+        previous_network = self.network_address - self.snet_group_size()
+        result = {
+            "ip": self.ip,
+            "network_address": self.int_to_dotted_decimal(self.network_address),
+            "broadcast_address": self.int_to_dotted_decimal(self.broadcast_address),
+            "subnet_mask": self.mask,
+            "cidr": self.cidr,
+            "usable_hosts": self.usable_hosts,
+            "first_usable_ip": self.int_to_dotted_decimal(self.first_usable_ip),
+            "last_usable_ip": self.int_to_dotted_decimal(self.last_usable_ip),
+            "group_size": self.snet_group_size(),
+            "next_network": self.int_to_dotted_decimal(next_network) if next_network <= 0xFFFFFFFF else None,
+            "previous_network": self.int_to_dotted_decimal(previous_network) if previous_network >= 0 else None,
+        }
+        if special_ranges is not None:
+            result["fyi"] = [fyi["category"] for fyi in get_fyi_info(self.ip, special_ranges, self.cidr, databases)]
+        return result
+
+    def print_info(self, output_format="text"):
+        """
+            Outputs all computed subnet information and FYI data,
+            as the human-readable report or in one of output_formats.FORMATS.
+        """
+        # Load special ranges from JSON (cached and compiled once per process)
+        special_ranges = load_special_range_index()
+        databases = load_prefix_databases()
+        if output_format != "text":
+            writer = output_formats.open_output(output_format)
+            writer.write(self.to_dict(special_ranges, databases))
+            writer.close()
+            return
         # Pass self.cidr so that get_fyi_info can also check for a CIDR-specific entry
-        fyi_list = get_fyi_info(self.ip, special_ranges, self.cidr)
-        if fyi_list:
-            print("\n---------- FYI ----------")
-            for fyi in fyi_list:
-                print(f"Category: {fyi['category']}")
-                wrapped_usage = textwrap.fill(
-                    fyi['usage'],
-                    width=70,
-                    initial_indent="Usage  : ",
-                    subsequent_indent="         "
-                )
-                print(wrapped_usage)
-                print()  # Add spacing between FYI blocks
-        else:
-            print("\n-------------------------\n")
+        fyi_list = get_fyi_info(self.ip, special_ranges, self.cidr, databases)
+        sys.stdout.write(output_formats.render_text(self.to_dict(), fyi_list))
+
+
+RESERVED_IP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "reserved_ip.json")
 
+# Resolved path -> [(mtime_ns, size), parsed list, compiled ReservedRangeIndex or None]
+_special_ranges_cache = {}
 
-def load_special_ranges(filename="reserved_ip.json"):
+
+def _cached_special_ranges(filename):
+    """
+        Returns the cache slot for filename, re-reading the file
+        only when its modification time or size has changed.
+    """
+    path = os.path.realpath(filename)
+    stat = os.stat(path)
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = _special_ranges_cache.get(path)
+    if cached is None or cached[0] != version:
+        with open(path, "r") as file:
+            cached = [version, json.load(file), None]
+        _special_ranges_cache[path] = cached
+    return cached
+
+
+def load_special_ranges(filename=RESERVED_IP_FILE):
     """
         Loads JSON file containing reserved and special-use IP ranges.
         Used to provide FYI info based on input IP or CIDR.
+        Parsed once per process and reloaded when the file changes;
+        the returned list is shared, so do not modify it.
+    """
+    return _cached_special_ranges(filename)[1]
+
+
+def load_special_range_index(filename=RESERVED_IP_FILE):
+    """
+        Same as load_special_ranges, but returns the compiled
+        ReservedRangeIndex (also cached until the file changes).
     """
-    with open(filename, "r") as file:
-        return json.load(file)
+    cached = _cached_special_ranges(filename)
+    if cached[2] is None:
+        cached[2] = ReservedRangeIndex(cached[1])
+    return cached[2]
+
+
+PREFIX_DATABASES_VARIABLE = "IP_ATTRIBUTES_DB"
+
+# Resolved path -> [(mtime_ns, size), open PrefixDatabase]
+_prefix_database_cache = {}
+
+
+def load_prefix_databases():
+    """
+        Opens the compiled prefix databases (see prefix_database.py) listed in
+        $IP_ATTRIBUTES_DB, separated by os.pathsep. Each file is memory-mapped
+        once per process and reopened when it changes.
+        Raises ValueError naming the file if one cannot be opened.
+    """
+    paths = os.environ.get(PREFIX_DATABASES_VARIABLE)
+    if not paths:
+        return []
+    # Imported here so runs without databases do not pay for it at startup
+    from prefix_database import PrefixDatabase
+    databases = []
+    for filename in paths.split(os.pathsep):
+        path = os.path.realpath(filename)
+        try:
+            stat = os.stat(path)
+            version = (stat.st_mtime_ns, stat.st_size)
+            cached = _prefix_database_cache.get(path)
+            if cached is None or cached[0] != version:
+                if cached is not None:
+                    cached[1].close()
+                    del _prefix_database_cache[path]
+                cached = [version, PrefixDatabase(path)]
+                _prefix_database_cache[path] = cached
+        except OSError as msg:
+            raise ValueError(f"Error: cannot open prefix database {filename}: {msg.strerror or msg}.")
+        except ValueError as msg:
+            raise ValueError(f"Error: cannot open prefix database {filename}: {str(msg).removeprefix('Error: ')}")
+        databases.append(cached[1])
+    return databases
 
 
 def ip_to_int(ip_str):
@@ -195,59 +328,384 @@ CATEGORY_PRIORITY = {
 }
 
 
-def get_fyi_info(ip_str, special_ranges, cidr=None):
+class ReservedRangeIndex:
+    """
+        Compiled form of the reserved/special ranges for fast FYI lookups.
+        - "a - b" ranges are split once into sorted elementary segments, each
+          holding its top priority (bisect lookup); the matching entries are
+          collected from a segment tree at lookup time.
+        - Single-IP ranges and CIDR-only ("range": "any") entries are
+          kept in hash maps.
+        Malformed entries are skipped, as get_fyi_info always did.
+    """
+    def __init__(self, special_ranges):
+        self.entries = special_ranges
+        intervals = []
+        exact = {}
+        cidr_entries = {}
+        for order, entry in enumerate(special_ranges):
+            try:
+                priority = CATEGORY_PRIORITY.get(entry["category"], 999)
+                entry_cidr = entry.get("cidr")
+                if entry_cidr is not None and entry_cidr != "N/A" and entry["range"] == "any":
+                    # Only reachable through the CIDR match, ip_to_int rejects "any"
+                    if isinstance(entry_cidr, str):
+                        cidr_entries.setdefault(entry_cidr, []).append(entry)
+                    continue
+                if " - " in entry["range"]:
+                    start_str, end_str = entry["range"].split(" - ")
+                    start_int = ip_to_int(start_str)
+                    end_int = ip_to_int(end_str)
+                    if start_int <= end_int:
+                        intervals.append((start_int, end_int + 1, priority, order, entry))
+                else:
+                    exact.setdefault(entry["range"].strip(), []).append((priority, order, entry))
+            except Exception:
+                continue
+        self.cidr_entries = cidr_entries
+        self.exact = {key: self._top_group(matches) for key, matches in exact.items()}
+        # Single-IP keys as integers; only canonical spellings can ever match a Subnet's ip
+        self.exact_addresses = sorted(parse_ipv4(key) for key in self.exact if parse_ipv4(key) is not None)
+        self.boundaries, self.tops, self.tree, self.leaves = self._build_segments(intervals)
+
+    @staticmethod
+    def _top_group(matches):
+        """
+            Reduces (priority, order, entry) matches to the best priority
+            and its entries in table order: (priority, ((order, entry), ...)).
+        """
+        top = min(priority for priority, _, _ in matches)
+        return top, tuple((order, entry) for priority, order, entry in sorted(matches, key=lambda m: m[1])
+                          if priority == top)
+
+    @staticmethod
+    def _build_segments(intervals):
+        """
+            Sweeps over interval boundaries and records the top priority active in
+            each elementary segment [boundaries[i], boundaries[i + 1]).
+            The intervals themselves go into a segment tree over those segments
+            (node i has children 2i and 2i + 1, leaf of segment s is leaves + s):
+            each is stored in at most 2 log m nodes, and the nodes on the path from
+            a leaf to the root hold exactly the intervals covering that segment.
+            Build time and memory stay O(n log n), however deeply ranges nest.
+        """
+        boundaries = sorted({point for start, stop, _, _, _ in intervals for point in (start, stop)})
+        position = {point: index for index, point in enumerate(boundaries)}
+        leaves = 1 << max(len(boundaries) - 1, 0).bit_length()
+        tree = [None] * (2 * leaves)
+        for start, stop, priority, order, entry in intervals:
+            low, high = position[start] + leaves, position[stop] + leaves
+            while low < high:
+                if low & 1:
+                    tree[low] = tree[low] or []
+                    tree[low].append((priority, order, entry))
+                    low += 1
+                if high & 1:
+                    high -= 1
+                    tree[high] = tree[high] or []
+                    tree[high].append((priority, order, entry))
+                low >>= 1
+                high >>= 1
+
+        # Active interval count per priority (a key for every priority in the heap, 0 once
+        # its intervals have ended; removed when it comes out on top)
+        starts = sorted((start, priority) for start, _, priority, _, _ in intervals)
+        stops = sorted((stop, priority) for _, stop, priority, _, _ in intervals)
+        active = {}
+        priorities = []
+        tops = []
+        started = stopped = 0
+        for point in boundaries:
+            while stopped < len(stops) and stops[stopped][0] == point:
+                active[stops[stopped][1]] -= 1
+                stopped += 1
+            while started < len(starts) and starts[started][0] == point:
+                priority = starts[started][1]
+                if priority not in active:
+                    active[priority] = 0
+                    heapq.heappush(priorities, priority)
+                active[priority] += 1
+                started += 1
+            while priorities and not active[priorities[0]]:
+                del active[heapq.heappop(priorities)]
+            tops.append(priorities[0] if priorities else None)
+        return boundaries, tops, tree, leaves
+
+    def _segment_group(self, position):
+        """
+            (top priority, ((order, entry), ...)) of the intervals covering
+            elementary segment position, or None.
+        """
+        top = self.tops[position]
+        if top is None:
+            return None
+        matched = []
+        node = position + self.leaves
+        tree = self.tree
+        while node:
+            if tree[node] is not None:
+                matched.extend((order, entry) for priority, order, entry in tree[node] if priority == top)
+            node >>= 1
+        if len(matched) > 1:
+            matched.sort(key=lambda match: match[0])
+        return top, matched
+
+    def lookup(self, ip_str, cidr=None):
+        """
+            Same result as the original linear scan in get_fyi_info.
+        """
+        ip_int = ip_to_int(ip_str)
+        groups = []
+        position = bisect.bisect_right(self.boundaries, ip_int) - 1
+        if position >= 0:
+            group = self._segment_group(position)
+            if group is not None:
+                groups.append(group)
+        exact = self.exact.get(ip_str.strip())
+        if exact is not None:
+            groups.append(exact)
+        ip_matches = []
+        if groups:
+            top = min(priority for priority, _ in groups)
+            matched = [match for priority, matches in groups if priority == top for match in matches]
+            if len(groups) > 1:
+                matched.sort(key=lambda match: match[0])
+            ip_matches = [entry for _, entry in matched]
+        cidr_matches = self.cidr_entries.get(f"/{cidr}", []) if cidr is not None else []
+        return ip_matches + cidr_matches
+
+    def uniform(self, start, end):
+        """
+            True if every address in start..end gets the same lookup result:
+            the range lies in one elementary segment and holds no single-IP entry.
+        """
+        if bisect.bisect_right(self.boundaries, start) != bisect.bisect_right(self.boundaries, end):
+            return False
+        position = bisect.bisect_left(self.exact_addresses, start)
+        return position == len(self.exact_addresses) or self.exact_addresses[position] > end
+
+
+class SubnetCache:
+    """
+        Opt-in interned Subnet constructor for workloads that see the same
+        networks over and over. A bounded LRU cache keyed on (network, prefix)
+        holds one shared Subnet per network (mask, broadcast, usable range),
+        its to_dict fields as strings and, when the whole network gets the
+        same FYI categories, the FYI result as well. Only the address itself
+        is converted per call.
+        Can be passed wherever a ReservedRangeIndex is expected.
+        Subnets it returns for a network address are shared: do not modify them.
+    """
+    def __init__(self, special_ranges, maxsize=4096):
+        if maxsize < 0:
+            raise ValueError(f"Error: Subnet cache size must be 0 or more, got {maxsize}.")
+        self.index = special_ranges
+        self.maxsize = maxsize
+        # (network, prefix) -> [shared Subnet, lookup result or None, to_dict fields without "ip"]
+        self.entries = OrderedDict()
+        self.hits = self.misses = self.evictions = 0
+
+    def _entry(self, network, cidr):
+        key = (network, cidr)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry
+        self.misses += 1
+        shared = Subnet(network, cidr)
+        fyi = None
+        if self.index.uniform(shared.network_address, shared.broadcast_address):
+            fyi = self.index.lookup(shared.ip, cidr)
+        fields = shared.to_dict()
+        del fields["ip"]
+        entry = self.entries[key] = [shared, fyi, fields]
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return entry
+
+    def subnet(self, ip, cidr):
+        """
+            Same as Subnet(ip, cidr) (ip as int or string), served from the cache.
+        """
+        ip_int = ip if isinstance(ip, int) else ip_to_int(ip)
+        shared = self._entry(ip_int & PREFIX_TO_MASK[cidr], cidr)[0]
+        if ip_int == shared.ip_int:
+            return shared
+        subnet = Subnet.__new__(Subnet)
+        subnet.ip_int = ip_int
+        subnet.cidr = cidr
+        subnet.mask_int = shared.mask_int
+        subnet.network_address = shared.network_address
+        subnet.broadcast_address = shared.broadcast_address
+        subnet.first_usable_ip = shared.first_usable_ip
+        subnet.last_usable_ip = shared.last_usable_ip
+        subnet.usable_hosts = shared.usable_hosts
+        return subnet
+
+    def to_dict(self, ip, cidr, databases=()):
+        """
+            Same as Subnet(ip, cidr).to_dict(self, databases), served from the cache.
+        """
+        ip_int = ip if isinstance(ip, int) else ip_to_int(ip)
+        shared, fyi, fields = self._entry(ip_int & PREFIX_TO_MASK[cidr], cidr)
+        ip_str = Subnet.int_to_dotted_decimal(ip_int)
+        result = {"ip": ip_str, **fields}
+        if fyi is None or databases:
+            fyi = get_fyi_info(ip_str, self.index, cidr, databases)
+        result["fyi"] = [match["category"] for match in fyi]
+        return result
+
+    def lookup(self, ip_str, cidr=None):
+        """
+            ReservedRangeIndex.lookup, answered from the cached network when possible.
+            Does not count as a hit or miss.
+        """
+        ip_int = parse_ipv4(ip_str)
+        if cidr is not None and ip_int is not None:
+            entry = self.entries.get((ip_int & PREFIX_TO_MASK[cidr], cidr))
+            if entry is not None and entry[1] is not None:
+                return list(entry[1])
+        return self.index.lookup(ip_str, cidr)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {"size": len(self.entries), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "hit_rate": self.hits / lookups if lookups else 0.0}
+
+
+def get_fyi_info(ip_str, special_ranges, cidr=None, databases=()):
     """
         Matches input IP against reserved IP ranges and special CIDRs.
         Returns the most relevant category and optional CIDR match.
         Uses priority sorting to prefer most relevant category.
+        special_ranges is either the raw list or a compiled ReservedRangeIndex
+        (or a SubnetCache); pass the index when looking up many IPs.
+        Matches from the optional PrefixDatabases follow, one per database.
+    """
+    if not isinstance(special_ranges, (ReservedRangeIndex, SubnetCache)):
+        special_ranges = ReservedRangeIndex(special_ranges)
+    matches = special_ranges.lookup(ip_str, cidr)
+    if databases:
+        ip_int = ip_to_int(ip_str)
+        matches += [fyi for fyi in (database.fyi(ip_int) for database in databases) if fyi is not None]
+    return matches
+
+
+def read_lines(source):
+    """
+        Yields (line_number, text) for each non-empty, non-comment line.
+        Reads lazily so memory stays constant regardless of input size.
+    """
+    for line_number, line in enumerate(source, start=1):
+        text = line.strip()
+        if text and not text.startswith("#"):
+            yield line_number, text
+
+
+def checked_lines(source, name):
+    """
+        Iterates over the lines of source. A read error becomes a ValueError
+        naming the input, so it cannot be mistaken for an error writing the output.
+    """
+    try:
+        yield from source
+    except OSError as msg:
+        raise ValueError(f"Error: Cannot read '{name}': {msg.strerror or msg}.")
+
+
+def parse_line(text):
+    """
+        Parses one stream line: 'ip/cidr', 'ip cidr', 'ip /cidr' or 'ip mask'.
+        Raises ValueError with the same messages as main.
+    """
+    tokens = text.split()
+    if len(tokens) == 2:
+        return parse_address(tokens)
+    return parse_address([text])
+
+
+def analyze_lines(lines, special_ranges, databases=()):
+    """
+        Turns (line_number, text) pairs into result dictionaries.
+        Bad lines produce an error record instead of stopping the run.
     """
-    ip_int = ip_to_int(ip_str)
-    ip_matches = []
-    cidr_matches = []
-    for entry in special_ranges:
+    for line_number, text in lines:
+        record = {"line": line_number, "input": text}
         try:
-            if "cidr" in entry and entry["cidr"] != "N/A":
-                if cidr is not None and entry["cidr"] == f"/{cidr}" and entry["range"] == "any":
-                    cidr_matches.append(entry)
-                    continue
-            if " - " in entry["range"]:
-                start_str, end_str = entry["range"].split(" - ")
-                start_int = ip_to_int(start_str)
-                end_int = ip_to_int(end_str)
-                if start_int <= ip_int <= end_int:
-                    ip_matches.append(entry)
+            ip, cidr = parse_line(text)
+            if isinstance(special_ranges, SubnetCache):
+                record.update(special_ranges.to_dict(ip, cidr, databases))
             else:
-                if ip_str.strip() == entry["range"].strip():
-                    ip_matches.append(entry)
-        except Exception:
-            continue
-    ip_matches.sort(key=lambda x: CATEGORY_PRIORITY.get(x["category"], 999))
-    top_ip_category = CATEGORY_PRIORITY.get(ip_matches[0]["category"], 999) if ip_matches else None
-    top_ip_matches = [entry for entry in ip_matches if CATEGORY_PRIORITY.get(entry["category"], 999) == top_ip_category]
-    return top_ip_matches + cidr_matches
-
-
-def subnet_to_cidr(subnet_mask):
-    """
-        Converts subnet mask (e.g., 255.255.255.0) to CIDR (e.g., /24).
-        Validates binary continuity (no "01" patterns allowed).
-    """
-    subnet_mask = subnet_mask.strip()
-    octets = subnet_mask.split(".")
-    if len(octets) != 4:
-        raise ValueError("Error: Invalid CIDR/mask format. Expected: /<0–31> or valid subnet mask.")
-    for octet in octets:
-        if not octet.isdigit():
-            raise ValueError("Error: Invalid CIDR/mask format. Expected: /<0–31> or valid subnet mask.")
-        if octet != str(int(octet)):
-            raise ValueError("Error: Invalid CIDR/mask format. Expected: /<0–31> or valid subnet mask.")
-        if not (0 <= int(octet) <= 255):
-            raise ValueError("Error: Invalid CIDR/mask format. Expected: /<0–31> or valid subnet mask.")
-    binary_mask = ''.join(f'{int(o):08b}' for o in octets)
-    if "01" in binary_mask:
-        raise ValueError("Error: Invalid CIDR/mask format. Expected: /<0–31> or valid subnet mask.")
-    cidr = binary_mask.count("1")
-    return cidr
+                record.update(Subnet(ip, cidr).to_dict(special_ranges, databases))
+        except ValueError as msg:
+            record["error"] = str(msg)
+        except Exception as msg:
+            record["error"] = f"Unexpected error: {msg}"
+        yield record
+
+
+SUBNET_CACHE_VARIABLE = "IP_ATTRIBUTES_SUBNET_CACHE"
+
+
+def subnet_cache_size():
+    """
+        Maximum size of the SubnetCache from IP_ATTRIBUTES_SUBNET_CACHE, or 0 (off).
+    """
+    value = os.environ.get(SUBNET_CACHE_VARIABLE, "").strip()
+    if not value:
+        return 0
+    if not value.isdigit():
+        raise ValueError(f"Error: {SUBNET_CACHE_VARIABLE} must be a number of entries.")
+    return int(value)
+
+
+def stream(source, output, output_format="json"):
+    """
+        Streaming mode: reads one address per line from source and writes
+        one JSON object per line (JSON Lines) to output, or CSV or binary
+        records (see output_formats; output must be binary for "binary").
+        With IP_ATTRIBUTES_SUBNET_CACHE=N, repeated networks are served from
+        a SubnetCache of N entries and its counters go to stderr at the end.
+    """
+    special_ranges = load_special_range_index()
+    cache_size = subnet_cache_size()
+    if cache_size:
+        special_ranges = SubnetCache(special_ranges, cache_size)
+    writer = output_formats.RecordWriter(output, output_format)
+    writer.write_all(analyze_lines(read_lines(source), special_ranges, load_prefix_databases()))
+    if cache_size:
+        print(f"Subnet cache: {json.dumps(special_ranges.stats())}", file=sys.stderr)
+
+
+PROFILE_VARIABLE = "IP_ATTRIBUTES_PROFILE"
+# Values of PROFILE_VARIABLE that leave profiling off (ip_attributes_client uses the same)
+PROFILE_OFF = ("", "0", "false")
+
+
+def profile_setting():
+    """
+        Profiling output format from IP_ATTRIBUTES_PROFILE: "json" for json,
+        None when unset, empty, "0" or "false", else "table".
+    """
+    value = os.environ.get(PROFILE_VARIABLE, "").strip().lower()
+    if value in PROFILE_OFF:
+        return None
+    return "json" if value == "json" else "table"
+
+
+def enable_profiling(output_format="table"):
+    """
+        Times the stages of a run (parsing, Subnet math, loading the reserved
+        ranges, FYI lookups, rendering) and prints a summary at exit.
+        The functions are only wrapped from here on, so runs without
+        profiling are not slowed down.
+    """
+    profiling.enable(output_format)
+    profiling.instrument(globals(), ("parse_address", "load_special_range_index", "load_prefix_databases",
+                                     "get_fyi_info", "stream"))
+    profiling.instrument(Subnet, ("__init__", "to_dict", "print_info"), prefix="Subnet.")
 
 
 def main(argc, argv):
@@ -255,49 +713,70 @@ def main(argc, argv):
         Parses and validates CLI arguments.
         Accepts IP/CIDR, IP + CIDR, or IP + subnet mask.
         Runs the Subnet class and prints output.
+        With --stream [file] reads addresses line by line (stdin by default).
+        --profile (or --profile=table|json, --profile table|json) before the other
+        arguments, or $IP_ATTRIBUTES_PROFILE, prints per-stage timings to stderr at exit.
+        --format=json|csv|binary (or --format json|csv|binary) before the other
+        arguments changes the output (default: text, or JSON Lines with --stream).
     """
-    try:
-        if argc == 2:
-            arg = argv[1].strip()
-            match = re.match(r'^(\d{1,3}(?:\.\d{1,3}){3})\s*/\s*(\d{1,2})$', arg)
-            if not match:
-                raise ValueError("Error: Invalid input format. Expected IP/CIDR like '192.168.0.1/24'.")
-            ip, cidr_str = match.groups()
-        elif argc == 3:
-            ip = argv[1].strip()
-            second_arg = argv[2].strip()
-            # Validate IP using regex
-            if not re.fullmatch(r"(25[0-5]|2[0-4]\d|1\d{2}|[1-9]?\d)"
-                                r"(\.(25[0-5]|2[0-4]\d|1\d{2}|[1-9]?\d)){3}", ip):
-                raise ValueError("Error: Invalid IP format.")
-            if any(o != str(int(o)) for o in ip.split(".")):
-                raise ValueError("Error: Invalid IP format.")  # leading zeros
-            cidr_match = re.fullmatch(r"/?(\d{1,2})", second_arg)
-            if cidr_match:
-                cidr_str = cidr_match.group(1)
-            else:
-                # Try subnet mask
-                try:
-                    cidr = subnet_to_cidr(second_arg)
-                except Exception:
-                    raise ValueError("Error: Invalid CIDR/mask format. Expected: /<0–31> or valid subnet mask.")
-
-                subnet = Subnet(ip, cidr)
-                subnet.print_info()
+    profile = profile_setting()
+    output_format = None
+    while argc >= 2 and argv[1].startswith(("--profile", "--format")):
+        if argv[1] == "--profile" and argc >= 3 and argv[2] in ("table", "json"):
+            profile = argv[2]
+            argc, argv = argc - 1, argv[:1] + argv[2:]
+        elif argv[1] in ("--profile", "--profile=table", "--profile=json"):
+            profile = argv[1][len("--profile="):] or "table"
+        elif argv[1] == "--format":
+            if argc < 3 or argv[2] not in ("text", "json", "csv", "binary"):
+                print("Error: --format needs one of text, json, csv, binary.")
                 return
+            output_format = argv[2]
+            argc, argv = argc - 1, argv[:1] + argv[2:]
+        elif argv[1] in ("--format=text", "--format=json", "--format=csv", "--format=binary"):
+            output_format = argv[1][len("--format="):]
         else:
-            raise ValueError("Error: Usage: <program> <ip/cidr> OR <ip> <subnet mask> OR <ip> /cidr")
-        if not re.fullmatch(r"(25[0-5]|2[0-4]\d|1\d{2}|[1-9]?\d)"
-                            r"(\.(25[0-5]|2[0-4]\d|1\d{2}|[1-9]?\d)){3}", ip):
-            raise ValueError("Error: Invalid IP format.")
-        if any(o != str(int(o)) for o in ip.split(".")):
-            raise ValueError("Error: Invalid IP format.")  # leading zeros
-        if not cidr_str.isdigit() or not (0 <= int(cidr_str) <= 32):
-            raise ValueError("Error: Invalid CIDR/mask format. Expected: /<0–31> or valid subnet mask.")
-        cidr = int(cidr_str)
-
+            print(f"Error: Unknown option '{argv[1]}'.")
+            return
+        argc, argv = argc - 1, argv[:1] + argv[2:]
+    if profile:
+        enable_profiling(profile)
+    if argc >= 2 and argv[1] == "--stream":
+        if argc > 3:
+            print("Error: Usage: <program> --stream [file]")
+            return
+        if argc == 3 and argv[2].startswith("--"):
+            print(f"Error: Unknown option '{argv[2]}'. Options go before --stream.")
+            return
+        output_format = output_format or "json"
+        if output_format == "text":
+            print("Error: --stream writes json, csv or binary.")
+            return
+        output = sys.stdout.buffer if output_format == "binary" else sys.stdout
+        name = "stdin" if argc == 2 or argv[2] == "-" else argv[2]
+        try:
+            source = sys.stdin if name == "stdin" else open(name, "r")
+        except OSError as msg:
+            print(f"Error: Cannot read '{name}': {msg.strerror or msg}.")
+            return
+        try:
+            stream(checked_lines(source, name), output, output_format)
+        except ValueError as msg:
+            print(msg)
+        except BrokenPipeError:
+            # The reader went away (e.g. '| head'): stop quietly, and point stdout
+            # at devnull so the flush at exit does not fail again
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        except OSError as msg:
+            print(f"Error: Cannot write output: {msg.strerror or msg}.", file=sys.stderr)
+        finally:
+            if source is not sys.stdin:
+                source.close()
+        return
+    try:
+        ip, cidr = parse_address(argv[1:argc])
         subnet = Subnet(ip, cidr)
-        subnet.print_info()
+        subnet.print_info(output_format or "text")
 
     except ValueError as msg:
         print(msg)
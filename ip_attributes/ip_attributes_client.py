@@ -0,0 +1,105 @@
+import os
+import sys
+import stat
+import socket
+
+
+# Keep this file's imports minimal: its whole point is a fast start.
+# ip_attributes_daemon uses the same default_socket_path and check_owner.
+
+# Used when $XDG_RUNTIME_DIR is not set; the daemon creates it with mode 0700
+PRIVATE_DIRECTORY = f"/tmp/ip_attributes-{os.getuid()}"
+
+
+def default_socket_path():
+    """
+        Socket path shared by the daemon and the client: $IP_ATTRIBUTES_SOCKET,
+        or ip_attributes.sock in $XDG_RUNTIME_DIR, or else in PRIVATE_DIRECTORY.
+    """
+    path = os.environ.get("IP_ATTRIBUTES_SOCKET")
+    if path:
+        return path
+    return os.path.join(os.environ.get("XDG_RUNTIME_DIR") or PRIVATE_DIRECTORY, "ip_attributes.sock")
+
+
+def check_owner(path, private=False):
+    """
+        Raises PermissionError unless path (not followed if it is a symlink)
+        belongs to this user and, with private, no one else has any access to it.
+        Anyone can create files in /tmp, so a socket or directory found there
+        is only trusted after this check.
+    """
+    info = os.lstat(path)
+    if info.st_uid != os.getuid() or stat.S_ISLNK(info.st_mode) or (private and info.st_mode & 0o077):
+        raise PermissionError(f"Error: {path} belongs to another user or is open to others.")
+
+
+SOCKET_PATH = default_socket_path()
+
+# Settings ip_attributes reads from the environment (names as in ip_attributes).
+# The daemon applies the caller's values, and working directory, to each request.
+FORWARDED_VARIABLES = ("IP_ATTRIBUTES_DB", "IP_ATTRIBUTES_SUBNET_CACHE")
+# Profiling times the process it runs in, so it always runs in-process
+PROFILE_VARIABLE = "IP_ATTRIBUTES_PROFILE"
+# Values of PROFILE_VARIABLE that leave profiling off (as ip_attributes.PROFILE_OFF)
+PROFILE_OFF = ("", "0", "false")
+
+
+def encode_request(args, environment, directory):
+    """
+        The working directory, every forwarded NAME=value, an empty field, then
+        every argument, each field followed by a NUL byte.
+        e.g. (['10.0.0.1/8'], {}, '/home') => b'/home\x00\x0010.0.0.1/8\x00'
+    """
+    fields = [f"{name}={environment[name]}" for name in FORWARDED_VARIABLES if name in environment]
+    return "".join(field + "\0" for field in [directory, *fields, "", *args]).encode("utf-8")
+
+
+def request(args, path=SOCKET_PATH, environment=None):
+    """
+        Sends the arguments, the FORWARDED_VARIABLES of environment (default:
+        os.environ) and the working directory (for relative paths in them) to
+        the daemon and returns the raw output bytes.
+        Raises OSError if the daemon is not running, or if the socket (or
+        PRIVATE_DIRECTORY) belongs to someone else.
+    """
+    if os.path.dirname(path) == PRIVATE_DIRECTORY:
+        # Someone else may have created it first, to swap the socket under us
+        check_owner(PRIVATE_DIRECTORY, private=True)
+    check_owner(path)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(path)
+        client.sendall(encode_request(args, os.environ if environment is None else environment, os.getcwd()))
+        client.shutdown(socket.SHUT_WR)
+        chunks = []
+        while True:
+            chunk = client.recv(65536)
+            if not chunk:
+                return b"".join(chunks)
+            chunks.append(chunk)
+
+
+def main(argv):
+    """
+        Prints the same output as `python3 ip_attributes.py <args>`.
+        Falls back to running ip_attributes in-process when the daemon
+        is not running, for --stream (which needs this process's stdin),
+        for --profile or $IP_ATTRIBUTES_PROFILE (which time this process) and
+        for --format (binary output goes straight to this process's stdout).
+    """
+    args = argv[1:]
+    if os.environ.get(PROFILE_VARIABLE, "").strip().lower() in PROFILE_OFF and \
+            (not args or not args[0].startswith(("--stream", "--profile", "--format"))):
+        try:
+            output = request(args)
+        except OSError:
+            pass
+        else:
+            sys.stdout.buffer.write(output)
+            return
+    import ip_attributes
+    ip_attributes.main(len(argv), argv)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
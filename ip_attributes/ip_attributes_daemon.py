@@ -0,0 +1,104 @@
+import io
+import os
+import sys
+import signal
+import contextlib
+import socketserver
+
+import ip_attributes
+from ip_attributes_client import PRIVATE_DIRECTORY, FORWARDED_VARIABLES, default_socket_path, check_owner
+
+
+def decode_request(data):
+    """
+        Request format (see ip_attributes_client.encode_request): the caller's
+        working directory, NAME=value settings, an empty field, then the
+        arguments, each followed by a NUL byte.
+        e.g. b'/home\\x00IP_ATTRIBUTES_DB=a.ipdb\\x00\\x00192.168.1.1\\x00/24\\x00'
+        => ('/home', {'IP_ATTRIBUTES_DB': 'a.ipdb'}, ['192.168.1.1', '/24'])
+    """
+    fields = data.decode("utf-8").split("\0")[:-1]
+    separator = fields.index("", 1)
+    environment = dict(field.split("=", 1) for field in fields[1:separator])
+    return fields[0], environment, fields[separator + 1:]
+
+
+def run_main(args, environment=None, directory=None):
+    """
+        Runs ip_attributes.main exactly as the CLI would and returns its output.
+        With environment, the FORWARDED_VARIABLES are set to the caller's values
+        (unset if missing), and with directory the working directory is changed,
+        for this call only.
+    """
+    saved = {name: os.environ.get(name) for name in FORWARDED_VARIABLES}
+    saved_directory = os.getcwd()
+    if environment is not None:
+        for name in FORWARDED_VARIABLES:
+            if name in environment:
+                os.environ[name] = environment[name]
+            else:
+                os.environ.pop(name, None)
+    buffer = io.StringIO()
+    try:
+        if directory is not None:
+            os.chdir(directory)
+        with contextlib.redirect_stdout(buffer):
+            ip_attributes.main(len(args) + 1, ["ip_attributes.py", *args])
+    finally:
+        os.chdir(saved_directory)
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+    return buffer.getvalue()
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    """
+        One request per connection: read arguments until the client shuts
+        down its side, answer with the text main prints.
+    """
+    def handle(self):
+        directory, environment, args = decode_request(self.rfile.read())
+        self.wfile.write(run_main(args, environment, directory).encode("utf-8"))
+
+
+def serve(path):
+    """
+        Keeps the interpreter, the imported modules and the parsed
+        reserved ranges warm and answers requests until interrupted.
+        Requests are handled one at a time (main writes to stdout).
+    """
+    if os.path.dirname(path) == PRIVATE_DIRECTORY:
+        os.makedirs(PRIVATE_DIRECTORY, mode=0o700, exist_ok=True)
+        check_owner(PRIVATE_DIRECTORY, private=True)
+    if os.path.lexists(path):
+        os.unlink(path)
+    # Warm up: parse reserved_ip.json, compile the range index and the regexes
+    ip_attributes.load_special_range_index()
+    run_main(["192.168.1.1/24"])
+    run_main(["192.168.1.1", "255.255.255.0"])
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    # Create the socket with mode 0600 at once, rather than chmod it after bind
+    umask = os.umask(0o177)
+    try:
+        server = socketserver.UnixStreamServer(path, RequestHandler)
+    finally:
+        os.umask(umask)
+    with server:
+        print(f"Listening on {path}", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.unlink(path)
+
+
+if __name__ == '__main__':
+    try:
+        serve(sys.argv[1] if len(sys.argv) > 1 else default_socket_path())
+    except OSError as msg:
+        print(msg)
+        sys.exit(1)
@@ -0,0 +1,328 @@
+import re
+import sys
+import json
+
+from ip_attributes import Subnet, parse_arguments, ip_to_int
+
+
+MAX_HOPS = 32
+
+# "R12" -> router R1, interface 2; "A1" -> host A, interface 1
+INTERFACE_NAME = re.compile(r"^(.+)(\d)$")
+# "R1r2" -> router R1, route 2; "Ar1" -> host A, route 1
+ROUTE_NAME = re.compile(r"^(.+)r(\d+)$")
+
+
+def is_switch(device):
+    return re.fullmatch(r"S\d*", device) is not None
+
+
+def is_router(device):
+    """
+        Routers (R, R1, R2...) and the Internet (I) forward packets; hosts do not.
+    """
+    return device == "I" or re.fullmatch(r"R\d*", device) is not None
+
+
+class Interface:
+    """
+        One configured interface: its owner device and its Subnet.
+        subnet is None when ip/mask are missing or invalid; problem says why.
+    """
+    __slots__ = ("name", "device", "ip", "subnet", "problem")
+
+    def __init__(self, name, device, fields):
+        self.name = name
+        self.device = device
+        self.ip = None
+        self.subnet = None
+        self.problem = None
+        ip, mask = fields.get("ip"), fields.get("mask")
+        if not ip or not mask:
+            self.problem = "missing " + " and ".join(k for k, v in (("ip", ip), ("mask", mask)) if not v)
+            return
+        if not isinstance(ip, str) or not isinstance(mask, str):
+            invalid = [k for k, v in (("ip", ip), ("mask", mask)) if not isinstance(v, str)]
+            self.problem = "invalid " + " and ".join(invalid)
+            return
+        try:
+            ip, cidr = parse_arguments([ip, mask])
+        except ValueError as msg:
+            self.problem = str(msg)
+            return
+        subnet = Subnet(ip, cidr)
+        if cidr <= 30 and subnet.ip_int in (subnet.network_address, subnet.broadcast_address):
+            self.problem = "ip is the network or broadcast address"
+            return
+        self.ip = subnet.ip_int
+        self.subnet = subnet
+
+    def contains(self, address):
+        return self.subnet.network_address <= address <= self.subnet.broadcast_address
+
+
+class Route:
+    """
+        One route entry: destination Subnet (0.0.0.0/0 for "default") and gateway.
+    """
+    __slots__ = ("name", "device", "destination", "gate", "problem")
+
+    def __init__(self, name, device, fields):
+        self.name = name
+        self.device = device
+        self.destination = None
+        self.gate = None
+        self.problem = None
+        route, gate = fields.get("route"), fields.get("gate")
+        if not route or not gate:
+            self.problem = "missing " + " and ".join(k for k, v in (("route", route), ("gate", gate)) if not v)
+            return
+        try:
+            if route.strip() == "default":
+                self.destination = Subnet(0, 0)
+            else:
+                self.destination = Subnet(*parse_arguments([route]))
+            self.gate = ip_to_int(parse_arguments([gate, "/32"])[0])
+        except ValueError as msg:
+            self.destination = None
+            self.problem = str(msg)
+
+
+class Level:
+    """
+        Topology built from a NetPractice level config ({"routes": ..., "ifs": ...}).
+        Level files do not describe cables, so interfaces are grouped into
+        segments: from an optional "links" list of interface-name groups, or
+        else by mutual subnet membership of their ip addresses.
+        With previous (the Level of an earlier version of the config), the
+        Interface and Route objects of unchanged entries are reused instead of parsed again.
+    """
+    def __init__(self, config, previous=None):
+        self.config = config
+        old_ifs = previous.config.get("ifs", {}) if previous is not None else {}
+        old_routes = previous.config.get("routes", {}) if previous is not None else {}
+        self.interfaces = {}
+        self.devices = {}
+        for name, fields in config.get("ifs", {}).items():
+            match = INTERFACE_NAME.match(name)
+            device = match.group(1) if match else name
+            # Switches and placeholders like "Somewhere on the Net" have nothing to configure
+            if (is_switch(device) or not match) and not fields:
+                continue
+            interface = None
+            if previous is not None and old_ifs.get(name) == fields:
+                interface = previous.interfaces.get(name)
+            if interface is None:
+                interface = Interface(name, device, fields)
+            self.interfaces[name] = interface
+            self.devices.setdefault(device, []).append(interface)
+
+        self.routes = {}
+        self.route_by_name = {}
+        for name, fields in config.get("routes", {}).items():
+            match = ROUTE_NAME.match(name)
+            device = match.group(1) if match else name
+            route = None
+            if previous is not None and old_routes.get(name) == fields:
+                route = previous.route_by_name.get(name)
+            if route is None:
+                route = Route(name, device, fields)
+            self.route_by_name[name] = route
+            self.routes.setdefault(device, []).append(route)
+        for routes in self.routes.values():
+            # Longest prefix first, so the first match wins
+            routes.sort(key=lambda r: -1 if r.destination is None else r.destination.cidr, reverse=True)
+
+        self.segment_of = self._build_segments(config.get("links"))
+        # (segment, ip) -> interface, for finding the next hop on a segment
+        self.by_segment_ip = {}
+        for interface in self.interfaces.values():
+            if interface.subnet is not None:
+                self.by_segment_ip.setdefault((self.segment_of[interface.name], interface.ip), interface)
+
+    def _build_segments(self, links):
+        """
+            Returns interface name -> segment id (union-find over links).
+        """
+        parent = {name: name for name in self.interfaces}
+
+        def find(name):
+            while parent[name] != name:
+                parent[name] = parent[parent[name]]
+                name = parent[name]
+            return name
+
+        def union(a, b):
+            parent[find(a)] = find(b)
+
+        if links is not None:
+            for group in links:
+                names = [name for name in group if name in parent]
+                for other in names[1:]:
+                    union(names[0], other)
+        else:
+            configured = [i for i in self.interfaces.values() if i.subnet is not None]
+            for index, a in enumerate(configured):
+                for b in configured[index + 1:]:
+                    if a.contains(b.ip) and b.contains(a.ip):
+                        union(a.name, b.name)
+        return {name: find(name) for name in parent}
+
+    @classmethod
+    def load(cls, filename):
+        """
+            Raises OSError if the file cannot be read, ValueError if it is not
+            a JSON object.
+        """
+        with open(filename, "r") as file:
+            try:
+                config = json.load(file)
+            except ValueError as msg:
+                raise ValueError(f"Error: {filename}: invalid JSON ({msg}).")
+        if not isinstance(config, dict):
+            raise ValueError(f"Error: {filename}: not a JSON object.")
+        return cls(config)
+
+    def problems(self):
+        """
+            Configuration problems independent of any packet:
+            incomplete/invalid interfaces and routes, duplicate ips on a segment.
+        """
+        found = []
+        for interface in self.interfaces.values():
+            if interface.problem:
+                found.append(f"Interface {interface.name}: {interface.problem}")
+        seen = {}
+        for interface in self.interfaces.values():
+            if interface.subnet is None:
+                continue
+            key = (self.segment_of[interface.name], interface.ip)
+            if key in seen:
+                found.append(f"Interface {interface.name}: duplicate ip "
+                             f"{Subnet.int_to_dotted_decimal(interface.ip)} (also on {seen[key]})")
+            seen[key] = interface.name
+        for routes in self.routes.values():
+            for route in routes:
+                if route.problem:
+                    found.append(f"Route {route.name}: {route.problem}")
+        return found
+
+    def _next_hop(self, device, address):
+        """
+            Finds the interface of device facing address and the interface
+            on the same segment that owns address. Returns (out, target, failure).
+        """
+        for interface in self.devices.get(device, ()):
+            if interface.subnet is not None and interface.contains(address):
+                target = self.by_segment_ip.get((self.segment_of[interface.name], address))
+                if target is None:
+                    return interface, None, (f"{device}: no interface with ip "
+                                             f"{Subnet.int_to_dotted_decimal(address)} on the "
+                                             f"{interface.name} segment")
+                return interface, target, None
+        return None, None, None
+
+    def trace(self, source, destination, touched=None):
+        """
+            Follows a packet from device source to destination ip.
+            Returns {"source", "destination", "hops", "delivered", "failure"};
+            each hop is (device, out interface, next device).
+            touched, if given, is a set that receives everything the result
+            depends on: ("device", name) for each device whose interfaces or
+            routes were consulted and ("segment", id) for each segment searched.
+        """
+        destination_int = destination if isinstance(destination, int) else ip_to_int(destination)
+        result = {
+            "source": source,
+            "destination": Subnet.int_to_dotted_decimal(destination_int),
+            "hops": [],
+            "delivered": False,
+            "failure": None,
+        }
+        device = source
+        visited = set()
+        for _ in range(MAX_HOPS):
+            if touched is not None:
+                touched.add(("device", device))
+            if any(i.ip == destination_int for i in self.devices.get(device, ())):
+                result["delivered"] = True
+                return result
+            if device != source and not is_router(device):
+                result["failure"] = f"{device}: host does not forward packets"
+                return result
+            if device in visited:
+                result["failure"] = f"{device}: routing loop"
+                return result
+            visited.add(device)
+
+            out, target, failure = self._next_hop(device, destination_int)
+            if out is not None and touched is not None:
+                touched.add(("segment", self.segment_of[out.name]))
+            if out is None:
+                route = next((r for r in self.routes.get(device, ())
+                              if r.destination is not None
+                              and r.destination.network_address <= destination_int
+                              <= r.destination.broadcast_address), None)
+                if route is None:
+                    result["failure"] = f"{device}: no route to {result['destination']}"
+                    return result
+                out, target, failure = self._next_hop(device, route.gate)
+                if out is not None and touched is not None:
+                    touched.add(("segment", self.segment_of[out.name]))
+                if out is None:
+                    result["failure"] = (f"{device}: gateway {Subnet.int_to_dotted_decimal(route.gate)} "
+                                         f"of {route.name} is not on any of its networks")
+                    return result
+            if failure:
+                result["failure"] = failure
+                return result
+            result["hops"].append((device, out.name, target.device))
+            device = target.device
+        result["failure"] = f"more than {MAX_HOPS} hops"
+        return result
+
+    def endpoints(self):
+        """
+            Devices that send and receive traffic: hosts with at least one ip.
+        """
+        return [device for device, interfaces in self.devices.items()
+                if not is_router(device) and any(i.subnet is not None for i in interfaces)]
+
+    def pairs(self):
+        """
+            (source device, destination ip) of every trace check() runs, in order.
+        """
+        endpoints = self.endpoints()
+        return [(source, interface.ip) for source in endpoints for destination in endpoints
+                if destination != source
+                for interface in self.devices[destination] if interface.subnet is not None]
+
+    def check(self):
+        """
+            Traces a packet between every ordered pair of endpoints
+            (to each of the destination's ips). Returns a list of traces.
+        """
+        return [self.trace(source, destination) for source, destination in self.pairs()]
+
+
+def format_trace(trace):
+    path = " -> ".join(f"{device}({interface})" for device, interface, _ in trace["hops"])
+    status = "OK" if trace["delivered"] else f"FAIL {trace['failure']}"
+    return f"{trace['source']} -> {trace['destination']}: {status}" + (f"  [{path}]" if path else "")
+
+
+def print_report(filename):
+    level = Level.load(filename)
+    print(f"\n----- {filename} -----\n")
+    for problem in level.problems():
+        print(f"Config : {problem}")
+    for trace in level.check():
+        print(format_trace(trace))
+    print()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Error: Usage: <program> <level.json> [...]")
+    for name in sys.argv[1:]:
+        print_report(name)
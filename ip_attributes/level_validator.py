@@ -0,0 +1,241 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from address_parser import CIDR_VALUES, MASK_TO_PREFIX, parse_ipv4, parse_address
+from ip_attributes import Subnet
+from level_simulator import INTERFACE_NAME, is_switch
+
+
+# Bump when validation rules change, so cached results are not reused
+CACHE_VERSION = 1
+DEFAULT_CACHE = ".level_validator_cache.json"
+# Most results kept in the cache file; the least recently validated go first
+CACHE_LIMIT = 50000
+# A level file validates in ~0.1 ms, so a process pool only pays off for
+# thousands of changed files (unless --workers asks for it)
+PARALLEL_THRESHOLD = 2000
+
+
+def normalize_mask(mask):
+    """
+        Masks appear as '/30', '30' or '255.255.255.252'; all become 30.
+        Returns None for anything else (including non-contiguous masks).
+    """
+    text = mask.strip()
+    prefix = CIDR_VALUES.get(text)
+    if prefix is None:
+        prefix = MASK_TO_PREFIX.get(parse_ipv4(text))
+    return prefix
+
+
+def _field(fields, key, label, problems):
+    """
+        Returns the stripped value of fields[key], or None after recording
+        whether it is missing, not a string or empty.
+    """
+    if key not in fields:
+        problems.append(f"{label}: missing {key}")
+        return None
+    value = fields[key]
+    if not isinstance(value, str):
+        problems.append(f"{label}: invalid {key} {json.dumps(value)}")
+        return None
+    if not value.strip():
+        problems.append(f"{label}: empty {key}")
+        return None
+    return value.strip()
+
+
+def validate_config(config):
+    """
+        Checks one level config ({"routes": ..., "ifs": ...}).
+        Returns {"interfaces", "routes", "masks", "problems"}: masks maps each
+        interface to its normalized '/prefix', problems lists missing or empty
+        fields and invalid or inconsistent values.
+    """
+    problems = []
+    masks = {}
+    if not isinstance(config, dict):
+        return {"interfaces": 0, "routes": 0, "masks": masks, "problems": ["not a JSON object"]}
+    interfaces = config.get("ifs", {})
+    routes = config.get("routes", {})
+    if not isinstance(interfaces, dict):
+        problems.append("ifs: not a JSON object")
+        interfaces = {}
+    if not isinstance(routes, dict):
+        problems.append("routes: not a JSON object")
+        routes = {}
+    for name, fields in interfaces.items():
+        match = INTERFACE_NAME.match(name)
+        # Same rule as Level: switches and placeholders have nothing to configure
+        if (not match or is_switch(match.group(1))) and not fields:
+            continue
+        label = f"Interface {name}"
+        if not isinstance(fields, dict):
+            problems.append(f"{label}: not a JSON object")
+            continue
+        ip = _field(fields, "ip", label, problems)
+        mask = _field(fields, "mask", label, problems)
+        prefix = address = None
+        if mask is not None:
+            prefix = normalize_mask(mask)
+            if prefix is None:
+                problems.append(f"{label}: invalid mask '{mask}'")
+            else:
+                masks[name] = f"/{prefix}"
+        if ip is not None:
+            address = parse_ipv4(ip)
+            if address is None:
+                problems.append(f"{label}: invalid ip '{ip}'")
+        if address is not None and prefix is not None and prefix <= 30:
+            subnet = Subnet(address, prefix)
+            if address == subnet.network_address:
+                problems.append(f"{label}: {ip}/{prefix} is the network address")
+            elif address == subnet.broadcast_address:
+                problems.append(f"{label}: {ip}/{prefix} is the broadcast address")
+    for name, fields in routes.items():
+        label = f"Route {name}"
+        if not isinstance(fields, dict):
+            problems.append(f"{label}: not a JSON object")
+            continue
+        route = _field(fields, "route", label, problems)
+        gate = _field(fields, "gate", label, problems)
+        if route is not None and route != "default":
+            try:
+                subnet = Subnet(*parse_address([route]))
+            except ValueError:
+                problems.append(f"{label}: invalid route '{route}'")
+            else:
+                if subnet.ip_int != subnet.network_address:
+                    problems.append(f"{label}: {route} is not a network address "
+                                    f"({Subnet.int_to_dotted_decimal(subnet.network_address)}/{subnet.cidr})")
+        if gate is not None and parse_ipv4(gate) is None:
+            problems.append(f"{label}: invalid gate '{gate}'")
+    return {"interfaces": len(interfaces), "routes": len(routes), "masks": masks, "problems": problems}
+
+
+def validate_content(content):
+    """
+        Worker task: validates the raw bytes of one level file.
+    """
+    try:
+        config = json.loads(content)
+    except ValueError as msg:
+        return {"interfaces": 0, "routes": 0, "masks": {}, "problems": [f"invalid JSON: {msg}"]}
+    return validate_config(config)
+
+
+def load_cache(path):
+    """
+        Returns {sha256: result} from a previous run, or {} if there is none
+        or it was written by another version of the rules.
+    """
+    try:
+        with open(path, "r") as file:
+            cache = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(cache, dict) or cache.get("version") != CACHE_VERSION:
+        return {}
+    return cache.get("results", {})
+
+
+def save_cache(path, results):
+    """
+        Adds the results of this run to the cache, replacing the file atomically.
+        Entries of files that were not seen this time are kept, up to CACHE_LIMIT
+        entries in all: the file lists them least recently seen first and the
+        oldest are dropped.
+    """
+    older = [(digest, result) for digest, result in load_cache(path).items() if digest not in results]
+    kept = max(0, CACHE_LIMIT - len(results))
+    results = {**dict(older[max(0, len(older) - kept):]), **results}
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w") as file:
+        json.dump({"version": CACHE_VERSION, "results": results}, file)
+    os.replace(temporary, path)
+
+
+def validate_files(filenames, workers=None, cache_path=DEFAULT_CACHE):
+    """
+        Validates level files, in parallel when there are many, skipping files
+        whose content hash is already in the cache. Files with identical content
+        are validated once.
+        Returns a list of (filename, result, cached) in input order.
+    """
+    cache = load_cache(cache_path) if cache_path else {}
+    hashes = []
+    todo = {}
+    for filename in filenames:
+        with open(filename, "rb") as file:
+            content = file.read()
+        digest = hashlib.sha256(content).hexdigest()
+        hashes.append(digest)
+        if digest not in cache:
+            todo[digest] = content
+    if workers is None:
+        workers = (os.cpu_count() or 1) if len(todo) >= PARALLEL_THRESHOLD else 1
+    if len(todo) > 1 and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunk_size = max(1, len(todo) // (4 * workers))
+            fresh = dict(zip(todo, pool.map(validate_content, todo.values(), chunksize=chunk_size)))
+    else:
+        fresh = {digest: validate_content(content) for digest, content in todo.items()}
+    results = [(filename, cache.get(digest) or fresh[digest], digest not in fresh)
+               for filename, digest in zip(filenames, hashes)]
+    if cache_path:
+        save_cache(cache_path, {digest: result for (_, result, _), digest in zip(results, hashes)})
+    return results
+
+
+def expand_paths(paths):
+    """
+        Directories stand for the *.json files in them.
+    """
+    filenames = []
+    for path in paths:
+        if os.path.isdir(path):
+            filenames.extend(sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith(".json")))
+        else:
+            filenames.append(path)
+    return filenames
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Validates level config files in parallel.")
+    parser.add_argument("paths", nargs="+", help="level .json files or directories containing them")
+    parser.add_argument("--workers", type=int, default=None,
+                        help=f"worker processes (default: CPU count from {PARALLEL_THRESHOLD} changed files on)")
+    parser.add_argument("--cache", default=DEFAULT_CACHE,
+                        help=f"results cache keyed by file content hash (default: {DEFAULT_CACHE})")
+    parser.add_argument("--no-cache", action="store_true", help="validate every file and keep no cache")
+    parser.add_argument("--json", action="store_true", help="one JSON object per file instead of text")
+    args = parser.parse_args(argv[1:])
+
+    start = time.perf_counter()
+    try:
+        results = validate_files(expand_paths(args.paths), args.workers, None if args.no_cache else args.cache)
+    except OSError as msg:
+        print(f"Error: {msg}")
+        return
+    elapsed = time.perf_counter() - start
+    for filename, result, cached in results:
+        if args.json:
+            print(json.dumps({"file": filename, **result, "cached": cached}))
+        else:
+            for problem in result["problems"]:
+                print(f"{filename}: {problem}")
+    cached = sum(1 for _, _, from_cache in results if from_cache)
+    with_problems = sum(1 for _, result, _ in results if result["problems"])
+    print(f"\nFiles: {len(results)} ({cached} cached, {len(results) - cached} validated)  "
+          f"With problems: {with_problems}  Time: {elapsed:.2f} s  "
+          f"Throughput: {len(results) / elapsed if elapsed else 0:.0f} files/s", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,220 @@
+import os
+import sys
+import copy
+import json
+import time
+import argparse
+
+from level_simulator import Level, format_trace
+
+
+def segment_members(level):
+    """
+        Segment id => names of its interfaces in config order. Ids are
+        arbitrary member names, so segments are compared by their members.
+    """
+    members = {}
+    for name in level.interfaces:
+        members.setdefault(level.segment_of[name], []).append(name)
+    return {segment: tuple(names) for segment, names in members.items()}
+
+
+def diff_entries(old, new):
+    """
+        Names of the entries of two "ifs" or "routes" maps that were added,
+        removed or edited.
+    """
+    return sorted(name for name in old.keys() | new.keys() if old.get(name) != new.get(name))
+
+
+class IncrementalLevel:
+    """
+        A Level kept up to date as its config is edited. Each update diffs the
+        "ifs" and "routes" maps against the previous snapshot: only edited
+        entries are parsed again, and only the traces that depend on an edited
+        device or on a segment whose members changed are traced again.
+        The results are always those of a full Level(config).check().
+    """
+    def __init__(self, config=None):
+        self.level = None
+        # (source, destination ip) -> (trace, dependencies)
+        self.traces = {}
+        # dependency -> pairs whose trace depends on it
+        self.dependents = {}
+        if config is not None:
+            self.update(config)
+
+    def _dirty_devices(self, old, new):
+        """
+            Devices whose interfaces or routes are not the same objects as before.
+        """
+        dirty = set()
+        for attribute in ("devices", "routes"):
+            before, after = getattr(old, attribute), getattr(new, attribute)
+            for device in before.keys() | after.keys():
+                old_items, new_items = before.get(device, []), after.get(device, [])
+                if len(old_items) != len(new_items) or any(a is not b for a, b in zip(old_items, new_items)):
+                    dirty.add(device)
+        return dirty
+
+    @staticmethod
+    def _dependencies(members, touched):
+        """
+            Level.trace's touched set, with segments identified by their members.
+        """
+        return frozenset(("segment", members[key]) if kind == "segment" else (kind, key) for kind, key in touched)
+
+    def update(self, config):
+        """
+            Applies a new version of the config. Returns a summary:
+            {"ifs", "routes"} (edited entry names), "traced" and "reused"
+            (trace counts), and "changed": (pair, old trace or None, new trace or None)
+            for every verdict that appeared, changed or disappeared.
+            config is copied, so the caller may go on editing it in place.
+        """
+        config = copy.deepcopy(config)
+        old = self.level
+        old_config = old.config if old is not None else {}
+        changed_ifs = diff_entries(old_config.get("ifs", {}), config.get("ifs", {}))
+        changed_routes = diff_entries(old_config.get("routes", {}), config.get("routes", {}))
+        if old is not None and old_config.get("links") != config.get("links"):
+            # Explicit links regroup every segment; start over
+            old = None
+        new = Level(config, old)
+        members = segment_members(new)
+        if old is None:
+            stale = set(self.traces)
+        else:
+            # A segment is clean if it has the same members as before, all of them unchanged
+            clean_segments = {names for names in members.values()
+                              if all(old.interfaces.get(name) is new.interfaces[name] for name in names)}
+            dirty = [("device", device) for device in self._dirty_devices(old, new)]
+            dirty += [key for key in self.dependents if key[0] == "segment" and key[1] not in clean_segments]
+            stale = set().union(*(self.dependents.get(key, ()) for key in dirty))
+
+        previous = self.traces
+        self.traces = {}
+        fresh = []
+        for pair in new.pairs():
+            if pair in self.traces:
+                # Two interfaces with the same ip: one trace serves both
+                continue
+            if pair in previous and pair not in stale:
+                self.traces[pair] = previous[pair]
+                continue
+            touched = set()
+            trace = new.trace(*pair, touched=touched)
+            self.traces[pair] = (trace, self._dependencies(members, touched))
+            fresh.append(pair)
+        gone = [pair for pair in previous if pair not in self.traces]
+
+        changed = []
+        for pair in fresh + gone:
+            before = previous[pair] if pair in previous else None
+            after = self.traces.get(pair)
+            if before is not None:
+                for key in before[1]:
+                    self.dependents[key].discard(pair)
+                    if not self.dependents[key]:
+                        del self.dependents[key]
+            if after is not None:
+                for key in after[1]:
+                    self.dependents.setdefault(key, set()).add(pair)
+            if before is None or after is None or before[0] != after[0]:
+                changed.append((pair, before and before[0], after and after[0]))
+        self.level = new
+        return {"ifs": changed_ifs, "routes": changed_routes, "traced": len(fresh),
+                "reused": len(self.traces) - len(fresh), "changed": changed}
+
+    def problems(self):
+        return self.level.problems()
+
+    def check(self):
+        """
+            Same list as Level(config).check() for the current config.
+        """
+        return [self.traces[pair][0] for pair in self.level.pairs()]
+
+
+class LevelWatcher:
+    """
+        Polls one level file and feeds every saved version to an IncrementalLevel.
+        Files are re-read only when their modification time or size changes;
+        a half-written (invalid JSON) file is reported and the last good version kept.
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self.version = None
+        self.level = IncrementalLevel()
+        self.problems = []
+
+    def poll(self):
+        """
+            Returns (summary, elapsed seconds) after a change, (None, 0) otherwise.
+            Raises ValueError for a file that cannot be read as a level config.
+        """
+        stat = os.stat(self.filename)
+        version = (stat.st_mtime_ns, stat.st_size)
+        if version == self.version:
+            return None, 0
+        self.version = version
+        with open(self.filename, "r") as file:
+            content = file.read()
+        start = time.perf_counter()
+        try:
+            config = json.loads(content)
+        except ValueError as msg:
+            raise ValueError(f"Error: {self.filename}: invalid JSON ({msg}), keeping the last version.")
+        if not isinstance(config, dict) or not all(isinstance(config.get(key, {}), dict) for key in ("ifs", "routes")):
+            raise ValueError(f"Error: {self.filename}: not a level config, keeping the last version.")
+        summary = self.level.update(config)
+        problems = self.level.problems()
+        summary["new_problems"] = [problem for problem in problems if problem not in self.problems]
+        summary["fixed_problems"] = [problem for problem in self.problems if problem not in problems]
+        self.problems = problems
+        return summary, time.perf_counter() - start
+
+
+def print_summary(filename, summary, elapsed):
+    print(f"\n----- {filename}: {len(summary['ifs'])} ifs, {len(summary['routes'])} routes changed; "
+          f"traced {summary['traced']}, reused {summary['reused']} ({elapsed * 1e3:.2f} ms) -----")
+    for problem in summary["new_problems"]:
+        print(f"Config : {problem}")
+    for problem in summary["fixed_problems"]:
+        print(f"Fixed  : {problem}")
+    for _, before, after in summary["changed"]:
+        if after is None:
+            print(f"Gone   : {format_trace(before)}")
+        else:
+            print(f"{'New' if before is None else 'Now':<7}: {format_trace(after)}")
+    sys.stdout.flush()
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        description="Watches level config files and prints the verdicts that change after each save.")
+    parser.add_argument("files", nargs="+", help="level .json files, e.g. config_files/level7.json")
+    parser.add_argument("--interval", type=float, default=0.2, help="seconds between polls (default: 0.2)")
+    parser.add_argument("--once", action="store_true", help="check the files once and exit")
+    args = parser.parse_args(argv[1:])
+
+    watchers = [LevelWatcher(filename) for filename in args.files]
+    try:
+        while True:
+            for watcher in watchers:
+                try:
+                    summary, elapsed = watcher.poll()
+                except (OSError, ValueError) as msg:
+                    print(msg)
+                    continue
+                if summary is not None:
+                    print_summary(watcher.filename, summary, elapsed)
+            if args.once:
+                return
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        print()
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,236 @@
+import io
+import csv
+import json
+import sys
+import struct
+import textwrap
+
+from address_parser import PREFIX_TO_MASK, PREFIX_TO_WILDCARD, parse_ipv4
+
+
+FORMATS = ("text", "json", "csv", "binary")
+BLOCK_SIZE = 1 << 20
+
+# Columns of the CSV format; "fyi" holds the categories separated by "; "
+CSV_FIELDS = ("line", "input", "ip", "network_address", "broadcast_address", "subnet_mask", "cidr", "usable_hosts",
+              "first_usable_ip", "last_usable_ip", "group_size", "next_network", "previous_network", "fyi", "error")
+
+# Binary format: an 8-byte file header, then one fixed-width little-endian record per result:
+#   line, ip, network, broadcast, mask, first usable, last usable, usable hosts, next, previous (uint32),
+#   group size (uint64), cidr (uint8), flags (uint8), FYI category bits (uint16)
+BINARY_MAGIC = b"IPATTR1\0"
+BINARY_RECORD = struct.Struct("<10IQBBH")
+HAS_NEXT, HAS_PREVIOUS, ERROR = 1, 2, 4
+# Bit i is FYI_CATEGORIES[i]. Fixed here rather than taken from CATEGORY_PRIORITY, so that
+# reordering priorities does not change the file format. Any other category (e.g. from a
+# prefix database) sets FYI_OTHER
+FYI_CATEGORIES = ("Loopback IP address", "Link-local IP address", "Special CIDR", "Private IP address",
+                  "Reserved IP address", "Multicast IP address", "Public DNS (Google) IP address",
+                  "Public DNS (Cloudflare) IP address", "Public DNS (Quad9) IP address")
+FYI_BITS = {category: 1 << bit for bit, category in enumerate(FYI_CATEGORIES)}
+FYI_OTHER = 1 << 15
+
+
+class BlockWriter:
+    """
+        Collects encoded records and writes them to output in blocks of about
+        block_size characters (or bytes), instead of one write per field.
+    """
+    def __init__(self, output, block_size=BLOCK_SIZE):
+        self.output = output
+        self.block_size = block_size
+        self.parts = []
+        self.size = 0
+
+    def write(self, data):
+        self.parts.append(data)
+        self.size += len(data)
+        if self.size >= self.block_size:
+            self.flush()
+
+    def flush(self):
+        if self.parts:
+            self.output.write(self.parts[0][:0].join(self.parts))
+            self.parts = []
+            self.size = 0
+        self.output.flush()
+
+
+def render_text(record, fyi_list):
+    """
+        The human-readable report of Subnet.print_info as one string.
+        record: Subnet.to_dict(); fyi_list: get_fyi_info matches (category and usage).
+    """
+    next_network = record["next_network"] or "No next network"
+    previous_network = record["previous_network"] or "No previous network"
+    lines = [
+        "",
+        "----- IP Attributes -----",
+        "",
+        f"Network address: {record['network_address']}",
+        f"Broadcast address: {record['broadcast_address']}",
+        f"Subnet mask: {record['subnet_mask']}",
+        f"CIDR: /{record['cidr']}",
+        f"Number of usable hosts: {record['usable_hosts']}",
+        f"First usable IP: {record['first_usable_ip']}",
+        f"Last usable IP: {record['last_usable_ip']}",
+        f"Subnet group size: {record['group_size']}",
+        f"Next network address: {next_network}",
+        f"Previous network address: {previous_network}",
+    ]
+    if fyi_list:
+        lines += ["", "---------- FYI ----------"]
+        for fyi in fyi_list:
+            lines.append(f"Category: {fyi['category']}")
+            lines.append(textwrap.fill(fyi['usage'], width=70, initial_indent="Usage  : ",
+                                       subsequent_indent="         "))
+            lines.append("")
+    else:
+        lines += ["", "-------------------------", ""]
+    return "\n".join(lines) + "\n"
+
+
+def encode_json(record):
+    return json.dumps(record) + "\n"
+
+
+def encode_binary(record):
+    """
+        One fixed-width record; the addresses are recomputed from ip and cidr
+        (same rules as Subnet) rather than parsed back from their dotted strings.
+    """
+    if "error" in record:
+        return BINARY_RECORD.pack(record.get("line", 0), *([0] * 9), 0, 0, ERROR, 0)
+    cidr = record["cidr"]
+    ip = parse_ipv4(record["ip"])
+    network = ip & PREFIX_TO_MASK[cidr]
+    broadcast = network | PREFIX_TO_WILDCARD[cidr]
+    if cidr >= 31:
+        first, last = network, broadcast
+    else:
+        first, last = network + 1, broadcast - 1
+    size = record["group_size"]
+    flags = (HAS_NEXT if record["next_network"] is not None else 0) | \
+            (HAS_PREVIOUS if record["previous_network"] is not None else 0)
+    fyi = 0
+    for category in record.get("fyi", ()):
+        fyi |= FYI_BITS.get(category, FYI_OTHER)
+    return BINARY_RECORD.pack(record.get("line", 0), ip, network, broadcast, PREFIX_TO_MASK[cidr], first, last,
+                              record["usable_hosts"], (network + size) & 0xFFFFFFFF, (network - size) & 0xFFFFFFFF,
+                              size, cidr, flags, fyi)
+
+
+def decode_binary(data):
+    """
+        Yields the records of a binary result file (bytes) as dicts of integers.
+        "fyi" lists the categories in FYI_CATEGORIES order, not in display order.
+        Error records only have "line" and "error".
+    """
+    if data[:len(BINARY_MAGIC)] != BINARY_MAGIC:
+        raise ValueError("Error: Not a binary ip_attributes result file.")
+    for values in BINARY_RECORD.iter_unpack(memoryview(data)[len(BINARY_MAGIC):]):
+        line, ip, network, broadcast, mask, first, last, usable, next_network, previous, size, cidr, flags, fyi = values
+        if flags & ERROR:
+            yield {"line": line, "error": True}
+            continue
+        yield {"line": line, "ip": ip, "network_address": network, "broadcast_address": broadcast,
+               "subnet_mask": mask, "cidr": cidr, "usable_hosts": usable, "first_usable_ip": first,
+               "last_usable_ip": last, "group_size": size,
+               "next_network": next_network if flags & HAS_NEXT else None,
+               "previous_network": previous if flags & HAS_PREVIOUS else None,
+               "fyi": [category for bit, category in enumerate(FYI_CATEGORIES) if fyi >> bit & 1] +
+                      (["other"] if fyi & FYI_OTHER else [])}
+
+
+class CsvEncoder:
+    """
+        Encodes one record at a time as a CSV row, reusing one StringIO.
+    """
+    def __init__(self):
+        self.buffer = io.StringIO()
+        self.csv = csv.DictWriter(self.buffer, CSV_FIELDS, extrasaction="ignore", lineterminator="\n")
+
+    def take(self):
+        text = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return text
+
+    def header(self):
+        self.csv.writeheader()
+        return self.take()
+
+    def __call__(self, record):
+        if "fyi" in record:
+            record = {**record, "fyi": "; ".join(record["fyi"])}
+        self.csv.writerow(record)
+        return self.take()
+
+
+def encoder(output_format):
+    """
+        Returns (header, encode) for a record format: the file header (empty for
+        JSON Lines) and a function turning one record into str, or bytes for binary.
+    """
+    if output_format == "json":
+        return "", encode_json
+    if output_format == "csv":
+        encode = CsvEncoder()
+        return encode.header(), encode
+    if output_format == "binary":
+        return BINARY_MAGIC, encode_binary
+    raise ValueError(f"Error: Unknown format '{output_format}'. Use json, csv or binary.")
+
+
+def encode_block(records, output_format):
+    """
+        A block of records in output_format without the header, e.g. one chunk of
+        a parallel run, for RecordWriter.write_block.
+    """
+    encode = encoder(output_format)[1]
+    parts = [encode(record) for record in records]
+    return (b"" if output_format == "binary" else "").join(parts)
+
+
+class RecordWriter:
+    """
+        Writes result records (Subnet.to_dict() output, optionally with "line",
+        "input" or "error" as in streaming mode) as JSON Lines, CSV or binary
+        through a BlockWriter. output is a text stream, or a binary one for "binary".
+        On a terminal every record is written at once, as it was before.
+    """
+    def __init__(self, output, output_format="json", block_size=BLOCK_SIZE):
+        file_header, self.encode = encoder(output_format)
+        if getattr(output, "isatty", lambda: False)():
+            block_size = 0
+        self.format = output_format
+        self.writer = BlockWriter(output, block_size)
+        if file_header:
+            self.writer.write(file_header)
+
+    def write(self, record):
+        self.writer.write(self.encode(record))
+
+    def write_block(self, block):
+        """
+            Adds a block made by encode_block.
+        """
+        self.writer.write(block)
+
+    def write_all(self, records):
+        write, encode = self.writer.write, self.encode
+        for record in records:
+            write(encode(record))
+        self.writer.flush()
+
+    def close(self):
+        self.writer.flush()
+
+
+def open_output(output_format, output=None):
+    """
+        RecordWriter on stdout (its binary buffer for the binary format).
+    """
+    if output is None:
+        output = sys.stdout.buffer if output_format == "binary" else sys.stdout
+    return RecordWriter(output, output_format)
@@ -0,0 +1,136 @@
+import sys
+import heapq
+import argparse
+
+from ip_attributes import Subnet, read_lines, checked_lines, parse_line
+from level_simulator import Level
+
+
+def find_conflicts(entries):
+    """
+        Sweep-line over (start, end, label) intervals, O(n log n + conflicts).
+        Entries are sorted by start (outer blocks first); a heap keyed by end
+        holds the intervals still open at the current start, and every one of
+        them overlaps the new interval. Yields (kind, first, second):
+        - "duplicate": same start and end; first is the earliest entry
+        - "contains":  first contains second
+        - "overlap":   partial overlap (never happens between CIDR blocks)
+        Duplicates are compared to the others only once, through their first entry.
+    """
+    entries = sorted(entries, key=lambda entry: (entry[0], -entry[1]))
+    active = []
+    previous = None
+    for order, entry in enumerate(entries):
+        start, end = entry[0], entry[1]
+        if previous is not None and start == previous[0] and end == previous[1]:
+            yield "duplicate", previous, entry
+            continue
+        previous = entry
+        while active and active[0][0] < start:
+            heapq.heappop(active)
+        for other_end, _, other in active:
+            yield ("contains" if other_end >= end else "overlap"), other, entry
+        heapq.heappush(active, (end, order, entry))
+
+
+def subnet_entries(lines, errors):
+    """
+        Turns (line_number, text) pairs into (network, broadcast, (line_number, text))
+        entries, validated like the CLI. Bad lines are appended to errors.
+    """
+    for line_number, text in lines:
+        try:
+            subnet = Subnet(*parse_line(text))
+        except ValueError as msg:
+            errors.append((line_number, text, str(msg)))
+            continue
+        yield subnet.network_address, subnet.broadcast_address, (line_number, text)
+
+
+def level_conflicts(level):
+    """
+        Interfaces of one Level whose networks clash. Interfaces on the same
+        link share a network on purpose, so an identical network is only
+        reported for two interfaces of one device or on different segments;
+        any other overlap means the masks disagree. Segments come from
+        Level.segment_of: without "links" they are derived from the networks
+        themselves, so only a config with "links" can put one network on two
+        segments. Returns a list of messages.
+    """
+    configured = [i for i in level.interfaces.values() if i.subnet is not None]
+    groups = {}
+    pairs = []
+    for kind, first, second in find_conflicts((i.subnet.network_address, i.subnet.broadcast_address, i)
+                                              for i in configured):
+        if kind == "duplicate":
+            groups.setdefault(first[2].name, [first[2]]).append(second[2])
+        else:
+            pairs.append((first[2], second[2]))
+
+    def describe(interface):
+        return f"{interface.name} ({Subnet.int_to_dotted_decimal(interface.subnet.network_address)}" \
+               f"/{interface.subnet.cidr})"
+
+    found = []
+    for members in groups.values():
+        for index, a in enumerate(members):
+            for b in members[index + 1:]:
+                if a.device == b.device:
+                    found.append(f"{describe(a)} and {describe(b)}: same network on device {a.device}")
+                elif level.segment_of[a.name] != level.segment_of[b.name]:
+                    found.append(f"{describe(a)} and {describe(b)}: same network on different segments")
+    for outer, inner in pairs:
+        for a in groups.get(outer.name, [outer]):
+            for b in groups.get(inner.name, [inner]):
+                found.append(f"{describe(a)} contains {describe(b)}: masks disagree")
+    return found
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        description="Finds duplicate and overlapping prefixes in an 'ip/cidr' or 'ip mask' list, "
+                    "or clashing interface networks in level files.")
+    parser.add_argument("input", nargs="?", default="-", help="input file (default: stdin)")
+    parser.add_argument("--levels", nargs="+", metavar="LEVEL",
+                        help="check the interfaces of these config_files/levelN.json files instead")
+    args = parser.parse_args(argv[1:])
+
+    if args.levels:
+        for filename in args.levels:
+            try:
+                level = Level.load(filename)
+            except OSError as msg:
+                print(f"Error: Cannot read '{filename}': {msg.strerror or msg}.")
+                continue
+            except ValueError as msg:
+                print(msg)
+                continue
+            for message in level_conflicts(level):
+                print(f"{filename}: {message}")
+        return
+
+    name = "stdin" if args.input == "-" else args.input
+    try:
+        source = sys.stdin if args.input == "-" else open(args.input, "r")
+    except OSError as msg:
+        print(f"Error: Cannot read '{name}': {msg.strerror or msg}.")
+        return
+    errors = []
+    counts = {"duplicate": 0, "contains": 0, "overlap": 0}
+    try:
+        for kind, first, second in find_conflicts(subnet_entries(read_lines(checked_lines(source, name)), errors)):
+            counts[kind] += 1
+            print(f"{kind:<9} line {first[2][0]}: {first[2][1]}  |  line {second[2][0]}: {second[2][1]}")
+    except ValueError as msg:
+        print(msg)
+        return
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    for line_number, text, msg in errors:
+        print(f"Line {line_number}: {msg} ({text})", file=sys.stderr)
+    print(", ".join(f"{kind}: {count}" for kind, count in counts.items()), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,247 @@
+import os
+import sys
+import csv
+import json
+import mmap
+import heapq
+import bisect
+import argparse
+import itertools
+from array import array
+
+from address_parser import PREFIX_TO_WILDCARD, parse_ipv4, parse_address
+
+
+MAGIC = 0x42445049  # b"IPDB" when written little-endian
+VERSION = 1
+HEADER_WORDS = 4  # magic, version, segment count, record count
+
+# Keys that hold the address range of an entry; everything else is the record
+RANGE_KEYS = ("range", "prefix", "start", "end")
+
+
+def parse_bounds(entry):
+    """
+        Returns (start, end) of one table entry, or None for entries without
+        an address range: the CIDR-only "range": "any" entries of reserved_ip.json
+        and reversed ranges, which get_fyi_info never matches either.
+        Accepts "range": "a - b" or a single IP, "prefix": "ip/cidr",
+        or separate "start" and "end" fields.
+        e.g. {"prefix": "10.0.0.0/8"} => (167772160, 184549375)
+    """
+    if entry.get("prefix"):
+        ip, cidr = parse_address([entry["prefix"]])
+        network = ip & ~PREFIX_TO_WILDCARD[cidr]
+        return network, network | PREFIX_TO_WILDCARD[cidr]
+    if entry.get("start") and entry.get("end"):
+        bounds = (entry["start"], entry["end"])
+    elif entry.get("range"):
+        if entry["range"].strip() == "any":
+            return None
+        bounds = entry["range"].split("-") if "-" in entry["range"] else (entry["range"], entry["range"])
+    else:
+        raise ValueError("Error: Entry has no range, prefix or start/end.")
+    if len(bounds) != 2:
+        raise ValueError(f"Error: Invalid range '{entry['range']}'.")
+    start, end = parse_ipv4(bounds[0].strip()), parse_ipv4(bounds[1].strip())
+    if start is None or end is None:
+        raise ValueError(f"Error: Invalid range '{' - '.join(bounds)}'.")
+    return (start, end) if start <= end else None
+
+
+def read_ranges(filename):
+    """
+        Yields (start, end, record) from a JSON list of objects or a CSV file
+        with a header row. The record is the entry without its range fields.
+    """
+    with open(filename, "r", newline="") as file:
+        entries = csv.DictReader(file) if filename.endswith(".csv") else json.load(file)
+        for number, entry in enumerate(entries, start=1):
+            try:
+                bounds = parse_bounds(entry)
+            except ValueError as msg:
+                raise ValueError(f"{msg} ({filename}, entry {number})")
+            if bounds is not None:
+                yield bounds[0], bounds[1], {key: value for key, value in entry.items() if key not in RANGE_KEYS}
+
+
+def disjoint_segments(ranges):
+    """
+        Resolves overlapping ranges into disjoint segments; where ranges
+        overlap, the narrowest one wins (ties: the one that comes first).
+        ranges: sorted (start, end, record index). Yields (start, end, record index),
+        merging neighbours that carry the same record.
+    """
+    active = []
+    cursor = 0
+    current = None
+    for order, (start, end, record) in enumerate(itertools.chain(ranges, [(1 << 32, 1 << 32, None)])):
+        while active and cursor < start:
+            _, _, stop, top = active[0]
+            if stop < cursor:
+                heapq.heappop(active)
+                continue
+            stop = min(stop, start - 1)
+            if current is not None and current[1] + 1 == cursor and current[2] == top:
+                current[1] = stop
+            else:
+                if current is not None:
+                    yield tuple(current)
+                current = [cursor, stop, top]
+            cursor = stop + 1
+        cursor = max(cursor, start)
+        heapq.heappush(active, (end - start, order, end, record))
+    if current is not None:
+        yield tuple(current)
+
+
+def compile_database(ranges, filename):
+    """
+        Writes (start, end, record) ranges to a binary database file:
+          header   4 x uint32: magic, version, segment count n, record count m
+          starts   n x uint32, sorted
+          ends     n x uint32
+          records  n x uint32: record index of each segment
+          offsets  (m + 1) x uint32: file offsets of the JSON records
+          the JSON records, UTF-8
+        Identical records are stored once. Integers use the machine byte order;
+        the magic number tells a reader with the other order to stop.
+        Returns (segment count, record count).
+    """
+    record_index = {}
+    blobs = []
+    keys = []
+    for start, end, record in ranges:
+        blob = json.dumps(record, separators=(",", ":")).encode("utf-8")
+        index = record_index.setdefault(blob, len(blobs))
+        if index == len(blobs):
+            blobs.append(blob)
+        # One int per range: sorts by start, wider ranges first, then by input order
+        keys.append(start << 96 | (0xFFFFFFFF - end) << 64 | len(keys) << 32 | index)
+    keys.sort()
+    starts, ends, records = array("I"), array("I"), array("I")
+    for start, end, index in disjoint_segments(
+            (key >> 96, 0xFFFFFFFF - (key >> 64 & 0xFFFFFFFF), key & 0xFFFFFFFF) for key in keys):
+        starts.append(start)
+        ends.append(end)
+        records.append(index)
+    offsets = array("I")
+    position = 4 * (HEADER_WORDS + 3 * len(starts) + len(blobs) + 1)
+    for blob in blobs:
+        offsets.append(position)
+        position += len(blob)
+    offsets.append(position)
+    with open(filename, "wb") as file:
+        array("I", [MAGIC, VERSION, len(starts), len(blobs)]).tofile(file)
+        for values in (starts, ends, records, offsets):
+            values.tofile(file)
+        for blob in blobs:
+            file.write(blob)
+    return len(starts), len(blobs)
+
+
+class PrefixDatabase:
+    """
+        Read-only view of a compiled database. The file is memory-mapped and
+        the uint32 arrays are read in place, so opening it costs the same for
+        a thousand or a million ranges and nothing is copied to the Python heap.
+    """
+    def __init__(self, filename):
+        self.name = os.path.splitext(os.path.basename(filename))[0]
+        with open(filename, "rb") as file:
+            try:
+                self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise ValueError(f"Error: {filename} is empty.")
+        view = memoryview(self.map)
+        header = view[:4 * HEADER_WORDS].cast("I") if len(view) >= 4 * HEADER_WORDS else None
+        if header is None or header[0] != MAGIC or header[1] != VERSION:
+            if header is not None:
+                header.release()
+            view.release()
+            self.map.close()
+            raise ValueError(f"Error: {filename} is not a prefix database (or was compiled with another byte order).")
+        count, records = header[2], header[3]
+        header.release()
+        if len(view) < 4 * (HEADER_WORDS + 3 * count + records + 1):
+            view.release()
+            self.map.close()
+            raise ValueError(f"Error: {filename} is truncated.")
+
+        def words(index, length):
+            return view[4 * index: 4 * (index + length)].cast("I")
+
+        self.starts = words(HEADER_WORDS, count)
+        self.ends = words(HEADER_WORDS + count, count)
+        self.records = words(HEADER_WORDS + 2 * count, count)
+        self.offsets = words(HEADER_WORDS + 3 * count, records + 1)
+        self.view = view
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for values in (self.starts, self.ends, self.records, self.offsets, self.view):
+            values.release()
+        self.map.close()
+
+    def record(self, index):
+        return json.loads(self.map[self.offsets[index]:self.offsets[index + 1]])
+
+    def lookup(self, address):
+        """
+            Returns the record of the range containing the integer address, or None.
+        """
+        position = bisect.bisect_right(self.starts, address) - 1
+        if position < 0 or self.ends[position] < address:
+            return None
+        return self.record(self.records[position])
+
+    def fyi(self, address):
+        """
+            The record as an FYI entry for get_fyi_info: "category" defaults to the
+            database name and "usage" to the record's other fields.
+        """
+        record = self.lookup(address)
+        if record is None:
+            return None
+        details = ", ".join(f"{key}: {value}" for key, value in record.items() if key not in ("category", "usage"))
+        return {**record, "category": record.get("category", self.name), "usage": record.get("usage", details)}
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Compiles range tables into memory-mapped prefix databases.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    compile_parser = commands.add_parser("compile", help="compile JSON/CSV range lists into one database")
+    compile_parser.add_argument("inputs", nargs="+", help=".json or .csv range lists")
+    compile_parser.add_argument("output", help="database file to write")
+    lookup_parser = commands.add_parser("lookup", help="look up addresses in a database")
+    lookup_parser.add_argument("database")
+    lookup_parser.add_argument("addresses", nargs="+")
+    args = parser.parse_args(argv[1:])
+
+    try:
+        if args.command == "compile":
+            ranges = (entry for filename in args.inputs for entry in read_ranges(filename))
+            segments, records = compile_database(ranges, args.output)
+            print(f"{args.output}: {segments} segments, {records} records")
+            return
+        with PrefixDatabase(args.database) as database:
+            for address in args.addresses:
+                ip = parse_ipv4(address.strip())
+                if ip is None:
+                    print(f"{address}: Error: Invalid IP format.")
+                    continue
+                print(f"{address}: {json.dumps(database.lookup(ip))}")
+    except (OSError, ValueError) as msg:
+        print(msg)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,127 @@
+import sys
+import json
+import time
+import atexit
+import functools
+import contextlib
+
+
+# Stage name -> [calls, wall seconds, CPU seconds]
+stats = {}
+enabled = False
+_started = None
+
+
+def enable(output_format="table"):
+    """
+        Turns recording on. With output_format "table" or "json" the summary
+        is written to stderr when the process exits; with None it is only
+        collected (worker processes send theirs back with take()).
+    """
+    global enabled, _started
+    if enabled:
+        return
+    enabled = True
+    _started = (time.perf_counter(), time.process_time())
+    if output_format is not None:
+        atexit.register(report, output_format, sys.stderr)
+
+
+def _timed(name, function):
+    record = stats.setdefault(name, [0, 0.0, 0.0])
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            record[0] += 1
+            record[1] += time.perf_counter() - wall
+            record[2] += time.process_time() - cpu
+    wrapper.profiled = True
+    return wrapper
+
+
+def instrument(namespace, names, prefix=""):
+    """
+        Replaces the functions namespace[name] (a module's globals() or a class)
+        with timed wrappers. Nothing is wrapped until profiling is enabled,
+        so a normal run pays no overhead at all.
+    """
+    for name in names:
+        function = namespace[name] if isinstance(namespace, dict) else getattr(namespace, name)
+        if getattr(function, "profiled", False):
+            continue
+        wrapper = _timed(prefix + name, function)
+        if isinstance(namespace, dict):
+            namespace[name] = wrapper
+        else:
+            setattr(namespace, name, wrapper)
+
+
+@contextlib.contextmanager
+def stage(name):
+    """
+        Times a block of code as one call of stage name (only when enabled).
+        Meant for coarse stages, e.g. once per chunk, not once per address.
+    """
+    if not enabled:
+        yield
+        return
+    record = stats.setdefault(name, [0, 0.0, 0.0])
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield
+    finally:
+        record[0] += 1
+        record[1] += time.perf_counter() - wall
+        record[2] += time.process_time() - cpu
+
+
+def take():
+    """
+        Returns the stats collected so far and resets them, e.g. per chunk in a worker.
+    """
+    taken = {name: list(record) for name, record in stats.items() if record[0]}
+    for record in stats.values():
+        record[:] = [0, 0.0, 0.0]
+    return taken
+
+
+def merge(other):
+    """
+        Adds stats returned by take() in another process.
+    """
+    for name, (calls, wall, cpu) in other.items():
+        record = stats.setdefault(name, [0, 0.0, 0.0])
+        record[0] += calls
+        record[1] += wall
+        record[2] += cpu
+
+
+def summary():
+    """
+        Stages with at least one call, plus the total since enable().
+        Stage times are inclusive: print_info contains get_fyi_info.
+    """
+    result = {name: {"calls": calls, "wall_seconds": wall, "cpu_seconds": cpu}
+              for name, (calls, wall, cpu) in stats.items() if calls}
+    if _started is not None:
+        result["total"] = {"calls": 1, "wall_seconds": time.perf_counter() - _started[0],
+                           "cpu_seconds": time.process_time() - _started[1]}
+    return result
+
+
+def report(output_format="table", output=sys.stderr):
+    result = summary()
+    if output_format == "json":
+        output.write(json.dumps(result) + "\n")
+        return
+    output.write("\n----- Profile -----\n\n")
+    output.write(f"{'Stage':<28} {'Calls':>10} {'Wall ms':>12} {'CPU ms':>12} {'µs/call':>10}\n")
+    for name, record in result.items():
+        output.write(f"{name:<28} {record['calls']:>10} {record['wall_seconds'] * 1e3:>12.2f} "
+                     f"{record['cpu_seconds'] * 1e3:>12.2f} "
+                     f"{record['wall_seconds'] / record['calls'] * 1e6:>10.2f}\n")
+    output.write("\n")
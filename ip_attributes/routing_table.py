@@ -0,0 +1,247 @@
+import sys
+import time
+import random
+from array import array
+
+from ip_attributes import Subnet, PREFIX_TO_MASK, parse_arguments
+
+
+NO_NODE = -1
+
+
+def parse_route(route):
+    """
+        Parses a route destination like the level configs use:
+        "default", "0.0.0.0/0" or "148.7.129.0/26". Returns a Subnet.
+    """
+    if route.strip() == "default":
+        return Subnet(0, 0)
+    return Subnet(*parse_arguments([route]))
+
+
+class RoutingTable:
+    """
+        Longest-prefix-match table stored as a path-compressed binary
+        (Patricia) trie. Nodes live in parallel arrays instead of objects:
+        key/length of the prefix, the two children and a value slot.
+        Node 0 is the root (0.0.0.0/0). A trie of n prefixes has at most
+        2n + 1 nodes; deleted nodes are reused through a free list.
+    """
+    def __init__(self):
+        self.keys = array("I", [0])
+        self.lengths = array("B", [0])
+        self.zero = array("i", [NO_NODE])
+        self.one = array("i", [NO_NODE])
+        self.slots = array("i", [NO_NODE])
+        self.values = []
+        self.free_nodes = []
+        self.free_slots = []
+        self.size = 0
+
+    @classmethod
+    def from_routes(cls, routes):
+        """
+            Builds a table from (Subnet, value) pairs.
+        """
+        table = cls()
+        for subnet, value in routes:
+            table.insert(subnet.network_address, subnet.cidr, value)
+        return table
+
+    def _new_node(self, key, length):
+        if self.free_nodes:
+            node = self.free_nodes.pop()
+            self.keys[node] = key
+            self.lengths[node] = length
+            self.zero[node] = self.one[node] = self.slots[node] = NO_NODE
+            return node
+        self.keys.append(key)
+        self.lengths.append(length)
+        self.zero.append(NO_NODE)
+        self.one.append(NO_NODE)
+        self.slots.append(NO_NODE)
+        return len(self.keys) - 1
+
+    def _set_value(self, node, value):
+        slot = self.slots[node]
+        if slot != NO_NODE:
+            self.values[slot] = value
+            return
+        if self.free_slots:
+            slot = self.free_slots.pop()
+            self.values[slot] = value
+        else:
+            slot = len(self.values)
+            self.values.append(value)
+        self.slots[node] = slot
+        self.size += 1
+
+    def _children(self, address, length):
+        """
+            Returns the child array to follow from a node of the given length.
+        """
+        return self.one if (address >> (31 - length)) & 1 else self.zero
+
+    def insert(self, network, length, value):
+        """
+            Adds or replaces the route network/length.
+        """
+        network &= PREFIX_TO_MASK[length]
+        node = 0
+        while True:
+            if self.lengths[node] == length:
+                self._set_value(node, value)
+                return
+            children = self._children(network, self.lengths[node])
+            child = children[node]
+            if child == NO_NODE:
+                leaf = self._new_node(network, length)
+                children[node] = leaf
+                self._set_value(leaf, value)
+                return
+            child_length = self.lengths[child]
+            shorter = min(child_length, length)
+            difference = (self.keys[child] ^ network) & PREFIX_TO_MASK[shorter]
+            common = 32 - difference.bit_length() if difference else shorter
+            if common == child_length:
+                node = child
+                continue
+            # Split: a new node for the common prefix takes the child's place
+            split = self._new_node(network & PREFIX_TO_MASK[common], common)
+            children[node] = split
+            self._children(self.keys[child], common)[split] = child
+            if common == length:
+                self._set_value(split, value)
+            else:
+                leaf = self._new_node(network, length)
+                self._children(network, common)[split] = leaf
+                self._set_value(leaf, value)
+            return
+
+    def insert_subnet(self, subnet, value):
+        self.insert(subnet.network_address, subnet.cidr, value)
+
+    def delete(self, network, length):
+        """
+            Removes the route network/length. Returns True if it existed.
+            Nodes left without a value and with fewer than two children
+            are spliced out so the trie stays compact.
+        """
+        network &= PREFIX_TO_MASK[length]
+        path = []
+        node = 0
+        while self.lengths[node] < length:
+            child = self._children(network, self.lengths[node])[node]
+            if child == NO_NODE or self.lengths[child] > length or \
+                    (self.keys[child] ^ network) & PREFIX_TO_MASK[self.lengths[child]]:
+                return False
+            path.append(node)
+            node = child
+        if self.lengths[node] != length or self.keys[node] != network or self.slots[node] == NO_NODE:
+            return False
+        slot = self.slots[node]
+        self.values[slot] = None
+        self.free_slots.append(slot)
+        self.slots[node] = NO_NODE
+        self.size -= 1
+        while node != 0 and self.slots[node] == NO_NODE:
+            zero, one = self.zero[node], self.one[node]
+            if zero != NO_NODE and one != NO_NODE:
+                break
+            remaining = zero if zero != NO_NODE else one
+            parent = path.pop()
+            self._children(self.keys[node], self.lengths[parent])[parent] = remaining
+            self.free_nodes.append(node)
+            if remaining != NO_NODE:
+                break
+            node = parent
+        return True
+
+    def lookup(self, address):
+        """
+            Returns the value of the longest prefix containing address, or None.
+        """
+        keys, lengths, zero, one, slots = self.keys, self.lengths, self.zero, self.one, self.slots
+        best = slots[0]
+        node = 0
+        while True:
+            length = lengths[node]
+            if length == 32:
+                break
+            node = (one if (address >> (31 - length)) & 1 else zero)[node]
+            if node == NO_NODE or (address ^ keys[node]) & PREFIX_TO_MASK[lengths[node]]:
+                break
+            if slots[node] != NO_NODE:
+                best = slots[node]
+        return None if best == NO_NODE else self.values[best]
+
+    def lookup_many(self, addresses):
+        """
+            Batched lookup: returns a list with one value (or None) per address.
+        """
+        keys, lengths, zero, one, slots, values = self.keys, self.lengths, self.zero, self.one, self.slots, self.values
+        masks = PREFIX_TO_MASK
+        root = slots[0]
+        results = []
+        for address in addresses:
+            best = root
+            node = 0
+            length = 0
+            while length != 32:
+                node = (one if (address >> (31 - length)) & 1 else zero)[node]
+                if node == NO_NODE:
+                    break
+                length = lengths[node]
+                if (address ^ keys[node]) & masks[length]:
+                    break
+                if slots[node] != NO_NODE:
+                    best = slots[node]
+            results.append(None if best == NO_NODE else values[best])
+        return results
+
+    def __len__(self):
+        return self.size
+
+    def memory_usage(self):
+        """
+            Bytes used by the node arrays and the value list (values themselves excluded).
+        """
+        arrays = {name: getattr(self, name) for name in ("keys", "lengths", "zero", "one", "slots")}
+        usage = {name: values.buffer_info()[1] * values.itemsize for name, values in arrays.items()}
+        usage["values"] = sys.getsizeof(self.values)
+        usage["nodes"] = len(self.keys) - len(self.free_nodes)
+        usage["prefixes"] = self.size
+        usage["total_bytes"] = sum(usage[name] for name in list(arrays) + ["values"])
+        return usage
+
+
+def brute_force_lookup(routes, address):
+    """
+        Reference implementation: scans every (network, length, value) route.
+    """
+    best_length, best_value = -1, None
+    for network, length, value in routes:
+        if address & PREFIX_TO_MASK[length] == network and length > best_length:
+            best_length, best_value = length, value
+    return best_value
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    rng = random.Random(0)
+    print(f"\n----- Routing table ({count} random prefixes) -----\n")
+    start = time.perf_counter()
+    table = RoutingTable()
+    for index in range(count):
+        length = rng.randint(8, 32)
+        table.insert(rng.getrandbits(32), length, index)
+    print(f"Build         : {time.perf_counter() - start:8.2f} s")
+    addresses = [rng.getrandbits(32) for _ in range(200000)]
+    start = time.perf_counter()
+    table.lookup_many(addresses)
+    elapsed = time.perf_counter() - start
+    print(f"Lookup        : {elapsed / len(addresses) * 1e6:8.2f} µs/address")
+    usage = table.memory_usage()
+    print(f"Nodes         : {usage['nodes']}")
+    print(f"Memory        : {usage['total_bytes'] / 2 ** 20:8.1f} MiB "
+          f"({usage['total_bytes'] / max(usage['prefixes'], 1):.1f} bytes/prefix)\n")
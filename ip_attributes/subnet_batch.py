@@ -0,0 +1,79 @@
+import numpy as np
+
+from ip_attributes import PREFIX_TO_MASK
+
+
+MASK_TABLE = np.array(PREFIX_TO_MASK, dtype=np.uint32)
+
+
+def calculate_subnets(ips, cidrs):
+    """
+        Vectorized Subnet for many (ip, cidr) pairs in one pass.
+        ips: array-like of uint32 addresses, cidrs: array-like of whole prefixes 0-32
+        (anything else raises ValueError).
+        Returns a dict of arrays with the same fields Subnet computes.
+        /31 and /32 follow the same rules as Subnet.calculate_usable_range.
+        next/previous network are only valid where has_next/has_previous
+        is True (where Subnet would print "No next/previous network").
+    """
+    ips = np.asarray(ips, dtype=np.uint32)
+    cidrs = np.asarray(cidrs)
+    if ips.shape != cidrs.shape:
+        raise ValueError("Error: ips and cidrs must have the same shape.")
+    # Prefixes must be whole numbers: astype(np.uint8) would silently truncate 24.7 to 24
+    if cidrs.dtype.kind not in "iuf" or (cidrs.dtype.kind == "f" and not np.array_equal(cidrs, np.trunc(cidrs))):
+        raise ValueError("Error: Invalid CIDR/mask format. Expected: /<0–31> or valid subnet mask.")
+    if cidrs.size and (cidrs.min() < 0 or cidrs.max() > 32):
+        raise ValueError("Error: Invalid CIDR/mask format. Expected: /<0–31> or valid subnet mask.")
+    cidrs = cidrs.astype(np.uint8)
+
+    masks = MASK_TABLE[cidrs]
+    network = ips & masks
+    broadcast = network | ~masks
+    group_size = np.left_shift(np.uint64(1), (32 - cidrs).astype(np.uint64))
+
+    is_32 = cidrs == 32
+    is_31 = cidrs == 31
+    point_to_point = is_31 | is_32
+    # Wrapping of network + 1 / broadcast - 1 only happens on rows replaced by np.where
+    with np.errstate(over="ignore"):
+        first_usable = np.where(point_to_point, network, network + np.uint32(1))
+        last_usable = np.where(is_32, network, np.where(is_31, broadcast, broadcast - np.uint32(1)))
+    usable_hosts = np.where(is_32, 0, np.where(is_31, 2, group_size.astype(np.int64) - 2))
+
+    next_network = network.astype(np.uint64) + group_size
+    has_next = next_network <= 0xFFFFFFFF
+    previous_network = network.astype(np.int64) - group_size.astype(np.int64)
+    has_previous = previous_network >= 0
+
+    return {
+        "network_address": network,
+        "broadcast_address": broadcast,
+        "mask": masks,
+        "first_usable_ip": first_usable,
+        "last_usable_ip": last_usable,
+        "usable_hosts": usable_hosts,
+        "group_size": group_size,
+        "next_network": np.where(has_next, next_network, 0).astype(np.uint32),
+        "has_next": has_next,
+        "previous_network": np.where(has_previous, previous_network, 0).astype(np.uint32),
+        "has_previous": has_previous,
+    }
+
+
+def dotted_to_uint32(ips):
+    """
+        Converts an iterable of dotted-decimal strings to a uint32 array.
+        e.g. ['192.168.1.1'] => array([3232235777], dtype=uint32)
+    """
+    octets = np.array([ip.split(".") for ip in ips], dtype=np.uint32).reshape(-1, 4)
+    return (octets[:, 0] << 24) | (octets[:, 1] << 16) | (octets[:, 2] << 8) | octets[:, 3]
+
+
+def uint32_to_dotted(values):
+    """
+        Converts a uint32 array back to a list of dotted-decimal strings.
+    """
+    values = np.asarray(values, dtype=np.uint32)
+    octets = np.stack([values >> 24, (values >> 16) & 255, (values >> 8) & 255, values & 255], axis=-1)
+    return [".".join(map(str, row)) for row in octets.tolist()]
@@ -0,0 +1,233 @@
+import sys
+import heapq
+import argparse
+import tempfile
+from array import array
+
+from ip_attributes import Subnet, PREFIX_TO_MASK, read_lines, checked_lines, parse_line
+from bulk_analysis import positive_int
+
+
+READ_BLOCK = 65536  # intervals read from a run file at a time
+
+
+def range_to_cidrs(start, end):
+    """
+        Splits the address range start..end (inclusive) into the minimal
+        list of aligned CIDR blocks. Yields (network, prefix).
+    """
+    while start <= end:
+        size = start & -start if start else 1 << 32
+        while size > end - start + 1:
+            size >>= 1
+        yield start, 33 - size.bit_length()
+        start += size
+
+
+def coalesce(intervals):
+    """
+        Merges sorted (start, end) intervals that overlap or touch.
+    """
+    current_start = current_end = None
+    for start, end in intervals:
+        if current_start is None:
+            current_start, current_end = start, end
+        elif start <= current_end + 1:
+            if end > current_end:
+                current_end = end
+        else:
+            yield current_start, current_end
+            current_start, current_end = start, end
+    if current_start is not None:
+        yield current_start, current_end
+
+
+def parse_intervals(lines, errors):
+    """
+        Turns (line_number, text) pairs into (network, broadcast) intervals
+        using the same validation as the CLI. Bad lines are appended to errors.
+    """
+    for line_number, text in lines:
+        try:
+            subnet = Subnet(*parse_line(text))
+        except ValueError as msg:
+            errors.append((line_number, text, str(msg)))
+            continue
+        yield subnet.network_address, subnet.broadcast_address
+
+
+def write_run(intervals):
+    """
+        Sorts and coalesces one in-memory run and spills it to a temporary file
+        as packed uint32 (start, end) pairs.
+    """
+    packed = array("I")
+    for start, end in coalesce(sorted(intervals)):
+        packed.append(start)
+        packed.append(end)
+    run = tempfile.TemporaryFile()
+    packed.tofile(run)
+    run.seek(0)
+    return run
+
+
+def read_run(run):
+    """
+        Streams (start, end) pairs back from a run file in blocks.
+    """
+    while True:
+        block = run.read(READ_BLOCK * 8)
+        if not block:
+            return
+        packed = array("I")
+        packed.frombytes(block)
+        for i in range(0, len(packed), 2):
+            yield packed[i], packed[i + 1]
+
+
+def summarize(intervals, run_size=1000000):
+    """
+        External sort-merge: intervals are collected into runs of run_size,
+        each run is sorted, coalesced and spilled to disk, and the runs are
+        merged lazily. Memory stays bounded by run_size plus one read block
+        per run. Yields the minimal covering CIDRs as (network, prefix).
+    """
+    runs = []
+    buffer = []
+    for interval in intervals:
+        buffer.append(interval)
+        if len(buffer) >= run_size:
+            runs.append(write_run(buffer))
+            buffer = []
+    if runs:
+        if buffer:
+            runs.append(write_run(buffer))
+        merged = heapq.merge(*(read_run(run) for run in runs))
+    else:
+        merged = sorted(buffer)
+    try:
+        for start, end in coalesce(merged):
+            yield from range_to_cidrs(start, end)
+    finally:
+        for run in runs:
+            run.close()
+
+
+def supernet(first, last):
+    """
+        Smallest CIDR block containing both (network, prefix) blocks.
+    """
+    start = first[0]
+    end = last[0] + (1 << (32 - last[1])) - 1
+    prefix = 32 - (start ^ end).bit_length()
+    return start & PREFIX_TO_MASK[prefix], prefix
+
+
+def summarize_to_k(prefixes, k, max_extra=None):
+    """
+        Reduces a sorted, non-overlapping prefix list to at most k prefixes
+        by repeatedly replacing neighbours with their common supernet,
+        greedily choosing the merge that adds the fewest extra addresses.
+        max_extra bounds the total over-coverage; merging stops before
+        exceeding it even if more than k prefixes remain.
+        Returns (prefixes, extra addresses covered).
+    """
+    blocks = list(prefixes)
+    if len(blocks) <= k:
+        return blocks, 0
+    # Doubly linked list over block indexes; merged-away blocks become None
+    next_index = list(range(1, len(blocks))) + [None]
+    previous_index = [None] + list(range(len(blocks) - 1))
+    count = len(blocks)
+    extra = 0
+    heap = []
+
+    def covering(index):
+        """
+            Supernet of blocks[index] and its successor. It may also swallow
+            neighbours on both sides: returns (extra cost, network, prefix,
+            first covered index, index after the last covered block).
+        """
+        network, prefix = supernet(blocks[index], blocks[next_index[index]])
+        end = network + (1 << (32 - prefix))
+        first = index
+        while previous_index[first] is not None and blocks[previous_index[first]][0] >= network:
+            first = previous_index[first]
+        covered, stop = 0, first
+        while stop is not None and blocks[stop][0] < end:
+            covered += 1 << (32 - blocks[stop][1])
+            stop = next_index[stop]
+        return (1 << (32 - prefix)) - covered, network, prefix, first, stop
+
+    def push(index):
+        if index is not None and next_index[index] is not None:
+            heapq.heappush(heap, (covering(index)[0], index, blocks[index], blocks[next_index[index]]))
+
+    for index in range(len(blocks) - 1):
+        push(index)
+    while count > k and heap:
+        cost, index, block, other_block = heapq.heappop(heap)
+        other = next_index[index]
+        if blocks[index] != block or other is None or blocks[other] != other_block:
+            continue  # stale: one of the pair has been merged since
+        current, network, prefix, first, stop = covering(index)
+        if current != cost:
+            # Neighbouring merges changed what the supernet covers
+            heapq.heappush(heap, (current, index, block, other_block))
+            continue
+        if max_extra is not None and extra + cost > max_extra:
+            break
+        cursor = next_index[first]
+        while cursor != stop:
+            blocks[cursor] = None
+            count -= 1
+            cursor = next_index[cursor]
+        blocks[first] = (network, prefix)
+        next_index[first] = stop
+        if stop is not None:
+            previous_index[stop] = first
+        extra += cost
+        push(first)
+        push(previous_index[first])
+    return [block for block in blocks if block is not None], extra
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        description="Summarizes 'ip/cidr' or 'ip mask' lines into the minimal covering CIDR list.")
+    parser.add_argument("input", nargs="?", default="-", help="input file (default: stdin)")
+    parser.add_argument("--run-size", type=positive_int, default=1000000,
+                        help="prefixes sorted in memory before spilling a run to disk (default: 1000000)")
+    parser.add_argument("--max-prefixes", type=int, metavar="K",
+                        help="allow over-coverage to output at most K prefixes")
+    parser.add_argument("--max-extra", type=int, metavar="ADDRESSES",
+                        help="with --max-prefixes: never cover more than this many extra addresses")
+    args = parser.parse_args(argv[1:])
+
+    name = "stdin" if args.input == "-" else args.input
+    try:
+        source = sys.stdin if args.input == "-" else open(args.input, "r")
+    except OSError as msg:
+        print(f"Error: Cannot read '{name}': {msg.strerror or msg}.")
+        return
+    errors = []
+    extra = 0
+    try:
+        result = summarize(parse_intervals(read_lines(checked_lines(source, name)), errors), args.run_size)
+        if args.max_prefixes is not None:
+            result, extra = summarize_to_k(result, args.max_prefixes, args.max_extra)
+        for network, prefix in result:
+            print(f"{Subnet.int_to_dotted_decimal(network)}/{prefix}")
+    except ValueError as msg:
+        print(msg)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    for line_number, text, msg in errors:
+        print(f"Line {line_number}: {msg} ({text})", file=sys.stderr)
+    if extra:
+        print(f"Extra addresses covered: {extra}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
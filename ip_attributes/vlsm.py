@@ -0,0 +1,115 @@
+import sys
+import heapq
+
+from ip_attributes import Subnet, parse_arguments
+
+
+def prefix_for_hosts(hosts):
+    """
+        Smallest block (longest prefix) with at least `hosts` usable addresses,
+        using the same /31 and /32 rules as Subnet.calculate_usable_range.
+        e.g. 60 -> 26, 12 -> 28, 2 -> 31, 0 -> 32
+    """
+    if hosts < 0:
+        raise ValueError("Error: Host count must not be negative.")
+    if hosts == 0:
+        return 32
+    if hosts <= 2:
+        return 31
+    prefix = 32 - (hosts + 1).bit_length()
+    if prefix < 0:
+        raise ValueError(f"Error: {hosts} hosts do not fit in IPv4.")
+    return prefix
+
+
+class BuddyAllocator:
+    """
+        Buddy allocator over one parent Subnet.
+        free[prefix] is a heap of free block addresses of that size, so the
+        lowest free address is always handed out first. Allocating a /p takes
+        the smallest free block that fits and splits it in halves down to /p;
+        the unused upper halves go back to the free lists.
+    """
+    def __init__(self, parent):
+        self.parent = parent
+        self.free = {prefix: [] for prefix in range(parent.cidr, 33)}
+        self.free[parent.cidr].append(parent.network_address)
+
+    def allocate(self, prefix):
+        """
+            Returns the network address of a free /prefix block, or None if full.
+        """
+        if prefix < self.parent.cidr:
+            return None
+        size = prefix
+        while size >= self.parent.cidr and not self.free[size]:
+            size -= 1
+        if size < self.parent.cidr:
+            return None
+        network = heapq.heappop(self.free[size])
+        while size < prefix:
+            size += 1
+            heapq.heappush(self.free[size], network + (1 << (32 - size)))
+        return network
+
+    def free_blocks(self):
+        """
+            Remaining free space as (network, prefix) pairs sorted by address.
+        """
+        return sorted((network, prefix) for prefix, networks in self.free.items() for network in networks)
+
+
+def plan_vlsm(parent, requirements):
+    """
+        Packs host requirements into the parent Subnet.
+        requirements: list of host counts or (name, hosts) pairs.
+        Largest blocks are placed first, each aligned to its own size, which
+        gives the tightest packing. Returns (allocations, leftover) where
+        allocations is in request order: dicts with name, hosts and subnet,
+        and leftover is a list of free Subnets.
+        Raises ValueError if the requirements do not fit.
+    """
+    named = [(item if isinstance(item, tuple) else (f"LAN {index + 1}", item))
+             for index, item in enumerate(requirements)]
+    order = sorted(range(len(named)), key=lambda index: prefix_for_hosts(named[index][1]))
+    allocator = BuddyAllocator(parent)
+    allocations = [None] * len(named)
+    for index in order:
+        name, hosts = named[index]
+        prefix = prefix_for_hosts(hosts)
+        network = allocator.allocate(prefix)
+        if network is None:
+            raise ValueError(f"Error: Not enough space in {parent.int_to_dotted_decimal(parent.network_address)}"
+                             f"/{parent.cidr} for {name} ({hosts} hosts, /{prefix}).")
+        allocations[index] = {"name": name, "hosts": hosts, "subnet": Subnet(network, prefix)}
+    leftover = [Subnet(network, prefix) for network, prefix in allocator.free_blocks()]
+    return allocations, leftover
+
+
+def print_plan(allocations, leftover):
+    print("\n----- VLSM plan -----\n")
+    for allocation in sorted(allocations, key=lambda a: a["subnet"].network_address):
+        subnet = allocation["subnet"]
+        print(f"{allocation['name']:<10} {allocation['hosts']:>6} hosts -> "
+              f"{subnet.int_to_dotted_decimal(subnet.network_address)}/{subnet.cidr}  "
+              f"({subnet.int_to_dotted_decimal(subnet.first_usable_ip)} - "
+              f"{subnet.int_to_dotted_decimal(subnet.last_usable_ip)}, mask {subnet.mask})")
+    print("\n------ Free space -----\n")
+    for subnet in leftover:
+        print(f"{subnet.int_to_dotted_decimal(subnet.network_address)}/{subnet.cidr}")
+    print(f"\nFree addresses: {sum(subnet.snet_group_size() for subnet in leftover)}\n")
+
+
+if __name__ == '__main__':
+    try:
+        if len(sys.argv) < 3:
+            raise ValueError("Error: Usage: <program> <parent ip/cidr> <hosts> [<hosts> ...]")
+        parent = Subnet(*parse_arguments([sys.argv[1]]))
+        hosts = []
+        for arg in sys.argv[2:]:
+            if not arg.isdigit():
+                raise ValueError(f"Error: Invalid host count '{arg}'.")
+            hosts.append(int(arg))
+        print_plan(*plan_vlsm(parent, hosts))
+    except ValueError as msg:
+        print(msg)